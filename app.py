@@ -14,12 +14,16 @@ from __future__ import annotations
 # - documentar claramente as regras de negócio no fluxo de UI
 # """
 
+import functools
+import io
+import os
 import re
 import calendar
 
 import pandas as pd
 import streamlit as st
 
+from dataclasses import replace
 from datetime import date
 import plotly.express as px
 
@@ -33,21 +37,98 @@ from src.config import (
     SPLIT_LABELS,
     TIPO_LABELS,
     INSTALLMENT_RE,
+    INVOICE_MONTHS,
+    EDITOR_SORT_LABELS,
+    DEFAULT_CLOSING_DAY,
+    DEFAULT_DUE_DAY,
+    MONEY_COLUMNS,
+    TREND_MONTHS,
+)
+from src import cache, instrumentation, profiling
+from src.cache import (
+    balance_history,
+    balance_trend,
+    cache_stats,
+    category_pivot,
+    count_transactions,
+    current_balance_for_account,
+    list_active_installments,
+    monthly_trend,
 )
 from src.db import init_db
-from src.services.accounts import create_account, list_accounts
-from src.services.categories import create_category, get_category_id_by_name, list_categories
-from src.services.dashboards import balances_by_account, cash_total_balance
+from src.money import to_cents, to_reais
+from src.profiling import profiled
+from src.services.accounts import create_account, update_account_cycle
+from src.services import analytics
+from src.services.archive import archived_months
+from src.services.billing import assign_cycles, card_cycle, cycle_bounds, invoice_window, invoices
+from src.services.categories import create_category, get_category_id_by_name
+from src.services.context import DataContext
+from src.services.export import csv_file, parquet_zip
+from src.services.importer import ImportReport, import_csv
+from src.services.installments import create_installment_plan
+from src.services.olap import engine_name
 from src.services.seed import seed_defaults
 from src.services.transactions import (
     create_transaction,
-    current_balance_for_account,
+    create_transfer,
+    PAGE_SIZE,
+    SEARCH_LIMIT,
     delete_transaction,
-    list_transactions,
+    list_transactions_page,
+    search_ids,
+    search_transactions,
     update_transaction,
 )
 
 
+def debug_enabled() -> bool:
+    """Painéis de diagnóstico: `?debug=1` na URL ou `FINDASH_DEBUG=1` no ambiente."""
+    return st.query_params.get("debug") == "1" or os.environ.get("FINDASH_DEBUG") == "1"
+
+
+def profile_modes() -> set[str]:
+    """Tempo por seção: `?profile=1` (ou `time`, `tracemalloc`, `cprofile`) / FINDASH_PROFILE."""
+    return profiling.parse_modes(st.query_params.get("profile") or os.environ.get("FINDASH_PROFILE"))
+
+
+def instrumented_fragment(label: str):
+    """Mede as consultas SQL e o tempo de um `@st.fragment` quando só ele roda.
+
+    No rerun completo o fragmento já está dentro do `script_run()`, do
+    `record()` e do `profile_rerun()` do `main()`. Num rerun só do fragmento
+    o `main()` não roda: a versão dos dados é conferida uma vez
+    (`cache.script_run()`) e o `DataContext` do último rerun completo descarta
+    o que leu numa versão anterior (`ctx.sync`); as consultas vão para um `record()` próprio e o
+    perfil para um `profile_rerun()` com o rótulo `fragmento:<label>`,
+    resumidos no fim do fragmento com o painel de debug/perfil ligado.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if instrumentation.current() is not None:
+                return fn(*args, **kwargs)
+            modes = profile_modes() if profiling.current() is None else set()
+            with (
+                instrumentation.record(collect=debug_enabled()) as queries,
+                cache.script_run() as version,
+                profiling.profile_rerun(modes, label=f"fragmento:{label}") as prof,
+            ):
+                for arg in (*args, *kwargs.values()):
+                    if isinstance(arg, DataContext):
+                        arg.sync(version)
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    if debug_enabled():
+                        st.caption(f"Consultas SQL no rerun de `{label}`: {queries.n} ({queries.total_ms:.1f} ms)")
+                    if prof is not None:
+                        with st.expander(f"Tempo por seção no rerun de `{label}` (ms)"):
+                            st.dataframe(prof.table(), hide_index=True)
+        return wrapper
+    return decorator
+
+
 # Bootstrap da aplicação: inicializa banco e dados persistentes (executa uma vez por sessão).
 @st.cache_resource
 def bootstrap() -> None:
@@ -60,9 +141,9 @@ def bootstrap() -> None:
 # ----- Funções utilitárias para formatação -----
 # -----------------------------------------------
 
-def fmt_brl(x: float) -> str:
-    """Formata valor numérico para moeda BRL com separadores pt-BR."""
-    return f"R$ {x:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+def fmt_brl(cents: int) -> str:
+    """Formata valor em centavos para moeda BRL com separadores pt-BR."""
+    return f"R$ {to_reais(cents):,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
 
 
 def fmt_month(d: date) -> str:
@@ -92,23 +173,34 @@ def fmt_df(
 ) -> pd.DataFrame:
     """Aplica transformações visuais em DataFrame para exibição no Streamlit.
 
+    - `MONEY_COLUMNS`: centavos -> reais.
     - `hide`: remove colunas técnicas/irrelevantes para UI.
     - `rename`: renomeia colunas para labels de negócio.
+
+    Cada passo devolve um quadro novo; `df` não é alterado nem copiado por inteiro.
     """
-    out = df.copy()
-    if hide:
-        cols_to_drop = [c for c in hide if c in out.columns]
-        out = out.drop(columns=cols_to_drop)
+    out = df.drop(columns=[c for c in hide or [] if c in df.columns])
+    money = {c: to_reais(out[c]) for c in MONEY_COLUMNS if c in out.columns}
+    if money:
+        out = out.assign(**money)
     if rename:
         out = out.rename(columns={k: v for k, v in rename.items() if k in out.columns})
     return out
 
 
+def fmt_people(df: pd.DataFrame) -> pd.DataFrame:
+    """Troca os ids de dono, pagador e divisão pelos labels da UI (colunas ausentes são ignoradas)."""
+    labels = {"owner": fmt_owner, "paid_by": fmt_payer, "split_mode": fmt_split}
+    return df.assign(**{col: df[col].map(fmt) for col, fmt in labels.items() if col in df.columns})
+
+
 def fmt_2dp(df: pd.DataFrame) -> dict:
-    """Gera `column_config` com 2 casas decimais para colunas numéricas."""
-    cfg: dict[str, st.column_config.NumberColumn] = {}
+    """Gera `column_config` com 2 casas decimais para colunas numéricas e só a data nas datetime."""
+    cfg: dict[str, st.column_config.Column] = {}
     for col in df.columns:
-        if pd.api.types.is_numeric_dtype(df[col]):
+        if pd.api.types.is_datetime64_any_dtype(df[col]):
+            cfg[col] = st.column_config.DateColumn(format="YYYY-MM-DD")
+        elif pd.api.types.is_numeric_dtype(df[col]):
             cfg[col] = st.column_config.NumberColumn(format="%.2f")
     return cfg
 
@@ -141,22 +233,6 @@ def add_months(d: date, months: int) -> date:
     return date(y, m, day)
 
 
-def get_fatura(d: date, start_day: int = 4, end_day: int = 3) -> tuple[date, date]:
-    """Calcula o ciclo de fatura que contém `d`.
-
-    Exemplo padrão:
-    - início dia 4
-    - fim dia 3 do mês seguinte
-    """
-    if d.day >= start_day:
-        start = date(d.year, d.month, start_day)
-        end = add_months(date(d.year, d.month, end_day), 1)
-    else:
-        start = add_months(date(d.year, d.month, start_day), -1)
-        end = date(d.year, d.month, end_day)
-    return start, end
-
-
 def formata_data(start: date, end: date) -> str:
     """Texto amigável do intervalo de compras do ciclo de fatura."""
     return f"{start.strftime('%d/%m/%Y')} e {end.strftime('%d/%m/%Y')}"
@@ -173,46 +249,57 @@ def tipo_label_for(tipo_value: str) -> str:
     return next((label for label, value in TIPO_LABELS.items() if value == tipo_value), tipo_value)
 
 
-def filtra_periodo(tx_df: pd.DataFrame, mode: str = "cash") -> None:
-    """Renderiza resumo e tabelas de transações para um período.
+@profiled()
+def filtra_periodo(
+    ctx: DataContext,
+    flt: analytics.TxFilter,
+    mode: str = "cash",
+    summary: pd.DataFrame | None = None,
+) -> None:
+    """Renderiza resumo e tabelas de transações do recorte `flt`.
 
     Modos:
     - `cash`: entradas, saídas e saldo
     - `credit`: somente total da fatura (despesas negativas)
+
+    Linhas e agregações vêm do motor de análise (`ctx.analytics`). `summary`
+    (linhas do rollup mensal já filtradas) substitui a agregação das
+    transações nas métricas e no gráfico por categoria.
     """
+    tx_df = ctx.analytics.rows(flt)
     if tx_df.empty:
         st.info("Sem transações no período.")
         return
 
     # Métricas de topo mudam conforme o contexto de análise.
     if mode == "cash":
-        income = tx_df.loc[tx_df["amount"] > 0, "amount"].sum()
-        expense = tx_df.loc[tx_df["amount"] < 0, "amount"].sum()
+        if summary is not None:
+            income = summary["income"].sum()
+            expense = summary["expense"].sum()
+        else:
+            income, expense = ctx.analytics.period_totals(flt)
         saldo = income + expense
 
         c1, c2, c3 = st.columns(3)
-        c1.metric("Entradas", fmt_brl(float(income)))
-        c2.metric("Saídas", fmt_brl(float(abs(expense))))
-        c3.metric("Saldo do período", fmt_brl(float(saldo)))
+        c1.metric("Entradas", fmt_brl(income))
+        c2.metric("Saídas", fmt_brl(abs(expense)))
+        c3.metric("Saldo do período", fmt_brl(saldo))
 
     elif mode == "credit":
-        fatura = tx_df.loc[tx_df["amount"] < 0, "amount"].sum()
-        st.metric("Fatura atual", fmt_brl(float(abs(fatura))))
+        _, fatura = ctx.analytics.period_totals(flt)
+        st.metric("Fatura atual", fmt_brl(abs(fatura)))
 
     # ---- Gastos por categoria ----
     st.subheader("Gastos por categoria no período")
-    by_cat = (
-        tx_df[(tx_df["amount"] < 0) & (tx_df["category_type"] != "transfer")]
-        .groupby("category", as_index=False)["amount"]
-        .sum()
-        .sort_values("amount")
-    )
+    if summary is not None:
+        by_cat = analytics.category_expenses(summary, value_col="expense")
+    else:
+        by_cat = ctx.analytics.category_expenses(flt)
 
     if by_cat.empty:
         st.caption("Sem gastos (excluindo transferências) no período.")
 
     else:
-        by_cat["amount"] = by_cat["amount"].abs()
         plot_categories(
             by_cat,
             name_col="category",
@@ -221,19 +308,8 @@ def filtra_periodo(tx_df: pd.DataFrame, mode: str = "cash") -> None:
     
     # Tabela detalhada do período com labels de apresentação.
     st.subheader("Transações no período")
-    show_df = tx_df.copy()
-
-    if "owner" in show_df.columns:
-        show_df["owner"] = show_df["owner"].map(fmt_owner)
-    
-    if "paid_by" in show_df.columns:
-        show_df["paid_by"] = show_df["paid_by"].map(fmt_payer)
-    
-    if "split_mode" in show_df.columns:
-        show_df["split_mode"] = show_df["split_mode"].map(fmt_split)
-
     tx_ui = fmt_df(
-        show_df,
+        fmt_people(tx_df),
         rename=COL_LABELS,
         hide=["id", "account_id", "category_id", "account_type", "category_type"],
     )
@@ -273,70 +349,17 @@ def installment_next_date(d: date, months_ahead: int) -> date:
     return date(target.year, target.month, 4)
 
 
-def get_active_installments(tx_df: pd.DataFrame, as_of: date | None = None) -> pd.DataFrame:
-    if tx_df.empty or "description" not in tx_df.columns:
-        return pd.DataFrame()
-
-    if as_of is None:
-        as_of = date.today()
-
-    rows = []
-    for _, row in tx_df.iterrows():
-        info = parse_installment(str(row["description"]))
-        if not info:
-            continue
-
-        rows.append(
-            {
-                "date": row["date"],
-                "account": row["account"],
-                "category": row["category"],
-                "owner": row["owner"],
-                "amount": abs(float(row["amount"])),
-                "base_description": info["base_description"],
-                "current_installment": info["current_installment"],
-                "total_installments": info["total_installments"],
-                "remaining_installments": info["remaining_installments"],
-            }
-        )
-
-    if not rows:
-        return pd.DataFrame()
-
-    df = pd.DataFrame(rows)
-
-    # importante: considerar apenas o que já "chegou" até hoje
-    df = df[df["date"] <= as_of].copy()
-    if df.empty:
-        return pd.DataFrame()
-
-    grp_cols = ["base_description", "account", "category", "owner", "amount"]
-    df = df.sort_values(["base_description", "current_installment", "date"])
-    latest = df.groupby(grp_cols, as_index=False).tail(1).copy()
-
-    # recalcula restantes com base no estágio atual até hoje
-    latest["remaining_installments"] = (
-        latest["total_installments"] - latest["current_installment"]
-    ).clip(lower=0)
-
-    # mantém só parcelamentos ainda ativos
-    latest = latest[latest["remaining_installments"] > 0].copy()
-    if latest.empty:
-        return pd.DataFrame()
-
-    latest["next_installment"]  = latest["current_installment"] + 1
-    latest["future_commitment"] = latest["amount"] * latest["remaining_installments"]
-    latest["next_due_date"]     = latest["date"].apply(lambda d: add_months(d, 1))
-
-    latest = latest.sort_values(["next_due_date", "base_description"]).reset_index(drop=True)
-    
-    return latest
+@profiled()
+def get_active_installments(ctx: DataContext, as_of: date | None = None) -> pd.DataFrame:
+    """Parcelamentos "(n/N)" ainda sem plano, ativos em `as_of` (hoje, por padrão), pelo motor de análise."""
+    return ctx.analytics.active_installments(as_of or ctx.today)
 
 
 # -------------------------------------------- 
 # ----- Funções auxiliares para os plots -----
 # --------------------------------------------
 
+@profiled()
 def plot_values(
     df:          pd.DataFrame,
     name_col:    str,
@@ -351,8 +374,7 @@ def plot_values(
         st.info("Sem dados para exibir.")
         return
 
-    plot_df = df.copy()
-    plot_df = plot_df[plot_df[value_col] != 0]
+    plot_df = df[df[value_col] != 0]
 
     if plot_df.empty:
         st.info("Todos os valores estão zerados.")
@@ -377,6 +399,7 @@ def plot_values(
         plot_df = plot_df.sort_values(by=name_col, ascending=True)
 
     total = plot_df[value_col].sum()
+    plot_df = plot_df.assign(**{value_col: to_reais(plot_df[value_col])})
 
     if mode == "pie":
         fig = px.pie(
@@ -446,6 +469,7 @@ def plot_values(
     st.plotly_chart(fig, width="content")
 
 
+@profiled()
 def plot_credit(
     df: pd.DataFrame,
     name_col: str = "cartao",
@@ -456,8 +480,7 @@ def plot_credit(
         st.info("Sem dados para exibir.")
         return
 
-    plot_df = df.copy()
-    plot_df = plot_df[plot_df[value_col] != 0]
+    plot_df = df[df[value_col] != 0]
 
     if plot_df.empty:
         st.info("Nenhuma fatura em aberto neste ciclo.")
@@ -467,6 +490,7 @@ def plot_credit(
     plot_df = plot_df.sort_values(by=name_col, ascending=True)
 
     total = plot_df[value_col].sum()
+    plot_df = plot_df.assign(**{value_col: to_reais(plot_df[value_col])})
 
     COLORS = [
         "#B02C2C",  # Santander | Crédito
@@ -513,6 +537,27 @@ def plot_credit(
     st.plotly_chart(fig, width='content')
 
 
+@profiled()
+def plot_invoices(inv_df: pd.DataFrame) -> None:
+    """Barras agrupadas: fatura de cada cartão por mês de fechamento."""
+    plot_df = inv_df.assign(mes=inv_df["cycle_end"].map(fmt_month), fatura=to_reais(inv_df["fatura"]))
+
+    fig = px.bar(
+        plot_df,
+        x="mes",
+        y="fatura",
+        color="account",
+        barmode="group",
+        category_orders={"mes": list(dict.fromkeys(plot_df["mes"]))},
+        labels={"mes": "", "fatura": "", "account": "Cartão"},
+    )
+    fig.update_traces(hovertemplate="<b>%{x}</b><br>Fatura: R$ %{y:.2f}<extra></extra>")
+    fig.update_layout(height=280, margin=dict(t=10, b=10, l=0, r=0))
+
+    st.plotly_chart(fig, width="stretch")
+
+
+@profiled()
 def plot_categories(
     df: pd.DataFrame,
     name_col: str = "category",
@@ -523,8 +568,7 @@ def plot_categories(
         st.info("Sem dados para exibir.")
         return
 
-    plot_df = df.copy()
-    plot_df = plot_df[plot_df[value_col] != 0]
+    plot_df = df[df[value_col] != 0]
 
     if plot_df.empty:
         st.info("Todas as categorias estão zeradas.")
@@ -532,6 +576,7 @@ def plot_categories(
 
     plot_df = plot_df.sort_values(name_col)
     total = plot_df[value_col].sum()
+    plot_df = plot_df.assign(**{value_col: to_reais(plot_df[value_col])})
     
     fig = px.pie(
         plot_df,
@@ -573,69 +618,56 @@ def plot_categories(
 # ----- Funções para renderização das páginas -----
 # -------------------------------------------------
 
-def page_dashboard(today: date) -> None:
-    """Página inicial: visão consolidada de caixa + cartões de crédito."""
-    
-    # =================================
-    # Bloco 1: Caixa (contas corrente)
-    # =================================
-    st.subheader("Caixa")
+def matching_ids(query: str, start: date, end: date) -> pd.Series:
+    """Ids das transações do período cuja descrição casa com `query` (FTS + scan do arquivo)."""
+    return search_ids(query, {"start": start, "end": end})
 
-    # st.metric("Saldo total", brl(cash_total_balance(as_of=today)))
-    # st.caption("Saldos por conta")
 
-    # Gráfico dos saldos por conta
-    bal_df = balances_by_account(include_credit=False, as_of=today)
-    if not bal_df.empty:
-        plot_values(
-            bal_df[["account", "balance"]],
-            name_col="account",
-            value_col="balance",
-            mode="bar",   # ou "pie"
-            value_label="Saldo",
-            colors=[
-                "#FEC937",  # BB | Mel
-                "#B02C2C",  # Santander | PP
-            ],
-        )
-    else:
-        st.info("Nenhuma conta de caixa encontrada (conta corrente/poupança).")
+def _shift_offset(state_key: str, delta: int | None) -> None:
+    """Callback dos navegadores de período (`delta=None` volta ao atual)."""
+    st.session_state[state_key] = 0 if delta is None else st.session_state.get(state_key, 0) + delta
 
-    accs_dash = list_accounts()
-    credit_ids = {a.id for a in accs_dash if a.type.value == "credit"}
-    filter_labels = {"todos": "Todos"} | OWNER_LABELS
+
+def period_navigator(state_key: str, key_prefix: str, label: str, today: date) -> date:
+    """Botões ◀ / ⟳ / ▶ sobre o deslocamento em meses `state_key`; retorna o mês de referência.
+
+    Os botões usam `on_click`, então o novo deslocamento já vale neste rerun
+    (sem `st.rerun()`), e dentro de um fragmento só ele é refeito.
+    """
+    st.session_state.setdefault(state_key, 0)
+
+    nav1, nav2, nav3, nav4 = st.columns([3, 1, 1, 1])
+    ref_date = add_months(today, int(st.session_state[state_key]))
+    nav1.metric(label, fmt_month(ref_date))
+
+    nav2.button("◀ Anterior", key=f"{key_prefix}_prev", on_click=_shift_offset, args=(state_key, -1))
+    nav3.button("⟳ Atual", key=f"{key_prefix}_now", on_click=_shift_offset, args=(state_key, None))
+    nav4.button("Próximo ▶", key=f"{key_prefix}_next", on_click=_shift_offset, args=(state_key, 1))
+    return ref_date
+
+
+@st.fragment
+@instrumented_fragment("cash_month_panel")
+@profiled()
+def cash_month_panel(ctx: DataContext) -> None:
+    """Gastos de caixa do mês selecionado.
+
+    Fragmento: os botões de navegação e os filtros refazem só este painel,
+    lendo apenas a janela do mês escolhido.
+    """
+    today = ctx.today
+    accs_dash = ctx.accounts
+    credit_ids = ctx.credit_ids
 
     # Filtro expandível para análise de gastos de caixa no período.
     with st.expander("Ver gastos"):
 
         filter_labels = {"todos": "Todos"} | OWNER_LABELS
 
-        if "cash_month_offset" not in st.session_state:
-            st.session_state["cash_month_offset"] = 0
-
-        nav1, nav2, nav3, nav4 = st.columns([3, 1, 1, 1])
-
-        ref_date   = add_months(today, int(st.session_state["cash_month_offset"]))
+        ref_date   = period_navigator("cash_month_offset", "cash", "Mês selecionado:", today)
         cash_start = month_first(ref_date)
         cash_end   = month_last(ref_date)
 
-        nav1.metric("Mês selecionado:", fmt_month(ref_date))
-        
-        with nav2:
-            if st.button("◀ Anterior", key="cash_prev"):
-                st.session_state["cash_month_offset"] -= 1
-                st.rerun()
-        
-        with nav3:
-            if st.button("⟳ Atual", key="cash_now"):
-                st.session_state["cash_month_offset"] = 0
-                st.rerun()
-        
-        with nav4:
-            if st.button("Próximo ▶", key="cash_next"):
-                st.session_state["cash_month_offset"] += 1
-                st.rerun()
-
         c1, c2, c3 = st.columns(3)
         
         with c1:
@@ -647,11 +679,9 @@ def page_dashboard(today: date) -> None:
                 key="cash_owner",
             )
 
-        accs_dash = list_accounts()
-        credit_ids = {a.id for a in accs_dash if a.type.value == "credit"}
         cash_accounts = sorted([a.name for a in accs_dash if a.type.value != "credit"])
 
-        cats_dash = list_categories()
+        cats_dash = ctx.categories
         cash_categories = ["Todas"] + sorted([c.name for c in cats_dash])
 
         with c2:
@@ -670,73 +700,76 @@ def page_dashboard(today: date) -> None:
                 key="cash_category_filter",
             )
 
-        tx_cash_all = list_transactions(start=cash_start, end=cash_end, owner=cash_owner)
+        cash_search = st.text_input("Buscar na descrição", key="cash_search", placeholder="ex: ifood, uber")
 
-        tx_cash = tx_cash_all[~tx_cash_all["account_id"].isin(credit_ids)] if not tx_cash_all.empty else tx_cash_all
+        cash_filter = analytics.TxFilter(
+            cash_start,
+            cash_end,
+            owner=cash_owner,
+            account_ids=frozenset(a.id for a in accs_dash if a.id not in credit_ids),
+            account=None if cash_account == "Todas" else cash_account,
+            category=None if cash_category == "Todas" else cash_category,
+            ids=frozenset(matching_ids(cash_search, cash_start, cash_end)) if cash_search.strip() else None,
+        )
 
-        if not tx_cash.empty and cash_account != "Todas":
-            tx_cash = tx_cash[tx_cash["account"] == cash_account]
+        # Totais do mês vêm do rollup (mesmos filtros da tabela de transações);
+        # o rollup não conhece a busca textual, então com ela os totais saem da tabela.
+        cash_summary = None if cash_search.strip() else ctx.rollup(cash_start, cash_end, owner=cash_owner)
+        if cash_summary is not None and not cash_summary.empty:
+            cash_summary = cash_summary[~cash_summary["account_id"].isin(credit_ids)]
+            if cash_account != "Todas":
+                cash_summary = cash_summary[cash_summary["account"] == cash_account]
+            if cash_category != "Todas":
+                cash_summary = cash_summary[cash_summary["category"] == cash_category]
 
-        if not tx_cash.empty and cash_category != "Todas":
-            tx_cash = tx_cash[tx_cash["category"] == cash_category]
+        filtra_periodo(ctx, cash_filter, mode="cash", summary=cash_summary)
 
-        filtra_periodo(tx_cash, mode="cash")
 
-    # ==========================================
-    st.divider()  # Bloco 2: cartões de crédito
-    # ==========================================
-    st.subheader("Cartões de crédito")
+@st.fragment
+@instrumented_fragment("credit_cycle_panel")
+@profiled()
+def credit_cycle_panel(ctx: DataContext) -> None:
+    """Faturas do ciclo selecionado (gráfico por cartão + detalhamento).
 
-    if "cc_cycle_offset" not in st.session_state:
-        st.session_state["cc_cycle_offset"] = 0
+    Cada cartão usa o próprio dia de fechamento; as últimas `INVOICE_MONTHS`
+    faturas de todos eles saem de uma única janela de transações.
 
-    nav1, nav2, nav3, nav4 = st.columns([3, 1, 1, 1])
+    Fragmento: navegar entre ciclos refaz só este painel.
+    """
+    today = ctx.today
+    accs_dash = ctx.accounts
+    credit_ids = ctx.credit_ids
+    closing_days = ctx.closing_days
+    cards = [a for a in accs_dash if a.id in credit_ids]
+    filter_labels = {"todos": "Todos"} | OWNER_LABELS
 
-    ref_date = add_months(today, int(st.session_state["cc_cycle_offset"]))
-    cycle_start, cycle_end = get_fatura(ref_date, start_day=4, end_day=3)
+    ref_date = period_navigator("cc_cycle_offset", "cc", "Faturas de:", today)
+    bounds = {a.id: cycle_bounds(ref_date, closing_days[a.id]) for a in cards}
 
-    nav1.metric("Faturas de:", fmt_month(ref_date))
-    
-    with nav2:
-        if st.button("◀ Anterior", key="cc_prev"):
-            st.session_state["cc_cycle_offset"] -= 1
-            st.rerun()
-    
-    with nav3:
-        if st.button("⟳ Atual", key="cc_now"):
-            st.session_state["cc_cycle_offset"] = 0
-            st.rerun()
-    
-    with nav4:
-        if st.button("Próximo ▶", key="cc_next"):
-            st.session_state["cc_cycle_offset"] += 1
-            st.rerun()
+    spans = {formata_data(start, end) for start, end in bounds.values()} or {formata_data(*cycle_bounds(ref_date))}
+    if len(spans) == 1:
+        st.caption(f"Compras entre: {spans.pop()}")
+    else:
+        st.caption(" · ".join(f"{a.name}: {formata_data(*bounds[a.id])}" for a in cards))
 
-    st.caption(f"Compras entre: {formata_data(cycle_start, cycle_end)}")
+    win_start, win_end = invoice_window(ref_date, INVOICE_MONTHS, closing_days.values())
+    tx_credit = ctx.analytics.rows(analytics.TxFilter(win_start, win_end, account_ids=frozenset(credit_ids)))
+    if tx_credit.empty:
+        inv_df = pd.DataFrame()
+    else:
+        inv_df = invoices(tx_credit, cards, cycles=assign_cycles(tx_credit["date"], tx_credit["account_id"], closing_days))
 
-    tx_cycle_all = list_transactions(start=cycle_start, end=cycle_end, owner="todos")
-    tx_credit_cycle = (
-        tx_cycle_all[tx_cycle_all["account_id"].isin(credit_ids)]
-        if not tx_cycle_all.empty
-        else tx_cycle_all
+    # Ciclo selecionado de cada cartão; resumo por cartão considera apenas despesas (valores negativos).
+    cycle_filter = analytics.TxFilter(
+        min((start for start, _ in bounds.values()), default=win_start),
+        max((end for _, end in bounds.values()), default=win_end),
+        cycles=tuple((i, start, end) for i, (start, end) in bounds.items()),
     )
-
-    # Resumo por cartão considera apenas despesas (valores negativos).
-    if tx_credit_cycle.empty:
+    credit_ui = ctx.analytics.card_totals(cycle_filter)
+    if credit_ui.empty:
         st.info("Sem transações de cartão nesse ciclo.")
-        credit_ui = pd.DataFrame(columns=["cartão", "fatura"])
-    
-    else:
-        grp = (
-            tx_credit_cycle[tx_credit_cycle["amount"] < 0]
-            .groupby("account", as_index=False)["amount"]
-            .sum()
-            .rename(columns={"account": "cartão"})
-        )
-        grp["fatura"] = grp["amount"].abs()
-        credit_ui = grp[["cartão", "fatura"]].sort_values("cartão")
 
-    total_fatura = float(credit_ui["fatura"].sum()) if not credit_ui.empty else 0.0
+    total_fatura = int(credit_ui["fatura"].sum()) if not credit_ui.empty else 0
     # st.metric("Total", brl(total_fatura))
 
     if not credit_ui.empty:
@@ -770,17 +803,114 @@ def page_dashboard(today: date) -> None:
                 key="cc_card",
             )
 
-        tx_cc = tx_credit_cycle.copy()
-        if cc_owner != "todos" and not tx_cc.empty:
-            tx_cc = tx_cc[tx_cc["owner"] == cc_owner]
-        if cc_cartão != "todos" and not tx_cc.empty:
-            tx_cc = tx_cc[tx_cc["account"] == cc_cartão]
+        cc_search = st.text_input("Buscar na descrição", key="cc_search", placeholder="ex: ifood, uber")
+
+        cc_filter = replace(
+            cycle_filter,
+            owner=cc_owner,
+            account=None if cc_cartão == "todos" else cc_cartão,
+            ids=frozenset(matching_ids(cc_search, cycle_filter.start, cycle_filter.end)) if cc_search.strip() else None,
+        )
+        filtra_periodo(ctx, cc_filter, mode="credit")
+
+    with st.expander(f"Últimas {INVOICE_MONTHS} faturas"):
+        if inv_df.empty:
+            st.info("Sem faturas no período.")
+        else:
+            plot_invoices(inv_df)
+            print_df(
+                fmt_df(
+                    inv_df,
+                    rename={
+                        "account": "Cartão",
+                        "cycle_start": "De",
+                        "cycle_end": "Fechamento",
+                        "due_date": "Vencimento",
+                        "fatura": "Fatura (R$)",
+                    },
+                    hide=["account_id"],
+                ),
+                width="stretch",
+                hide_index=True,
+            )
+
+
+@profiled()
+def page_dashboard(ctx: DataContext) -> None:
+    """Página inicial: visão consolidada de caixa + cartões de crédito."""
+    today = ctx.today
+
+    # Uma única leitura cobre o mês de caixa e o ciclo de fatura selecionados.
+    cash_ref = add_months(today, int(st.session_state.get("cash_month_offset", 0)))
+    cc_ref = add_months(today, int(st.session_state.get("cc_cycle_offset", 0)))
+    cc_start, cc_end = invoice_window(cc_ref, INVOICE_MONTHS, ctx.closing_days.values())
+    ctx.prefetch(min(month_first(cash_ref), cc_start), max(month_last(cash_ref), cc_end))
+
+    # =================================
+    # Bloco 1: Caixa (contas corrente)
+    # =================================
+    st.subheader("Caixa")
+
+    # st.metric("Saldo total", brl(cash_total_balance(as_of=today)))
+    # st.caption("Saldos por conta")
+
+    # Gráfico dos saldos por conta
+    bal_df = ctx.balances(include_credit=False, as_of=today)
+    if not bal_df.empty:
+        plot_values(
+            bal_df[["account", "balance"]],
+            name_col="account",
+            value_col="balance",
+            mode="bar",   # ou "pie"
+            value_label="Saldo",
+            colors=[
+                "#FEC937",  # BB | Mel
+                "#B02C2C",  # Santander | PP
+            ],
+        )
+    else:
+        st.info("Nenhuma conta de caixa encontrada (conta corrente/poupança).")
+
+    accs_dash = ctx.accounts
+
+    # Saldo de fechamento mês a mês (razão diário: uma busca indexada por mês).
+    with st.expander("Histórico de saldo"), profiled("dashboard.historico"):
+        h1, h2 = st.columns([2, 1])
+        with h1:
+            hist_acc = st.selectbox(
+                "Conta",
+                options=accs_dash,
+                format_func=lambda a: a.name,
+                key="hist_account",
+            )
+        with h2:
+            hist_months = st.number_input("Meses", min_value=1, max_value=120, value=12, key="hist_months")
+
+        if hist_acc is not None:
+            hist_df = balance_history(hist_acc.id, add_months(today, -int(hist_months) + 1), today)
+            fig = px.line(hist_df.assign(balance=to_reais(hist_df["balance"])), x="month", y="balance", markers=True)
+            fig.update_traces(hovertemplate="<b>%{x}</b><br>Saldo: R$ %{y:.2f}<extra></extra>")
+            fig.update_layout(height=260, margin=dict(t=10, b=10, l=0, r=0), xaxis_title=None, yaxis_title=None)
+            st.plotly_chart(fig, width="stretch")
+
+    cash_month_panel(ctx)
+
+    # ==========================================
+    st.divider()  # Bloco 2: cartões de crédito
+    # ==========================================
+    st.subheader("Cartões de crédito")
 
-        filtra_periodo(tx_cc, mode="credit")
+    credit_cycle_panel(ctx)
 
-    with st.expander("Parcelamentos ativos"):
-        tx_all = list_transactions(owner="todos")
-        active_installments = get_active_installments(tx_all, as_of=today)
+    with st.expander("Parcelamentos ativos"), profiled("dashboard.parcelamentos"):
+        # Planos estruturados + eventuais "(n/N)" ainda sem plano (descrição editada à mão).
+        active_installments = pd.concat(
+            [
+                list_active_installments(today),
+                get_active_installments(ctx, as_of=today),
+            ],
+            ignore_index=True,
+        )
 
         if active_installments.empty:
             st.info("Nenhum parcelamento ativo encontrado.")
@@ -789,19 +919,16 @@ def page_dashboard(today: date) -> None:
             c1, c2, c3 = st.columns(3)            
             c1.metric("Parcelamentos ativos",      int(len(active_installments)))
             c2.metric("Parcelas restantes",        int(active_installments["remaining_installments"].sum()))
-            c3.metric("Valor futuro comprometido", fmt_brl(float(active_installments["future_commitment"].sum())))
-
-            show_df = active_installments.copy()
-            if "owner" in show_df.columns:
-                show_df["owner"] = show_df["owner"].map(fmt_owner)
+            c3.metric("Valor futuro comprometido", fmt_brl(active_installments["future_commitment"].sum()))
 
+            show_df = fmt_people(active_installments)
             show_df["parcela_atual"] = (
                 show_df["current_installment"].astype(str)
                 + "/"
                 + show_df["total_installments"].astype(str)
             )
 
-            ui_df = show_df[
+            ui_df = fmt_df(show_df)[
                 [
                     "base_description",
                     "parcela_atual",
@@ -828,8 +955,44 @@ def page_dashboard(today: date) -> None:
             )
 
             print_df(ui_df, width="stretch", hide_index=True)
-        
 
+    # ==========================================
+    st.divider()  # Bloco 3: tendências de vários meses
+    # ==========================================
+    with st.expander("Tendências"), profiled("dashboard.tendencias"):
+        trend_months = st.number_input(
+            "Meses", min_value=1, max_value=240, value=TREND_MONTHS, key="trend_months"
+        )
+        trend_start = add_months(today, -int(trend_months) + 1)
+
+        trend_df = monthly_trend(trend_start, today)
+        if trend_df.empty:
+            st.info("Sem transações no período.")
+        else:
+            fig = px.bar(
+                trend_df.assign(**{c: to_reais(trend_df[c]) for c in ("income", "expense")}),
+                x="month",
+                y=["income", "expense"],
+                barmode="relative",
+            )
+            fig.add_scatter(x=trend_df["month"], y=to_reais(trend_df["net"]), mode="lines+markers", name="net")
+            fig.update_layout(height=300, margin=dict(t=10, b=10, l=0, r=0), xaxis_title=None, yaxis_title=None)
+            st.plotly_chart(fig, width="stretch")
+
+            pivot = category_pivot(trend_start, today)
+            if not pivot.empty:
+                st.caption("Gastos por categoria")
+                print_df(pivot.apply(to_reais).rename_axis("Mês").reset_index(), width="stretch", hide_index=True)
+
+        st.caption("Saldo por conta")
+        bt_df = balance_trend(trend_start, today)
+        if not bt_df.empty:
+            fig = px.line(bt_df.assign(balance=to_reais(bt_df["balance"])), x="month", y="balance", color="account")
+            fig.update_layout(height=300, margin=dict(t=10, b=10, l=0, r=0), xaxis_title=None, yaxis_title=None)
+            st.plotly_chart(fig, width="stretch")
+
+
+@profiled()
 def form_new_transaction(accs: list, cats: list) -> None:
     """Formulário principal para lançamento de transações."""
     st.subheader("Lançar transação")
@@ -1004,7 +1167,7 @@ def form_new_transaction(accs: list, cats: list) -> None:
         n_total = 1
         n_current = 1
 
-    base_amount = round(float(valor), 2)
+    base_amount = to_cents(valor)
     # Na UI o usuário digita valor positivo; sinal é inferido pelo tipo.
     if TIPO_LABELS[tipo_ui] == "expense":
         base_amount = -base_amount
@@ -1030,30 +1193,27 @@ def form_new_transaction(accs: list, cats: list) -> None:
         )
         st.success("Transação salva!")
     else:
-        # Fluxo B: parcelado, gerando uma transação por mês.
+        # Fluxo B: parcelado, gerando um plano com uma transação por mês.
         # Regra:
         # - parcela atual fica na data real informada no formulário
         # - parcelas futuras ficam no dia 4 dos meses seguintes
-        created = 0
-        desc_i = (description.strip() or "").rstrip()
-
-        for parcela in range(n_current, n_total + 1):
-            months_ahead = parcela - n_current
-            dtx = installment_next_date(dt, months_ahead)
-            suffix = f" ({parcela}/{n_total})"
-
-            create_transaction(
-                dt=dtx,
-                amount=base_amount,
-                description=(desc_i + suffix).strip(),
-                account_id=account_id,
-                category_id=category_id,
-                owner=owner_id,
-                paid_by=paid_by_id,
-                split_mode=split_mode,
-                card_label=card_to_save,
-            )
-            created += 1
+        dates = {
+            parcela: installment_next_date(dt, parcela - n_current)
+            for parcela in range(n_current, n_total + 1)
+        }
+        create_installment_plan(
+            description=description,
+            amount=base_amount,
+            total_installments=n_total,
+            dates=dates,
+            account_id=account_id,
+            category_id=category_id,
+            owner=owner_id,
+            paid_by=paid_by_id,
+            split_mode=split_mode,
+            card_label=card_to_save,
+        )
+        created = len(dates)
 
         st.success(
             f"Parcelamento criado: {created} transações ({n_current}/{n_total} até {n_total}/{n_total})."
@@ -1073,6 +1233,7 @@ def form_new_transaction(accs: list, cats: list) -> None:
     st.rerun()
 
 
+@profiled()
 def invoice_payment(accs: list, cats: list) -> None:
     """Fluxo auxiliar para pagamento de fatura (2 lançamentos espelhados)."""
     st.subheader("Pagar fatura")
@@ -1121,33 +1282,184 @@ def invoice_payment(accs: list, cats: list) -> None:
         origem_id = acc_map[origem]
         destino_id = acc_map[destino]
 
-        # Lançamento 1: saída da conta bancária.
-        create_transaction(
-            dt=pdata,
-            amount=-round(float(valor), 2),
-            description=desc,
-            account_id=origem_id,
-            category_id=cat_fatura_id,
-            owner="petrus",
-            paid_by="petrus",
-            split_mode="none",
-            card_label=None,
-        )
-        # Lançamento 2: entrada na conta de crédito para abater fatura.
-        create_transaction(
+        # Saída da conta bancária e entrada no cartão, no mesmo commit.
+        create_transfer(
             dt=pdata,
-            amount=+round(float(valor), 2),
+            amount=to_cents(valor),
             description=desc,
-            account_id=destino_id,
+            from_account_id=origem_id,
+            to_account_id=destino_id,
             category_id=cat_fatura_id,
             owner="petrus",
             paid_by="petrus",
-            split_mode="none",
-            card_label=None,
         )
         st.success("Pagamento gerado (banco -X, crédito +X).")
 
 
+@profiled()
+def import_statement(accs: list, cats: list) -> None:
+    """Importação de extrato CSV do banco/cartão, em blocos com progresso."""
+    st.subheader("Importar extrato (CSV)")
+
+    with st.expander("Abrir importação de CSV"):
+        arquivo = st.file_uploader("Arquivo CSV", type=["csv", "txt"], key="imp_file")
+
+        c1, c2, c3 = st.columns(3)
+        with c1:
+            conta = st.selectbox("Conta", [a.name for a in accs], key="imp_account")
+        with c2:
+            cat_names = [c.name for c in cats]
+            default_cat = next((i for i, n in enumerate(cat_names) if "Outros" in n), 0)
+            categoria = st.selectbox(
+                "Categoria padrão", cat_names, index=default_cat, key="imp_category",
+                help="Usada quando o CSV não tem coluna de categoria (ou o nome não existe).",
+            )
+        with c3:
+            owner_id = st.selectbox(
+                "Dono", list(OWNER_LABELS), format_func=OWNER_LABELS.get, key="imp_owner"
+            )
+
+        c4, c5, c6 = st.columns(3)
+        with c4:
+            sep = st.selectbox(
+                "Separador", [",", ";", "\t"], format_func=lambda v: "tab" if v == "\t" else v, key="imp_sep"
+            )
+        with c5:
+            formato = st.selectbox("Formato do valor", ["1234.56", "1.234,56"], key="imp_decimal")
+        with c6:
+            negate = st.checkbox(
+                "Inverter sinal", key="imp_negate",
+                help="Para faturas que trazem compras como valores positivos.",
+            )
+
+        if not st.button("Importar", disabled=arquivo is None):
+            return
+
+        data = arquivo.getvalue()
+        total = max(data.count(b"\n"), 1)
+        progress = st.progress(0.0, text="Importando...")
+
+        def on_progress(r: ImportReport) -> None:
+            progress.progress(min(r.read / total, 1.0), text=f"{r.read}/{total} linhas lidas, {r.inserted} novas")
+
+        try:
+            report = import_csv(
+                io.BytesIO(data),
+                account_id=next(a.id for a in accs if a.name == conta),
+                category_id=next(c.id for c in cats if c.name == categoria),
+                owner=owner_id,
+                negate=negate,
+                sep=sep,
+                decimal="," if formato == "1.234,56" else ".",
+                thousands="." if formato == "1.234,56" else None,
+                on_progress=on_progress,
+            )
+        except ValueError as e:
+            progress.empty()
+            st.error(str(e))
+            return
+
+        progress.progress(1.0, text="Importação concluída.")
+        st.success(
+            f"{report.inserted} transações importadas, {report.duplicates} já existentes, "
+            f"{report.invalid} linhas inválidas."
+            + (f" {report.plans} parcelamentos vinculados." if report.plans else "")
+        )
+
+
+@profiled()
+def export_transactions(accs: list) -> None:
+    """Download das transações filtradas em CSV ou Parquet (particionado por mês)."""
+    st.subheader("Exportar transações")
+
+    with st.expander("Abrir exportação"):
+        filter_labels = {"todos": "Todos"} | OWNER_LABELS
+        account_labels = {0: "Todas"} | {a.id: a.name for a in accs}
+
+        c1, c2, c3, c4 = st.columns(4)
+        with c1:
+            start = st.date_input("Início", value=None, key="exp_start")
+        with c2:
+            end = st.date_input("Fim", value=None, key="exp_end")
+        with c3:
+            owner = st.selectbox(
+                "De quem", list(filter_labels), format_func=filter_labels.get, key="exp_owner"
+            )
+        with c4:
+            account_id = st.selectbox(
+                "Conta", list(account_labels), format_func=account_labels.get, key="exp_account"
+            )
+
+        formato = st.radio("Formato", ["CSV", "Parquet (.zip por mês)"], horizontal=True, key="exp_format")
+        filters = dict(start=start, end=end, owner=owner, account_id=account_id or None)
+
+        # O arquivo só é gerado no clique (`data` como função), num arquivo temporário.
+        if formato == "CSV":
+            st.download_button(
+                "Baixar CSV",
+                data=lambda: csv_file(**filters),
+                file_name="transacoes.csv",
+                mime="text/csv",
+                on_click="ignore",
+            )
+        else:
+            st.download_button(
+                "Baixar Parquet",
+                data=lambda: parquet_zip(**filters),
+                file_name="transacoes_parquet.zip",
+                mime="application/zip",
+                on_click="ignore",
+            )
+
+
+@profiled()
+def search_panel() -> None:
+    """Busca textual em todo o histórico, resultados por relevância."""
+    st.subheader("Buscar transações")
+
+    s1, s2 = st.columns([3, 1])
+    with s1:
+        query = st.text_input("Buscar na descrição", key="search_query", placeholder="ex: ifood, uber, farmácia")
+    with s2:
+        filter_labels = {"todos": "Todos"} | OWNER_LABELS
+        owner = st.selectbox(
+            "De quem",
+            options=list(filter_labels.keys()),
+            format_func=lambda k: filter_labels[k],
+            key="search_owner",
+        )
+
+    if not query.strip():
+        return
+
+    found = search_transactions(query, {"owner": owner})
+    if found.empty:
+        st.info("Nenhuma transação encontrada.")
+        return
+
+    st.caption(
+        f"{len(found)} resultados"
+        + (" (os mais relevantes)" if len(found) == SEARCH_LIMIT else "")
+        + (" · inclui meses arquivados (somente leitura)" if archived_months() else "")
+    )
+    show_df = fmt_people(found.drop(columns=["rank"]))
+    print_df(
+        fmt_df(show_df, rename=COL_LABELS, hide=["id", "account_id", "category_id", "account_type", "category_type"]),
+        width="stretch",
+        hide_index=True,
+    )
+
+
+def _editor_page(delta: int) -> None:
+    """Callback da paginação do editor: empilha o próximo cursor ou volta um."""
+    cursors = st.session_state.edt_cursors
+    if delta > 0 and st.session_state.get("edt_next_cursor") is not None:
+        cursors.append(st.session_state.edt_next_cursor)
+    elif delta < 0 and len(cursors) > 1:
+        cursors.pop()
+
+
+@profiled()
 def editor_transaction(accs: list, cats: list) -> None:
     """Lista, seleciona e permite atualizar/excluir transações existentes."""
     st.subheader("Editar ou excluir transações")
@@ -1172,52 +1484,102 @@ def editor_transaction(accs: list, cats: list) -> None:
                 key="fowner",
             )
 
-        df = list_transactions(start=start, end=end, owner=owner_filter)
+        f4, f5, f6, f7 = st.columns([2, 2, 3, 2])
+        with f4:
+            acc_filter = st.selectbox(
+                "Conta",
+                options=[None] + [a.id for a in accs],
+                format_func=lambda i: "Todas" if i is None else next(a.name for a in accs if a.id == i),
+                key="facc",
+            )
+        with f5:
+            cat_filter = st.selectbox(
+                "Categoria",
+                options=[None] + [c.id for c in cats],
+                format_func=lambda i: "Todas" if i is None else next(c.name for c in cats if c.id == i),
+                key="fcat",
+            )
+        with f6:
+            search = st.text_input("Buscar na descrição", key="fsearch")
+        with f7:
+            sort_label = st.selectbox("Ordenar por", options=list(EDITOR_SORT_LABELS.keys()), key="fsort")
+
+        filters = {
+            "start": start,
+            "end": end,
+            "owner": owner_filter,
+            "account_id": acc_filter,
+            "category_id": cat_filter,
+        }
+        sort, descending = EDITOR_SORT_LABELS[sort_label]
+
+        cold = archived_months(start, end)
+        if cold:
+            st.info(
+                f"Meses arquivados no filtro ({', '.join(cold)}) são somente leitura e não aparecem aqui. "
+                "Para editar, desarquive o mês: `python -m src.services.archive --unarchive AAAA-MM`."
+            )
+
+        # Filtro ou ordem novos voltam para a primeira página; fora isso, a
+        # pilha de cursores sobrevive aos reruns (editar não perde a página).
+        page_key = (tuple(filters.items()), search, sort_label)
+        if st.session_state.get("edt_page_key") != page_key:
+            st.session_state.edt_page_key = page_key
+            st.session_state.edt_cursors = [None]
+
+        cursors = st.session_state.edt_cursors
+        df, next_cursor = list_transactions_page(
+            cursors[-1], PAGE_SIZE, filters, search=search, sort=sort, descending=descending
+        )
+        st.session_state.edt_next_cursor = next_cursor
         if df.empty:
             st.info("Nada por aqui nesse filtro.")
-            st.stop()
+            return
 
-        show_df = df.copy()
-        show_df["owner"] = show_df["owner"].map(fmt_owner)
-        show_df["paid_by"] = show_df["paid_by"].map(fmt_payer)
-        show_df["split_mode"] = show_df["split_mode"].map(fmt_split)
+        total = count_transactions(filters, search=search)
+        p1, p2, p3 = st.columns([4, 1, 1])
+        p1.caption(f"Página {len(cursors)} de {-(-total // PAGE_SIZE)} · {total} transações")
+        p2.button("◀ Anterior", key="edt_prev", disabled=len(cursors) == 1, on_click=_editor_page, args=(-1,))
+        p3.button("Próxima ▶", key="edt_next", disabled=next_cursor is None, on_click=_editor_page, args=(1,))
 
-        tx_list_ui = fmt_df(show_df, rename=COL_LABELS, hide=["id", "account_id", "category_id"])
+        tx_list_ui = fmt_df(fmt_people(df), rename=COL_LABELS, hide=["id", "account_id", "category_id"])
         print_df(tx_list_ui, width="stretch", hide_index=True)
 
-        df_label = df.copy()
-        df_label["label"] = (
-            "ID "
-            + df_label["id"].astype(str)
-            + " | "
-            + df_label["date"].astype(str)
-            + " | "
-            + df_label["amount"].map(lambda x: fmt_brl(float(x)))
-            + " | "
-            + df_label["category"].astype(str)
-            + " | "
-            + df_label["description"].astype(str).str.slice(0, 40)
+        # Só as linhas da página viram opções; a seleção guarda o id.
+        labels = dict(
+            zip(
+                df["id"],
+                "ID "
+                + df["id"].astype(str)
+                + " | "
+                + df["date"].dt.strftime("%Y-%m-%d")
+                + " | "
+                + df["amount"].map(fmt_brl)
+                + " | "
+                + df["category"].astype(str)
+                + " | "
+                + df["description"].astype(str).str.slice(0, 40),
+            )
         )
 
-        selected_label = st.selectbox(
+        tx_id = st.selectbox(
             "Selecionar transação para editar",
-            options=df_label["label"].tolist(),
-            key="selected_tx_label",
+            options=df["id"].tolist(),
+            format_func=labels.__getitem__,
+            key="selected_tx_id",
         )
 
-        tx_id = int(selected_label.split("ID ")[1].split(" |")[0])
-
         if "last_selected_tx_id" not in st.session_state:
             st.session_state.last_selected_tx_id = None
 
         if st.session_state.last_selected_tx_id != tx_id:
             # Ao trocar a seleção, sincroniza os campos de edição no session_state.
             row = df[df["id"] == tx_id].iloc[0]
-            st.session_state.edt_date = row["date"]
+            st.session_state.edt_date = row["date"].date()
             st.session_state.edt_owner = row["owner"]
             st.session_state.edt_paid_by = row["paid_by"]
             st.session_state.edt_split = row["split_mode"]
-            st.session_state.edt_amount = float(row["amount"])
+            st.session_state.edt_amount = to_reais(int(row["amount"]))
             st.session_state.edt_desc = str(row["description"])
             st.session_state.edt_acc = row["account"]
             st.session_state.edt_cat = str(row["category"])
@@ -1231,7 +1593,7 @@ def editor_transaction(accs: list, cats: list) -> None:
         acc_names = [a.name for a in accs]
         cat_names = [c.name for c in cats]
 
-        row_amount = float(row["amount"])
+        row_amount = int(row["amount"])
         row_cat_type = row.get("category_type", "")
         # Tipo é informativo neste formulário (não editável).
         if row_cat_type == "transfer":
@@ -1308,33 +1670,42 @@ def editor_transaction(accs: list, cats: list) -> None:
                 (str(edt_card).strip() or None) if is_credit_account(accs, edt_acc) else None
             )
 
-            update_transaction(
-                int(tx_id),
-                date=edt_date,
-                amount=round(float(edt_amount), 2),
-                description=edt_desc.strip(),
-                account_id=int(acc_id),
-                category_id=int(cat_id),
-                owner=edt_owner,
-                paid_by=edt_paid_by,
-                split_mode=edt_split,
-                card_label=card_to_save,
-            )
+            try:
+                update_transaction(
+                    int(tx_id),
+                    date=edt_date,
+                    amount=to_cents(edt_amount),
+                    description=edt_desc.strip(),
+                    account_id=int(acc_id),
+                    category_id=int(cat_id),
+                    owner=edt_owner,
+                    paid_by=edt_paid_by,
+                    split_mode=edt_split,
+                    card_label=card_to_save,
+                )
+            except ValueError as e:
+                st.error(str(e))
+                return
             st.success("Atualizado!")
             st.session_state.last_selected_tx_id = None
             st.rerun()
 
         if do_delete:
-            delete_transaction(int(tx_id))
+            try:
+                delete_transaction(int(tx_id))
+            except ValueError as e:
+                st.error(str(e))
+                return
             st.warning("Excluido!")
             st.session_state.last_selected_tx_id = None
             st.rerun()
 
 
-def page_transactions() -> None:
-    """Página de transações: lançamento, pagamento de fatura e edição."""
-    accs = list_accounts()
-    cats = list_categories()
+@profiled()
+def page_transactions(ctx: DataContext) -> None:
+    """Página de transações: lançamento, pagamento de fatura, importação, exportação, busca e edição."""
+    accs = ctx.accounts
+    cats = ctx.categories
 
     if not accs or not cats:
         st.warning("Crie ao menos 1 conta e 1 categoria na aba Config.")
@@ -1344,17 +1715,24 @@ def page_transactions() -> None:
     st.divider()  # ==============================
     invoice_payment(accs, cats)
     st.divider()  # ==============================
+    import_statement(accs, cats)
+    st.divider()  # ==============================
+    export_transactions(accs)
+    st.divider()  # ==============================
+    search_panel()
+    st.divider()  # ==============================
     editor_transaction(accs, cats)
 
 
-def page_config() -> None:
+@profiled()
+def page_config(ctx: DataContext) -> None:
     """Página de configuração: contas, ajuste de saldo e categorias."""
     st.subheader("Contas")
-    accs = list_accounts()
+    accs = ctx.accounts
 
     if accs:
         df_acc = pd.DataFrame([a.model_dump() for a in accs])[
-            ["id", "name", "owner", "type", "initial_balance"]
+            ["id", "name", "owner", "type", "initial_balance", "closing_day", "due_day"]
         ]
         df_acc["owner"] = df_acc["owner"].map(lambda x: OWNER_LABELS.get(x, x))
         col_acc_pt = {
@@ -1363,6 +1741,8 @@ def page_config() -> None:
             "owner"           : "Owner",
             "type"            : "Tipo",
             "initial_balance" : "Saldo inicial (R$)",
+            "closing_day"     : "Fechamento (dia)",
+            "due_day"         : "Vencimento (dia)",
         }
         print_df(
             fmt_df(df_acc, rename=col_acc_pt, hide=["id", "type", "owner"]),
@@ -1379,13 +1759,35 @@ def page_config() -> None:
             index=0,
         )
         typ = st.selectbox("Tipo", ["checking", "credit", "savings"], index=0)
+        closing_day = due_day = None
+        if typ == "credit":
+            d1, d2 = st.columns(2)
+            closing_day = d1.number_input("Dia do fechamento", min_value=1, max_value=31, value=DEFAULT_CLOSING_DAY)
+            due_day = d2.number_input("Dia do vencimento", min_value=1, max_value=31, value=DEFAULT_DUE_DAY)
         if st.button("Criar conta"):
             if name.strip():
-                create_account(name.strip(), owner_id, typ, 0.0)
+                create_account(name.strip(), owner_id, typ, 0, closing_day=closing_day, due_day=due_day)
                 st.success("Conta criada! Recarregue a página se necessário.")
             else:
                 st.error("Informe um nome.")
 
+    cards = [a for a in accs if a.type.value == "credit"]
+    if cards:
+        with st.expander("Ciclo de fatura dos cartões"):
+            card = st.selectbox("Cartão", cards, format_func=lambda a: a.name, key="cycle_card")
+            cur_closing, cur_due = card_cycle(card)
+            d1, d2 = st.columns(2)
+            new_closing = d1.number_input(
+                "Dia do fechamento", min_value=1, max_value=31, value=cur_closing, key=f"cycle_closing_{card.id}"
+            )
+            new_due = d2.number_input(
+                "Dia do vencimento", min_value=1, max_value=31, value=cur_due, key=f"cycle_due_{card.id}"
+            )
+            st.caption(f"Fatura atual: compras entre {formata_data(*cycle_bounds(ctx.today, int(new_closing)))}")
+            if st.button("Salvar ciclo", key="cycle_save"):
+                update_account_cycle(card.id, int(new_closing), int(new_due))
+                st.success("Ciclo atualizado.")
+
     st.divider()  # ==============================
 
     st.subheader("Ajuste de saldo")
@@ -1403,26 +1805,26 @@ def page_config() -> None:
 
     target = st.number_input(
         "Qual saldo voce quer que essa conta fique AGORA?",
-        value=float(current),
+        value=to_reais(current),
         step=50.0,
     )
 
     adj_cat_id = get_category_id_by_name("Ajuste de saldo ⚖️")
     if adj_cat_id is None:
         # Fallback para cenários onde o nome da categoria varia levemente.
-        adj_cat_id = next((c.id for c in list_categories() if "Ajuste de saldo" in c.name), None)
+        adj_cat_id = next((c.id for c in ctx.categories if "Ajuste de saldo" in c.name), None)
     if adj_cat_id is None:
         st.error("Categoria 'Ajuste de saldo' não existe (seed falhou?).")
     else:
         if st.button("Criar ajuste"):
-            delta = float(target) - float(current)
-            if abs(delta) < 0.00001:
+            delta = to_cents(target) - current
+            if delta == 0:
                 st.info("Ja esta batendo. Nenhum ajuste necessário.")
             else:
                 create_transaction(
                     dt=date.today(),
-                    amount=round(delta, 2),
-                    description=f"Ajuste de saldo para {fmt_brl(target)}",
+                    amount=delta,
+                    description=f"Ajuste de saldo para {fmt_brl(to_cents(target))}",
                     account_id=acc_id,
                     category_id=adj_cat_id,
                     owner="petrus",
@@ -1436,7 +1838,7 @@ def page_config() -> None:
 
     st.subheader("Categorias")
 
-    cats = list_categories()
+    cats = ctx.categories
     if cats:
         df_cat = pd.DataFrame([c.model_dump() for c in cats])[["id", "name", "type"]]
         col_cat_pt = {"id": "ID", "name": "Categoria", "type": "Tipo"}
@@ -1468,21 +1870,47 @@ def main() -> None:
     bootstrap()
     st.set_page_config(page_title=PAGE_LABELS["title"], layout="wide")
 
-    today = date.today()
+    # Dados lidos uma vez por rerun e compartilhados entre as funções de página.
+    ctx = DataContext(today=date.today(), source=cache)
 
     st.title(PAGE_LABELS["title"])
     page = st.sidebar.radio(
         PAGE_LABELS["nav"],
         [PAGE_LABELS["dash"], PAGE_LABELS["trans"], PAGE_LABELS["config"]],
     )
+    debug = debug_enabled()
+    debug_slot = st.sidebar.empty() if debug else None
+
+    modes = profile_modes()
+    profile_slot = st.sidebar.empty() if modes else None
 
     # Roteamento simples por label da navegação lateral.
-    if page == PAGE_LABELS["dash"]:
-        page_dashboard(today)
-    elif page == PAGE_LABELS["trans"]:
-        page_transactions()
-    elif page == PAGE_LABELS["config"]:
-        page_config()
+    with (
+        instrumentation.record(collect=debug) as queries,
+        cache.script_run() as version,
+        profiling.profile_rerun(modes, label=page) as prof,
+    ):
+        ctx.sync(version)
+        try:
+            if page == PAGE_LABELS["dash"]:
+                page_dashboard(ctx)
+            elif page == PAGE_LABELS["trans"]:
+                page_transactions(ctx)
+            elif page == PAGE_LABELS["config"]:
+                page_config(ctx)
+        finally:
+            if debug_slot is not None:
+                with debug_slot.container():
+                    st.caption(f"Consultas SQL neste rerun: {queries.n} ({queries.total_ms:.1f} ms)")
+                    st.caption(f"Motor de análise: {ctx.analytics.name} · histórico: {engine_name()}")
+                    st.dataframe(queries.summary(), hide_index=True)
+                    with st.expander("Consultas mais lentas"):
+                        st.dataframe(queries.slowest(), hide_index=True)
+                    st.dataframe(cache_stats(), hide_index=True)
+            if profile_slot is not None:
+                with profile_slot.container():
+                    st.caption("Tempo por seção (ms)")
+                    st.dataframe(prof.table(), hide_index=True)
 
 
 if __name__ == "__main__":
@@ -0,0 +1 @@
+"""Benchmarks do FinDash (ver `benchmarks.suite`)."""
@@ -0,0 +1,115 @@
+"""Benchmark: agregações do dashboard nos motores pandas e Polars (`src.services.analytics`).
+
+Uso:
+    python benchmarks/bench_analytics.py --sizes 100000 1000000
+
+Cria um banco descartável (não toca em `data/finance.db`) com o gerador de
+`benchmarks.generator` e mede, para um recorte do mês e para o histórico
+inteiro, a leitura da janela (`list_transactions` para pandas,
+`arrow_transactions` para Polars) e cada agregação sobre ela, como o
+dashboard as pede. Confere que os dois motores devolvem os mesmos quadros.
+Sem `polars`/`pyarrow` instalados, mede só o motor pandas.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.generator import build_database
+
+
+def best_of(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def plain(result):
+    """Rótulos `category` como `str` e índice corrido, para comparar saídas dos dois motores."""
+    import pandas as pd
+
+    if isinstance(result, pd.DataFrame):
+        return result.astype({c: str for c in result.select_dtypes("category")}).reset_index(drop=True)
+    return result
+
+
+def assert_same(left, right) -> None:
+    import pandas as pd
+
+    if isinstance(left, pd.DataFrame):
+        pd.testing.assert_frame_equal(plain(left), plain(right))
+    else:
+        assert left == right, (left, right)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    today = date.today()
+    for n in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            build_database(Path(tmp) / "bench.db", n, end=today)
+            from src.db import engine
+            from src.services import analytics
+            from src.services.context import DataContext
+
+            names = ["pandas"] + (["polars"] if analytics.pl is not None and analytics.pa is not None else [])
+            if len(names) == 1:
+                print("  (polars/pyarrow não instalados: só o motor pandas)")
+
+            windows = {
+                "mês": analytics.TxFilter(today.replace(day=1), today),
+                "histórico": analytics.TxFilter(date(1970, 1, 1), today + timedelta(days=1)),
+            }
+            cases = {
+                "rows": lambda b, flt: b.rows(flt),
+                "period_totals": lambda b, flt: b.period_totals(flt),
+                "category_expenses": lambda b, flt: b.category_expenses(flt),
+                "card_totals": lambda b, flt: b.card_totals(flt),
+            }
+
+            print(f"n={n:>9,}")
+            for label, flt in windows.items():
+                # Contexto novo a cada leitura: mede o custo de ler a janela do banco.
+                reads = {
+                    name: best_of(lambda: analytics.get_backend(DataContext(today), name).prefetch(flt.start, flt.end), args.repeat)
+                    for name in names
+                }
+                print(f"  {label:<10} leitura da janela  " + "  ".join(f"{k}={v:7.4f}s" for k, v in reads.items()))
+
+                # Janela já carregada (como no rerun): mede só filtro + agregação.
+                backends = {name: analytics.get_backend(DataContext(today), name) for name in names}
+                for backend in backends.values():
+                    backend.prefetch(flt.start, flt.end)
+                for case, fn in cases.items():
+                    expected = fn(backends["pandas"], flt)
+                    line = f"  {label:<10} {case:<18}"
+                    for name, backend in backends.items():
+                        assert_same(fn(backend, flt), expected)
+                        line += f"  {name}={best_of(lambda: fn(backend, flt), args.repeat):7.4f}s"
+                    print(line)
+
+            line = f"  {'parcelamentos ativos':<29}"
+            backends = {name: analytics.get_backend(DataContext(today), name) for name in names}
+            expected = backends["pandas"].active_installments(today)
+            for name, backend in backends.items():
+                assert_same(backend.active_installments(today), expected)
+                line += f"  {name}={best_of(lambda: backend.active_installments(today), args.repeat):7.4f}s"
+            print(line)
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
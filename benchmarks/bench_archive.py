@@ -0,0 +1,103 @@
+"""Benchmark: leituras do histórico antes e depois de arquivar os meses antigos em Parquet.
+
+Uso:
+    python benchmarks/bench_archive.py --sizes 100000 1000000 --horizon 24
+
+Cria um banco descartável (não toca em `data/finance.db`) com o gerador de
+`benchmarks.generator`, mede as leituras com tudo no SQLite, arquiva os meses
+além de `--horizon` (`src.services.archive`, partições ao lado do banco
+temporário) e mede de novo. A busca textual entra como `search_ids` (todas as
+que casam, com a descrição filtrada no scan do arquivo). Confere que o
+histórico completo, a busca, a exportação e os agregados (rollup, razão) continuam iguais e que desarquivar um mês devolve
+as mesmas linhas.
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.generator import build_database
+
+
+def best_of(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--horizon", type=int, default=24)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    import pandas as pd
+
+    today = date.today()
+    for n in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            build_database(Path(tmp) / "bench.db", n, end=today)
+            from src.db import engine
+            from src.services import archive
+            from src.services.export import export_csv
+            from src.services.ledger import check_ledger
+            from src.services.rollups import check_rollup
+            from src.services.transactions import count_transactions, list_transactions, search_ids
+
+            cutoff = archive.archive_cutoff(today, args.horizon)
+            cases = {
+                "janela recente": lambda: list_transactions(start=cutoff, owner="todos"),
+                "histórico todo": lambda: list_transactions(owner="todos"),
+                "busca no todo": lambda: sorted(search_ids("mercado")),
+            }
+
+            def csv() -> str:
+                out = io.StringIO()
+                export_csv(out)
+                return out.getvalue()
+
+            before = {name: fn() for name, fn in cases.items()}
+            expected_csv = csv()
+            t_before = {name: best_of(fn, args.repeat) for name, fn in cases.items()}
+
+            t0 = time.perf_counter()
+            moved = archive.archive_months(cutoff)
+            t_archive = time.perf_counter() - t0
+            hot = count_transactions()
+
+            for name, fn in cases.items():
+                if isinstance(before[name], pd.DataFrame):
+                    pd.testing.assert_frame_equal(fn(), before[name])
+                else:
+                    assert fn() == before[name], name
+            assert csv() == expected_csv
+            assert check_rollup().empty and check_ledger().empty
+            t_after = {name: best_of(fn, args.repeat) for name, fn in cases.items()}
+
+            month = next(iter(moved), None)
+            if month is not None:
+                archive.unarchive_month(month)
+                pd.testing.assert_frame_equal(cases["histórico todo"](), before["histórico todo"])
+            engine.dispose()
+
+        print(
+            f"n={n:>9,}  arquivados={sum(moved.values()):>9,} em {len(moved)} meses ({t_archive:6.2f}s)  "
+            f"no SQLite={hot:>9,}"
+        )
+        for name in cases:
+            print(f"  {name:<16}  tudo no SQLite={t_before[name]:7.3f}s  com arquivo={t_after[name]:7.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Benchmark: `get_active_installments` vetorizado vs. `iterrows` + `parse_installment`.
+
+Uso:
+    python benchmarks/bench_installments.py --sizes 100000 1000000
+
+Cria um banco descartável (não toca em `data/finance.db`) com o gerador de
+`benchmarks.generator`, confere que os dois caminhos devolvem o mesmo frame
+e compara os tempos sobre o `list_transactions()` completo.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.generator import build_database
+
+
+def legacy_get_active_installments(tx_df, as_of: date):
+    """Implementação anterior: uma chamada de `parse_installment` por linha."""
+    import pandas as pd
+
+    from app import add_months, parse_installment
+
+    rows = []
+    for _, row in tx_df.iterrows():
+        info = parse_installment(row["description"])
+        if not info:
+            continue
+        rows.append(
+            {
+                "date": row["date"],
+                "account": row["account"],
+                "category": row["category"],
+                "owner": row["owner"],
+                "amount": abs(row["amount"]),
+                **info,
+            }
+        )
+    if not rows:
+        return pd.DataFrame()
+
+    df = pd.DataFrame(rows)
+    df = df[df["date"] <= pd.Timestamp(as_of)].copy()
+    if df.empty:
+        return pd.DataFrame()
+
+    grp_cols = ["base_description", "account", "category", "owner", "amount"]
+    df = df.sort_values(["base_description", "current_installment", "date"])
+    latest = df.groupby(grp_cols, as_index=False).tail(1).copy()
+    latest["remaining_installments"] = (latest["total_installments"] - latest["current_installment"]).clip(lower=0)
+    latest = latest[latest["remaining_installments"] > 0].copy()
+    if latest.empty:
+        return pd.DataFrame()
+
+    latest["next_installment"] = latest["current_installment"] + 1
+    latest["future_commitment"] = latest["amount"] * latest["remaining_installments"]
+    latest["next_due_date"] = latest["date"].apply(lambda d: add_months(d, 1))
+    return latest.sort_values(["next_due_date", "base_description"]).reset_index(drop=True)
+
+
+def edge_cases():
+    """Fins de mês, espaços extras e descrições vazias, que o gerador não produz."""
+    import pandas as pd
+
+    base = {"account": "Cartão", "category": "Compras", "owner": "petrus"}
+    rows = [
+        (date(2024, 1, 31), -10000, "Notebook (1/3)"),
+        (date(2024, 3, 31), -5000, "  Sofá ( 2 / 10 )  "),
+        (date(2024, 2, 29), -2000, "Curso(11/12)"),
+        (date(2024, 5, 31), -1000, "Fone (3/3)"),
+        (date(2024, 4, 30), -1000, ""),
+        (date(2024, 4, 30), -1000, "Mercado 12/05"),
+    ]
+    df = pd.DataFrame([{**base, "date": d, "amount": a, "description": s} for d, a, s in rows])
+    return df.astype({"date": "datetime64[ns]"})
+
+
+def best_of(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    import pandas as pd
+
+    today = date.today()
+    for n in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            build_database(Path(tmp) / "bench.db", n, end=today)
+            import app
+            from src.db import engine
+            from src.services.transactions import list_transactions
+
+            full = list_transactions()
+            for frame, as_of in ((full, today), (edge_cases(), date(2024, 12, 31))):
+                # O `iterrows` do legado devolve os rótulos `category` como `str`.
+                vectorized = app.get_active_installments(frame, as_of=as_of)
+                pd.testing.assert_frame_equal(
+                    vectorized.astype({c: str for c in vectorized.select_dtypes("category")}),
+                    legacy_get_active_installments(frame, as_of=as_of),
+                )
+
+            legacy = best_of(lambda: legacy_get_active_installments(full, today), args.repeat)
+            vectorized = best_of(lambda: app.get_active_installments(full, as_of=today), args.repeat)
+            engine.dispose()
+
+        print(
+            f"n={n:>9,}  legado={legacy:8.3f}s  vetorizado={vectorized:8.3f}s  "
+            f"speedup={legacy / vectorized:5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Benchmark: `list_transactions` colunar vs. hidratação ORM linha a linha.
+
+Uso:
+    python benchmarks/bench_list_transactions.py --sizes 100000 1000000
+
+Cria um banco descartável (não toca em `data/finance.db`) com o gerador de
+`benchmarks.generator` e compara o caminho antigo (ORM + dicts) com o caminho colunar atual.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.generator import build_database
+
+
+def legacy_list_transactions():
+    """Implementação anterior: seleciona objetos ORM e monta dicts por linha."""
+    import pandas as pd
+    from sqlmodel import select
+
+    from src.db import get_session
+    from src.models import Account, Category, Transaction
+
+    with get_session() as session:
+        q = (
+            select(Transaction, Account, Category)
+            .join(Account, Transaction.account_id == Account.id)
+            .join(Category, Transaction.category_id == Category.id)
+        )
+        rows = session.exec(q.order_by(Transaction.date.desc(), Transaction.id.desc())).all()
+
+    data = []
+    for tx, acc, cat in rows:
+        data.append(
+            {
+                "id": tx.id,
+                "date": tx.date,
+                "amount": tx.amount,
+                "description": tx.description,
+                "account": acc.name,
+                "account_id": acc.id,
+                "account_type": acc.type.value if hasattr(acc.type, "value") else str(acc.type),
+                "category": cat.name,
+                "category_type": cat.type,
+                "category_id": cat.id,
+                "owner": tx.owner.value if hasattr(tx.owner, "value") else str(tx.owner),
+                "paid_by": tx.paid_by.value if hasattr(tx.paid_by, "value") else str(tx.paid_by),
+                "split_mode": tx.split_mode.value if hasattr(tx.split_mode, "value") else str(tx.split_mode),
+                "card_label": tx.card_label or "",
+            }
+        )
+    return pd.DataFrame(data)
+
+
+def best_of(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            build_database(Path(tmp) / "bench.db", n)
+            from src.db import engine
+            from src.services.transactions import list_transactions
+
+            legacy = best_of(legacy_list_transactions, args.repeat)
+            columnar = best_of(list_transactions, args.repeat)
+            engine.dispose()
+
+        print(
+            f"n={n:>9,}  legado={legacy:8.3f}s  colunar={columnar:8.3f}s  "
+            f"speedup={legacy / columnar:5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
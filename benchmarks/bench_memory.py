@@ -0,0 +1,83 @@
+"""Benchmark: memória do DataFrame de transações, objetos Python vs. `tx_frame` tipado.
+
+Uso:
+    python benchmarks/bench_memory.py --sizes 100000 1000000
+
+Cria um banco descartável (não toca em `data/finance.db`) com o gerador de
+`benchmarks.generator`, monta o quadro completo dos dois jeitos a partir das
+mesmas linhas do cursor, confere que os valores batem e compara o tamanho
+(`memory_usage(deep=True)`) e o tempo de montagem.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.generator import build_database
+
+
+def legacy_frame(rows):
+    """Formato anterior: `date` como objetos `date` e rótulos como `str`, tudo `object`."""
+    import pandas as pd
+
+    from src.services.transactions import TX_COLUMNS
+
+    df = pd.DataFrame.from_records(rows, columns=list(TX_COLUMNS))
+    df["date"] = [date.fromisoformat(d) for d in df["date"]]
+    return df
+
+
+def mb(df) -> float:
+    return df.memory_usage(deep=True, index=True).sum() / 2**20
+
+
+def best_of(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    import pandas as pd
+
+    for n in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            build_database(Path(tmp) / "bench.db", n)
+            from src.db import engine, get_read_session
+            from src.services.transactions import transactions_query, tx_frame
+
+            with get_read_session() as session:
+                rows = session.connection().execute(transactions_query()).fetchall()
+            engine.dispose()
+
+        legacy, typed = legacy_frame(rows), tx_frame(rows)
+        pd.testing.assert_frame_equal(
+            typed.assign(date=typed["date"].dt.date).astype(object),
+            legacy.astype(object),
+        )
+
+        t_legacy = best_of(lambda: legacy_frame(rows), args.repeat)
+        t_typed = best_of(lambda: tx_frame(rows), args.repeat)
+        print(
+            f"n={n:>9,}  legado={mb(legacy):8.1f} MB  tipado={mb(typed):8.1f} MB  "
+            f"redução={mb(legacy) / mb(typed):5.1f}x  "
+            f"montagem: legado={t_legacy:6.3f}s tipado={t_typed:6.3f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Benchmark: consultas de histórico (`src.services.olap`) no DuckDB vs. no SQLite.
+
+Uso:
+    python benchmarks/bench_olap.py --sizes 100000 1000000 --years 5
+
+Cria um banco descartável (não toca em `data/finance.db`) com o gerador de
+`benchmarks.generator`, roda o pivô mês x categoria, a tendência mensal e os
+saldos por conta sobre os últimos `--years` anos nos dois motores, confere que
+devolvem os mesmos quadros e compara os tempos (o DuckDB varre as transações;
+o SQLite lê o rollup e o razão). Sem `duckdb` (ou sem a extensão
+`sqlite`), mede só o caminho do SQLite.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.generator import build_database
+
+
+def best_of(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    import pandas as pd
+
+    today = date.today()
+    start = date(today.year - args.years + 1, 1, 1)
+    for n in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            build_database(Path(tmp) / "bench.db", n, end=today)
+            from src.db import engine
+            from src.services import olap
+
+            cases = {
+                "category_pivot": lambda: olap.category_pivot(start, today),
+                "monthly_trend": lambda: olap.monthly_trend(start, today),
+                "balance_trend": lambda: olap.balance_trend(start, today),
+            }
+
+            engines = ["sqlite"]
+            os.environ["FINDASH_OLAP_ENGINE"] = "duckdb"
+            if olap.engine_name() == "duckdb":
+                engines.insert(0, "duckdb")
+            else:
+                print("  (duckdb indisponível: só o SQLite)")
+
+            results: dict[str, dict[str, pd.DataFrame]] = {}
+            timings: dict[str, dict[str, float]] = {}
+            for name in engines:
+                os.environ["FINDASH_OLAP_ENGINE"] = name
+                results[name] = {case: fn() for case, fn in cases.items()}
+                timings[name] = {case: best_of(fn, args.repeat) for case, fn in cases.items()}
+            engine.dispose()
+
+        print(f"n={n:>9,}  {args.years} anos")
+        for case in cases:
+            line = f"  {case:<16}"
+            for name in engines:
+                pd.testing.assert_frame_equal(results[name][case], results["sqlite"][case])
+                line += f"  {name}={timings[name][case]:7.4f}s"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
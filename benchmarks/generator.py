@@ -0,0 +1,179 @@
+"""Gerador determinístico de bancos sintéticos para os benchmarks.
+
+`build_database(path, n)` cria um `finance.db` descartável com contas,
+categorias (as do seed), salários, compras avulsas, séries de parcelas com
+`InstallmentPlan` e pagamentos de fatura (transferências com `transfer_group`),
+totalizando `n` transações. A mesma combinação `(n, seed, end)` gera sempre o
+mesmo banco.
+
+As inserções vão direto pelo `sqlite3` (executemany); o rollup mensal e o
+razão de saldos são recalculados no fim, como faria uma migração.
+"""
+from __future__ import annotations
+
+import os
+import random
+import sqlite3
+import sys
+from datetime import date, datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+SCALES = [10_000, 100_000, 1_000_000]
+
+CARD_LABELS = [None, "Físico", "Virtual"]
+OWNERS = ["petrus", "partner", "both"]
+MERCHANTS = ["Mercado", "Padaria", "Uber", "Farmácia", "Restaurante", "Posto", "Livraria", "Cinema"]
+
+# Fração das transações que pertence a séries de parcelas.
+INSTALLMENT_SHARE = 0.10
+
+
+def use_database(db_path: Path) -> None:
+    """Aponta o pacote `src` (e o `app`) para `db_path`, descartando módulos já importados.
+
+    O engine é criado na importação de `src.db`, então trocar de banco exige
+    reimportar tudo o que depende dele.
+    """
+    os.environ["FINDASH_DB_PATH"] = str(db_path)
+    for mod in [m for m in sys.modules if m in ("src", "app") or m.startswith("src.")]:
+        del sys.modules[mod]
+
+
+def _add_months(d: date, months: int, day: int | None = None) -> date:
+    y, m = divmod(d.month - 1 + months, 12)
+    year, month = d.year + y, m + 1
+    return date(year, month, min(day or d.day, 28))
+
+
+def populate(db_path: Path, n: int, seed: int = 42, end: date | None = None, months: int = 60,
+             n_accounts: int = 6) -> dict[str, int]:
+    """Insere `n` transações sintéticas num banco com o schema já criado.
+
+    Retorna a contagem por tipo de linha gerada.
+    """
+    from src.services.seed import DEFAULT_CATEGORIES
+
+    rng = random.Random(seed)
+    end = end or date.today()
+    first = _add_months(end, -(months - 1), day=1)
+    month_starts = [_add_months(first, i, day=1) for i in range(months)]
+    span = (end - first).days + 1
+    now = datetime(2024, 1, 1).isoformat(sep=" ")
+
+    def rand_day() -> date:
+        return date.fromordinal(first.toordinal() + rng.randrange(span))
+
+    def cents(lo: float, hi: float) -> int:
+        """Valor sorteado em reais, devolvido em centavos (como o banco guarda)."""
+        return round(rng.uniform(lo, hi) * 100)
+
+    con = sqlite3.connect(db_path)
+
+    accounts = []
+    for i in range(n_accounts):
+        typ = "credit" if i % 3 == 2 else "checking"
+        owner = "partner" if i % 2 else "petrus"
+        accounts.append((i + 1, f"Conta {i + 1} | {'Crédito' if typ == 'credit' else 'PP'}", owner, typ,
+                         cents(0, 5000) if typ == "checking" else 0))
+    con.executemany(
+        "INSERT INTO account (id, name, owner, type, initial_balance) VALUES (?, ?, ?, ?, ?)", accounts
+    )
+    con.executemany(
+        "INSERT INTO category (id, name, type) VALUES (?, ?, ?)",
+        [(i + 1, name, typ) for i, (name, typ) in enumerate(DEFAULT_CATEGORIES)],
+    )
+
+    checking = [a[0] for a in accounts if a[3] == "checking"]
+    credit = [a[0] for a in accounts if a[3] == "credit"]
+    cat_id = {name: i + 1 for i, (name, _) in enumerate(DEFAULT_CATEGORIES)}
+    expense_cats = [i + 1 for i, (_, typ) in enumerate(DEFAULT_CATEGORIES) if typ == "expense"]
+    salary_cat = next(v for k, v in cat_id.items() if k.startswith("Pagamento"))
+    invoice_cat = next(v for k, v in cat_id.items() if k.startswith("Pgto. de fatura"))
+
+    rows: list[tuple] = []
+    counts = {"salary": 0, "invoice_payment": 0, "installment": 0, "purchase": 0}
+
+    def add(dt, amount, description, account_id, category_id, owner="petrus", card_label=None,
+            plan_id=None, number=None, group=None) -> None:
+        rows.append((dt.isoformat(), amount, description, account_id, category_id, owner,
+                     "petrus", "none", card_label, plan_id, number, group, now, now))
+
+    # Salário mensal em cada conta corrente e pagamento de fatura de cada cartão.
+    for month in month_starts:
+        for acc in checking:
+            if len(rows) >= n:
+                break
+            add(_add_months(month, 0, day=5), cents(3000, 9000), "Salário", acc, salary_cat)
+            counts["salary"] += 1
+        for card in credit:
+            if len(rows) + 2 > n:
+                break
+            dt, value = _add_months(month, 0, day=10), cents(500, 4000)
+            group = f"bench-{card}-{month:%Y%m}"
+            add(dt, -value, "Pgto. de fatura", rng.choice(checking), invoice_cat, group=group)
+            add(dt, value, "Pgto. de fatura", card, invoice_cat, group=group)
+            counts["invoice_payment"] += 2
+
+    # Séries de parcelas no cartão (dia 4 dos meses seguintes, como na UI).
+    plans = []
+    budget = min(int(n * INSTALLMENT_SHARE), n - len(rows))
+    while budget > 1:
+        total = min(rng.randint(2, 12), budget)
+        plan_id = len(plans) + 1
+        card = rng.choice(credit or checking)
+        category = rng.choice(expense_cats)
+        owner = rng.choice(OWNERS)
+        amount = -cents(20, 800)
+        start = rand_day()
+        base = f"{rng.choice(MERCHANTS)} parcelado {plan_id}"
+        plans.append((plan_id, base, amount, total, card, category, owner, start.isoformat(), now))
+        for k in range(total):
+            dt = start if k == 0 else _add_months(start, k, day=4)
+            add(dt, amount, f"{base} ({k + 1}/{total})", card, category, owner,
+                rng.choice(CARD_LABELS), plan_id, k + 1)
+        counts["installment"] += total
+        budget -= total
+
+    con.executemany(
+        "INSERT INTO installmentplan (id, description, amount, total_installments, account_id, "
+        "category_id, owner, first_date, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        plans,
+    )
+
+    # Compras avulsas completam o total.
+    all_accounts = [a[0] for a in accounts]
+    for _ in range(n - len(rows)):
+        acc = rng.choice(all_accounts)
+        add(rand_day(), -cents(5, 500), f"{rng.choice(MERCHANTS)} {rng.randrange(500)}", acc,
+            rng.choice(expense_cats), rng.choice(OWNERS), rng.choice(CARD_LABELS) if acc in credit else None)
+        counts["purchase"] += 1
+
+    con.executemany(
+        'INSERT INTO "transaction" (date, amount, description, account_id, category_id, owner, paid_by, '
+        "split_mode, card_label, installment_plan_id, installment_number, transfer_group, created_at, "
+        "updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        rows,
+    )
+    con.commit()
+    con.close()
+    return counts
+
+
+def build_database(db_path: Path, n: int, seed: int = 42, end: date | None = None) -> dict[str, int]:
+    """Cria o schema em `db_path`, popula `n` transações e recalcula os agregados."""
+    use_database(db_path)
+    import src.models  # noqa: F401  (registra as tabelas no metadata)
+    from src.db import engine, init_db
+    from src.services.ledger import rebuild_ledger
+    from src.services.rollups import rebuild_rollup
+
+    init_db()
+    counts = populate(db_path, n, seed=seed, end=end)
+    with engine.begin() as conn:
+        rebuild_rollup(conn)
+        rebuild_ledger(conn)
+    return counts
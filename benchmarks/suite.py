@@ -0,0 +1,173 @@
+"""Suíte de benchmarks dos serviços e do rerun completo do dashboard.
+
+Uso:
+    python -m benchmarks.suite                          # 10k, 100k e 1M
+    python -m benchmarks.suite --sizes 10000 --repeat 5
+    python -m benchmarks.suite --compare benchmarks/results/anterior.json
+
+Para cada tamanho, gera um banco descartável (`benchmarks.generator`), mede
+cada caso `--repeat` vezes e grava tudo num JSON (`--out`), com o commit e o
+ambiente, para comparar versões. `--compare` mostra a razão contra um JSON
+anterior e marca regressões acima de `--threshold`.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import Callable
+
+from benchmarks.generator import ROOT, SCALES, build_database
+
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+
+
+def measure(fn: Callable[[], object], repeat: int) -> list[float]:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return times
+
+
+def cases(today: date) -> dict[str, Callable[[], object]]:
+    """Casos medidos, já ligados ao banco atual (`src` reimportado pelo gerador)."""
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    import app
+    from src.services.dashboards import balances_by_account
+    from src.services.rollups import monthly_rollup
+    from src.services.transactions import list_transactions
+
+    # O `st.cache_data` sobrevive à troca de banco; cada tamanho começa vazio.
+    st.cache_data.clear()
+
+    month_start = today.replace(day=1)
+    full = list_transactions()
+    month = list_transactions(start=month_start, end=today)
+    summary = monthly_rollup(month_start, today)
+
+    def dashboard_cold():
+        st.cache_data.clear()
+        AppTest.from_file(str(ROOT / "app.py"), default_timeout=600).run()
+
+    warm = AppTest.from_file(str(ROOT / "app.py"), default_timeout=600)
+    warm.run()
+
+    return {
+        "list_transactions": lambda: list_transactions(),
+        "list_transactions_mes": lambda: list_transactions(start=month_start, end=today),
+        "balances_by_account": lambda: balances_by_account(),
+        "get_active_installments": lambda: app.get_active_installments(full, as_of=today),
+        "filtra_periodo": lambda: app.filtra_periodo(month, mode="cash", summary=summary),
+        "page_dashboard_frio": dashboard_cold,
+        "page_dashboard_quente": lambda: warm.run(),
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes: list[int], repeat: int, seed: int, only: list[str] | None) -> dict:
+    today = date.today()
+    results = []
+
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            t0 = time.perf_counter()
+            counts = build_database(Path(tmp) / "bench.db", n, seed=seed, end=today)
+            print(f"n={n:,}: banco gerado em {time.perf_counter() - t0:.1f}s {counts}")
+
+            from src.db import engine, read_engine
+
+            try:
+                for name, fn in cases(today).items():
+                    if only and name not in only:
+                        continue
+                    times = measure(fn, repeat)
+                    results.append(
+                        {
+                            "size": n,
+                            "benchmark": name,
+                            "best_s": min(times),
+                            "median_s": statistics.median(times),
+                            "runs_s": times,
+                        }
+                    )
+                    print(f"  {name:<26} best={min(times):9.4f}s  mediana={statistics.median(times):9.4f}s")
+            finally:
+                engine.dispose()
+                read_engine.dispose()
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": seed,
+            "repeat": repeat,
+            "today": today.isoformat(),
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> int:
+    """Imprime a razão atual/anterior por caso; retorna o número de regressões."""
+    old = {(r["size"], r["benchmark"]): r["best_s"] for r in baseline["results"]}
+    regressions = 0
+    print(f"\nComparação com {baseline['meta'].get('commit')} ({baseline['meta'].get('timestamp')}):")
+    for r in current["results"]:
+        before = old.get((r["size"], r["benchmark"]))
+        if before is None:
+            continue
+        ratio = r["best_s"] / before if before else float("inf")
+        flag = "  REGRESSÃO" if ratio > threshold else ""
+        regressions += bool(flag)
+        print(f"  n={r['size']:>9,}  {r['benchmark']:<26} {before:9.4f}s -> {r['best_s']:9.4f}s  ({ratio:5.2f}x){flag}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmarks do FinDash.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SCALES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", nargs="+", help="roda só estes casos")
+    parser.add_argument("--out", type=Path, help="arquivo JSON de saída (padrão: benchmarks/results/<data>-<commit>.json)")
+    parser.add_argument("--compare", type=Path, help="JSON anterior para comparar")
+    parser.add_argument("--threshold", type=float, default=1.2, help="razão que conta como regressão")
+    args = parser.parse_args()
+
+    report = run(args.sizes, args.repeat, args.seed, args.only)
+
+    out = args.out or RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}-{report['meta']['commit'] or 'local'}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2))
+    print(f"\nResultados em {out}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        if compare(report, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
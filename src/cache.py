@@ -0,0 +1,159 @@
+"""Cache das leituras do app (`st.cache_data`), invalidado pela versão dos dados.
+
+Cada leitura cacheada recebe `data_version()` como parte da chave. A versão
+fica no banco (tabela `dataversion`) e os serviços de escrita a incrementam na
+mesma transação que grava, então qualquer escrita, deste processo, de outro
+worker ou da linha de comando, invalida tudo no próximo rerun.
+
+A versão é lida uma vez por rerun (`script_run`, no `main()` e nos reruns só
+de fragmento): um rerun sem mudanças é servido inteiro do cache, sem nenhuma
+consulta. Uma escrita deste processo no meio do rerun (`local_writes`) faz a
+próxima leitura conferir a versão de novo.
+
+Os nomes exportados têm a mesma assinatura dos serviços originais, para que
+`app.py` e o `DataContext` possam usá-los sem adaptação.
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Iterator
+
+import pandas as pd
+import streamlit as st
+
+from src.db import data_version, local_writes
+from src.services import accounts, analytics, categories, dashboards, installments, ledger, olap, rollups, transactions
+
+CACHE_MAX_ENTRIES = 64
+
+_lock = threading.Lock()
+_stats: dict[str, dict[str, int]] = {}
+_keys: dict[str, OrderedDict] = {}
+_clearers: dict[str, Callable[[], None]] = {}
+_cached_version: int | None = None
+# Versão fixada pelo rerun em curso nesta thread (a thread de script da sessão).
+_run = threading.local()
+
+
+def _invalidate_if_stale() -> int:
+    """Descarta todas as entradas quando a versão dos dados mudou; retorna a versão atual."""
+    global _cached_version
+    version = data_version()
+    if version == _cached_version:
+        return version
+
+    with _lock:
+        if version != _cached_version:
+            for name, clear in _clearers.items():
+                clear()
+                _stats[name]["evictions"] += len(_keys[name])
+                _keys[name].clear()
+            _cached_version = version
+    return version
+
+
+@contextmanager
+def script_run() -> Iterator[int]:
+    """Fixa a versão dos dados pelo rerun: uma única consulta a `dataversion`.
+
+    Dentro de outro `script_run` (fragmento num rerun completo) reaproveita a
+    versão já fixada.
+    """
+    if getattr(_run, "version", None) is not None:
+        yield _run.version
+        return
+    _run.version, _run.writes = _invalidate_if_stale(), local_writes()
+    try:
+        yield _run.version
+    finally:
+        _run.version = None
+
+
+def _current_version() -> int:
+    """Versão fixada pelo rerun; confere no banco fora de um rerun ou depois de uma escrita local."""
+    version = getattr(_run, "version", None)
+    if version is None:
+        return _invalidate_if_stale()
+    if _run.writes != local_writes():
+        _run.version, _run.writes = _invalidate_if_stale(), local_writes()
+    return _run.version
+
+
+def _freeze(value):
+    """Argumento -> chave hashável para a contagem de entradas (`filters` chega como dict)."""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def cached_read(fn: Callable) -> Callable:
+    """Envolve um serviço de leitura com `st.cache_data` + contadores de hit/miss/eviction."""
+    name = fn.__name__
+    _stats[name] = {"hits": 0, "misses": 0, "evictions": 0}
+    _keys[name] = OrderedDict()
+
+    def _load(version: int, *args, **kwargs):
+        with _lock:
+            _stats[name]["misses"] += 1
+        return fn(*args, **kwargs)
+
+    # O `st.cache_data` identifica a função por módulo + qualname + código;
+    # sem um qualname próprio, todos os `_load` dividiriam o mesmo cache.
+    _load.__qualname__ = f"cached_read.{name}"
+    _load = st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)(_load)
+
+    _clearers[name] = _load.clear
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        version = _current_version()
+        key = (_freeze(args), _freeze(kwargs))
+
+        misses = _stats[name]["misses"]
+        result = _load(version, *args, **kwargs)
+
+        with _lock:
+            if _stats[name]["misses"] == misses:
+                _stats[name]["hits"] += 1
+            # Espelha o descarte LRU do `st.cache_data` ao passar de `max_entries`.
+            _keys[name][key] = None
+            _keys[name].move_to_end(key)
+            if len(_keys[name]) > CACHE_MAX_ENTRIES:
+                _keys[name].popitem(last=False)
+                _stats[name]["evictions"] += 1
+
+        return result
+
+    return wrapper
+
+
+def cache_stats() -> pd.DataFrame:
+    """Contadores por leitura cacheada, para o painel de debug."""
+    with _lock:
+        rows = [
+            {"leitura": name, "entradas": len(_keys[name]), **counts}
+            for name, counts in _stats.items()
+        ]
+    return pd.DataFrame(rows)
+
+
+list_accounts = cached_read(accounts.list_accounts)
+list_categories = cached_read(categories.list_categories)
+list_transactions = cached_read(transactions.list_transactions)
+count_transactions = cached_read(transactions.count_transactions)
+current_balance_for_account = cached_read(transactions.current_balance_for_account)
+balances_by_account = cached_read(dashboards.balances_by_account)
+monthly_rollup = cached_read(rollups.monthly_rollup)
+balance_history = cached_read(ledger.balance_history)
+list_active_installments = cached_read(installments.list_active_installments)
+list_unlinked_installments = cached_read(installments.list_unlinked_installments)
+category_pivot = cached_read(olap.category_pivot)
+monthly_trend = cached_read(olap.monthly_trend)
+balance_trend = cached_read(olap.balance_trend)
+arrow_transactions = cached_read(analytics.arrow_transactions)
+arrow_unlinked_installments = cached_read(analytics.arrow_unlinked_installments)
@@ -16,6 +16,9 @@ COL_LABELS = {
     "id":            "ID",
 }
 
+# Colunas em centavos (int) nos quadros dos serviços; `fmt_df` converte para reais.
+MONEY_COLUMNS = ["amount", "balance", "fatura", "future_commitment", "initial_balance", "income", "expense"]
+
 PAGE_LABELS = {
     "title":  "💵💲🏦📊 Finanças | Pelissa",
     "nav":    "☰ Navegação",
@@ -70,4 +73,55 @@ CATEGORY_COLORS = {
     "Pgto. de fatura 💳": "#3B3B3B",
 }
 
+# Ordens do editor de transações: label -> (coluna, decrescente).
+EDITOR_SORT_LABELS = {
+    "Mais recentes":    ("date", True),
+    "Mais antigas":     ("date", False),
+    "Maiores gastos":   ("amount", False),
+    "Maiores entradas": ("amount", True),
+}
+
 INSTALLMENT_RE = re.compile(r"\((\d+)\s*/\s*(\d+)\)\s*$")
+
+# Ajustes do SQLite aplicados em cada conexão nova. Cada chave pode ser
+# sobrescrita por variável de ambiente `FINDASH_SQLITE_<CHAVE>` (ex: FINDASH_SQLITE_MMAP_SIZE=0).
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "busy_timeout": 5000,               # ms esperando o lock antes de "database is locked"
+    "synchronous":  "NORMAL",           # seguro com WAL; evita fsync a cada commit
+    "mmap_size":    256 * 1024 * 1024,  # bytes
+    "cache_size":   -64000,             # negativo = KiB (~64 MB)
+}
+
+# Conexões mantidas no pool por engine (FINDASH_SQLITE_POOL_SIZE).
+SQLITE_POOL_SIZE = 5
+
+# Comandos SQL acima deste tempo vão para o log `findash.sql` quando a
+# instrumentação está ligada (FINDASH_SLOW_QUERY_MS).
+SLOW_QUERY_MS = 250
+
+# Ciclo de fatura padrão dos cartões sem configuração própria: compras do dia
+# 4 ao dia 3 do mês seguinte (fechamento dia 3) e vencimento no dia 10.
+DEFAULT_CLOSING_DAY = 3
+DEFAULT_DUE_DAY = 10
+
+# Quantas faturas (meses) o dashboard mostra por cartão.
+INVOICE_MONTHS = 6
+
+# Motor das agregações do dashboard (`src.services.analytics`): "pandas" ou
+# "polars" (opcional: lê o banco direto para Arrow e agrega em lazy frames;
+# sem os pacotes, volta para pandas). FINDASH_ANALYTICS_BACKEND sobrescreve.
+ANALYTICS_BACKEND = "pandas"
+
+# Motor das consultas de histórico (`src.services.olap`): "sqlite" (rollup mensal
+# e razão diário; o caminho do app) ou "duckdb" (opcional, para consultas ad hoc
+# e conferência: agrega direto das transações e volta para o SQLite sem o pacote
+# ou a extensão sqlite). FINDASH_OLAP_ENGINE sobrescreve.
+OLAP_ENGINE = "sqlite"
+
+# Meses mostrados por padrão nas tendências do dashboard.
+TREND_MONTHS = 12
+
+# Arquivo frio (`src.services.archive`): meses encerrados há mais de tantos meses
+# saem do SQLite para um Parquet por mês. FINDASH_ARCHIVE_HORIZON_MONTHS sobrescreve.
+ARCHIVE_HORIZON_MONTHS = 24
@@ -1,14 +1,114 @@
+import os
 from pathlib import Path
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
 from sqlmodel import SQLModel, create_engine, Session
 
+from src import instrumentation
+from src.config import SQLITE_POOL_SIZE, SQLITE_PRAGMAS
+from src.migrations import run_migrations
+
 DATA_DIR = Path(__file__).resolve().parents[1] / "data"
 DATA_DIR.mkdir(exist_ok=True)
-DB_PATH = DATA_DIR / "finance.db"
 
-engine = create_engine(f"sqlite:///{DB_PATH}", echo=False)
+# `FINDASH_DB_PATH` permite apontar para um banco alternativo (ex: benchmarks).
+DB_PATH = Path(os.environ.get("FINDASH_DB_PATH", DATA_DIR / "finance.db"))
+
+# Partições Parquet dos meses arquivados (`src.services.archive`), ao lado do banco.
+ARCHIVE_DIR = Path(os.environ.get("FINDASH_ARCHIVE_DIR", DB_PATH.parent / "archive"))
+
+
+def sqlite_pragmas() -> dict:
+    """PRAGMAs de `SQLITE_PRAGMAS` com os overrides de ambiente aplicados."""
+    return {
+        name: os.environ.get(f"FINDASH_SQLITE_{name.upper()}", default)
+        for name, default in SQLITE_PRAGMAS.items()
+    }
+
+
+def make_engine(path: Path = DB_PATH, read_only: bool = False) -> Engine:
+    """Cria um engine SQLite com PRAGMAs ajustados e pool de conexões.
+
+    - `read_only=True` abre o arquivo com `mode=ro` e `query_only`, para leituras
+      do dashboard; com WAL, leitores nunca bloqueiam o escritor (nem o contrário).
+    - As conexões ficam no pool e são reaproveitadas entre as threads de script
+      do Streamlit, em vez de reabrir o arquivo a cada `Session`.
+    """
+    url = f"sqlite:///file:{path}?mode=ro&uri=true" if read_only else f"sqlite:///{path}"
+    pool_size = int(os.environ.get("FINDASH_SQLITE_POOL_SIZE", SQLITE_POOL_SIZE))
+
+    eng = create_engine(
+        url,
+        echo=False,
+        poolclass=QueuePool,
+        pool_size=pool_size,
+        max_overflow=pool_size * 2,
+        connect_args={"check_same_thread": False},
+    )
+    pragmas = sqlite_pragmas()
+
+    instrumentation.install(eng)
+
+    @event.listens_for(eng, "connect")
+    def _apply_pragmas(dbapi_conn, _record) -> None:
+        cur = dbapi_conn.cursor()
+        for name, value in pragmas.items():
+            # journal_mode é persistente no arquivo e só pode ser trocado pelo escritor.
+            if read_only and name == "journal_mode":
+                continue
+            cur.execute(f"PRAGMA {name}={value}")
+        if read_only:
+            cur.execute("PRAGMA query_only=ON")
+        cur.close()
+
+    return eng
+
+
+engine = make_engine(DB_PATH)
+read_engine = make_engine(DB_PATH, read_only=True)
+
+
+# Versão dos dados, guardada no próprio banco (tabela `dataversion`, migração 010):
+# todo serviço de escrita chama `bump_data_version(conn)` dentro da transação
+# que grava, e a camada de cache do app usa o número como parte da chave.
+# Escritas de outro processo (CLI, outro worker) invalidam o cache do app.
+_BUMP_SQL = text("UPDATE dataversion SET version = version + 1")
+
+# Escritas feitas por este processo (sem SQL): o cache só relê a versão do banco
+# no meio de um rerun quando este número muda (ver `src.cache.script_run`).
+_local_writes = 0
+
+
+def data_version() -> int:
+    with read_engine.connect() as conn:
+        return conn.exec_driver_sql("SELECT version FROM dataversion").scalar() or 0
+
+
+def bump_data_version(conn) -> None:
+    """Incrementa a versão na transação aberta de `conn` (sessão ou conexão), antes do commit."""
+    global _local_writes
+    conn.execute(_BUMP_SQL)
+    _local_writes += 1
+
+
+def local_writes() -> int:
+    """Quantas escritas este processo já fez (`bump_data_version`), sem ir ao banco."""
+    return _local_writes
+
 
 def init_db() -> None:
     SQLModel.metadata.create_all(engine)
+    run_migrations(engine)
+
+    from src.services.archive import recover_pending
+
+    recover_pending()
 
 def get_session() -> Session:
     return Session(engine)
+
+def get_read_session() -> Session:
+    """Sessão somente leitura (dashboard/listagens)."""
+    return Session(read_engine)
@@ -0,0 +1,219 @@
+"""Instrumentação das consultas SQL (eventos do SQLAlchemy).
+
+Os listeners são registrados uma vez, na criação dos engines de `src.db`
+(`install`), e não fazem nada fora de um `record()` que coleta na thread
+atual: o app coleta com `?debug=1` / `FINDASH_DEBUG=1`, sem afetar as outras
+sessões. Com `FINDASH_SQL_LOG=1` os comandos acima de `SLOW_QUERY_MS` (ou
+`FINDASH_SLOW_QUERY_MS`) vão para o logger `findash.sql` em qualquer thread.
+
+Coletando, cada comando registra texto, duração, linhas e a função de
+serviço que o disparou no `QueryLog` ativo na thread (`record()`, um por
+rerun do Streamlit).
+
+Linhas de SELECT não aparecem em `cursor.rowcount` no SQLite; por isso as
+conexões dos engines instalados usam um cursor que conta o que é lido (a
+fábrica entra no `do_connect`, desde a primeira conexão do pool).
+"""
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+import pandas as pd
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.config import SLOW_QUERY_MS
+
+logger = logging.getLogger("findash.sql")
+
+SLOW_MS = float(os.environ.get("FINDASH_SLOW_QUERY_MS", SLOW_QUERY_MS))
+
+# Log de consultas lentas em todas as threads, mesmo sem `record()`.
+LOG_SLOW = os.environ.get("FINDASH_SQL_LOG") == "1"
+
+# Módulos ignorados ao procurar quem disparou a consulta.
+_SKIP_MODULES = ("sqlalchemy", "sqlmodel", "pandas", "contextlib", "src.db", "src.instrumentation")
+
+_local = threading.local()
+
+
+class _CountingCursor(sqlite3.Cursor):
+    """Cursor que conta as linhas lidas (o `rowcount` do sqlite3 é -1 em SELECT)."""
+
+    fetched = 0
+
+    def fetchone(self):
+        row = super().fetchone()
+        if row is not None:
+            self.fetched += 1
+        return row
+
+    def fetchmany(self, size=None):
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self.fetched += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        self.fetched += len(rows)
+        return rows
+
+
+class _CountingConnection(sqlite3.Connection):
+    def cursor(self, factory=_CountingCursor):
+        return super().cursor(factory)
+
+
+@dataclass
+class QueryRecord:
+    statement: str
+    duration_ms: float
+    caller: str
+    cursor: object = field(repr=False, default=None)
+    rowcount: int = -1
+
+    @property
+    def rows(self) -> int:
+        """Linhas lidas (SELECT) ou afetadas (DML); lido no fim, depois do fetch."""
+        fetched = getattr(self.cursor, "fetched", 0)
+        return fetched if fetched or self.rowcount < 0 else self.rowcount
+
+
+class QueryLog:
+    """Comandos executados na thread enquanto o `record()` estava ativo."""
+
+    def __init__(self, collect: bool = True) -> None:
+        self.collect = collect
+        self.records: list[QueryRecord] = []
+
+    @property
+    def n(self) -> int:
+        return len(self.records)
+
+    @property
+    def total_ms(self) -> float:
+        return sum(r.duration_ms for r in self.records)
+
+    def summary(self) -> pd.DataFrame:
+        """Uma linha por função chamadora: consultas, tempo total/máximo e linhas."""
+        if not self.records:
+            return pd.DataFrame(columns=["origem", "consultas", "total_ms", "max_ms", "linhas"])
+        df = pd.DataFrame(
+            {
+                "origem": [r.caller for r in self.records],
+                "ms": [r.duration_ms for r in self.records],
+                "linhas": [r.rows for r in self.records],
+            }
+        )
+        out = df.groupby("origem", as_index=False).agg(
+            consultas=("ms", "size"), total_ms=("ms", "sum"), max_ms=("ms", "max"), linhas=("linhas", "sum")
+        )
+        return out.sort_values("total_ms", ascending=False).round(2).reset_index(drop=True)
+
+    def slowest(self, k: int = 5) -> pd.DataFrame:
+        top = sorted(self.records, key=lambda r: r.duration_ms, reverse=True)[:k]
+        return pd.DataFrame(
+            [{"origem": r.caller, "ms": round(r.duration_ms, 2), "linhas": r.rows, "sql": r.statement} for r in top]
+        )
+
+
+def _caller() -> str:
+    """Primeira função fora do SQLAlchemy/pandas na pilha (ex: `transactions.list_transactions`)."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if not module.startswith(_SKIP_MODULES):
+            return f"{module.rsplit('.', 1)[-1]}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return "?"
+
+
+def _collecting() -> QueryLog | None:
+    log: QueryLog | None = getattr(_local, "log", None)
+    return log if log is not None and log.collect else None
+
+
+def _before(conn, cursor, statement, parameters, context, executemany) -> None:
+    if LOG_SLOW or _collecting() is not None:
+        context._findash_t0 = time.perf_counter()
+
+
+def _after(conn, cursor, statement, parameters, context, executemany) -> None:
+    t0 = getattr(context, "_findash_t0", None)
+    if t0 is None:
+        return
+    elapsed = (time.perf_counter() - t0) * 1000
+    log = _collecting()
+
+    slow = elapsed >= SLOW_MS
+    if log is None and not slow:
+        return
+
+    caller = _caller()
+    if slow:
+        logger.warning("consulta lenta (%.1f ms) em %s: %s", elapsed, caller, " ".join(statement.split()))
+    if log is not None:
+        log.records.append(QueryRecord(statement, elapsed, caller, cursor, cursor.rowcount))
+
+
+def _counting_factory(dialect, conn_rec, cargs, cparams) -> None:
+    cparams.setdefault("factory", _CountingConnection)
+
+
+_LISTENERS = (
+    ("before_cursor_execute", _before),
+    ("after_cursor_execute", _after),
+    ("do_connect", _counting_factory),
+)
+
+
+def install(eng: Engine) -> None:
+    """Registra os listeners em `eng` uma única vez (inertes fora de um `record()`).
+
+    Chamado na criação do engine, antes da primeira conexão: o pool nunca
+    precisa ser descartado para as conexões ganharem o cursor que conta linhas.
+    """
+    for name, fn in _LISTENERS:
+        if not event.contains(eng, name, fn):
+            event.listen(eng, name, fn)
+
+
+def enable(*engines: Engine) -> None:
+    """`install` em outros engines (idempotente). Sem argumentos, usa os engines de `src.db`.
+
+    Conexões que o pool já tinha abertas continuam sem contar linhas de SELECT.
+    """
+    if not engines:
+        from src.db import engine, read_engine
+
+        engines = (engine, read_engine)
+    for eng in engines:
+        install(eng)
+
+
+def current() -> QueryLog | None:
+    """`QueryLog` do `record()` ativo na thread, se houver."""
+    return getattr(_local, "log", None)
+
+
+@contextmanager
+def record(collect: bool = True):
+    """Coleta os comandos SQL da thread atual dentro do bloco.
+
+    Com `collect=False` o bloco só marca o rerun (`current()`), sem custo por consulta.
+    """
+    log = QueryLog(collect)
+    previous = getattr(_local, "log", None)
+    _local.log = log
+    try:
+        yield log
+    finally:
+        _local.log = previous
+
@@ -0,0 +1,393 @@
+"""Migrações versionadas do banco SQLite.
+
+`SQLModel.metadata.create_all` só cria tabelas que ainda não existem; tudo o
+que precisa evoluir num `finance.db` já existente (índices, colunas novas,
+backfills) entra aqui como uma migração numerada. As versões aplicadas ficam
+registradas em `schema_migrations` e `run_migrations` roda no `init_db()`.
+
+Uso pela linha de comando:
+    python -m src.migrations            # aplica pendentes e mostra o status
+    python -m src.migrations --check    # valida os planos de consulta (EXPLAIN QUERY PLAN)
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import sys
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Callable, Union
+
+from sqlalchemy.engine import Connection, Engine
+
+# Cada passo é um SQL puro ou uma função que recebe a conexão aberta.
+Step = Union[str, Callable[[Connection], None]]
+
+def _add_column(table: str, column: str, ddl: str) -> Step:
+    """Passo idempotente de `ALTER TABLE ... ADD COLUMN` (bancos novos já nascem com a coluna)."""
+    def step(conn: Connection) -> None:
+        cols = {row[1] for row in conn.exec_driver_sql(f'PRAGMA table_info("{table}")')}
+        if column not in cols:
+            conn.exec_driver_sql(f'ALTER TABLE "{table}" ADD COLUMN {column} {ddl}')
+    return step
+
+
+def _to_cents(table: str, column: str) -> Step:
+    """Passo que converte uma coluna de reais (REAL) em centavos (INTEGER), mantendo o nome.
+
+    O SQLite não troca o tipo de uma coluna: cria `<coluna>_cents`, copia os
+    valores arredondados, remove a antiga e renomeia. Tabelas que o
+    `create_all` já criou com INTEGER (ex: `installmentplan`, preenchida em
+    reais pela migração 4 no mesmo `init_db()`) só têm os valores convertidos:
+    antes desta migração, toda linha gravada está em reais.
+    """
+    def step(conn: Connection) -> None:
+        types = {row[1]: row[2].upper() for row in conn.exec_driver_sql(f'PRAGMA table_info("{table}")')}
+        if types.get(column) == "INTEGER":
+            conn.exec_driver_sql(f'UPDATE "{table}" SET {column} = CAST(ROUND({column} * 100) AS INTEGER)')
+            return
+        tmp = f"{column}_cents"
+        conn.exec_driver_sql(f'ALTER TABLE "{table}" ADD COLUMN {tmp} INTEGER NOT NULL DEFAULT 0')
+        conn.exec_driver_sql(f'UPDATE "{table}" SET {tmp} = CAST(ROUND(COALESCE({column}, 0) * 100) AS INTEGER)')
+        conn.exec_driver_sql(f'ALTER TABLE "{table}" DROP COLUMN {column}')
+        conn.exec_driver_sql(f'ALTER TABLE "{table}" RENAME COLUMN {tmp} TO {column}')
+    return step
+
+
+# Os passos abaixo congelam o SQL da época de cada migração: os serviços podem
+# mudar (ex: passar a ler o arquivo frio), mas um banco antigo precisa ser
+# migrado sempre do mesmo jeito.
+
+def _backfill_rollup(conn: Connection) -> None:
+    conn.exec_driver_sql("DELETE FROM monthlyrollup")
+    conn.exec_driver_sql(
+        "INSERT INTO monthlyrollup (account_id, category_id, owner, month, income, expense, count) "
+        "SELECT account_id, category_id, owner, strftime('%Y-%m', date) AS month, "
+        "SUM(CASE WHEN amount > 0 THEN amount ELSE 0 END), "
+        "SUM(CASE WHEN amount < 0 THEN amount ELSE 0 END), "
+        "COUNT(*) "
+        'FROM "transaction" GROUP BY account_id, category_id, owner, month'
+    )
+
+
+def _backfill_ledger(conn: Connection) -> None:
+    conn.exec_driver_sql("DELETE FROM dailybalance")
+    conn.exec_driver_sql(
+        "INSERT INTO dailybalance (account_id, date, delta, count, closing) "
+        "SELECT account_id, date, SUM(amount), COUNT(*), "
+        "SUM(SUM(amount)) OVER (PARTITION BY account_id ORDER BY date) "
+        'FROM "transaction" GROUP BY account_id, date'
+    )
+
+
+_INSTALLMENT_RE = re.compile(r"\((\d+)\s*/\s*(\d+)\)\s*$")
+
+
+def _link_installments(conn: Connection) -> None:
+    """Agrupa as transações "(n/N)" em planos, como `installments.link_installments` fazia na versão 4."""
+    rows = conn.exec_driver_sql(
+        'SELECT id, date, description, amount, account_id, category_id, owner FROM "transaction" '
+        "WHERE installment_plan_id IS NULL AND description LIKE '%(%/%)%' ORDER BY date, id"
+    ).fetchall()
+
+    groups: dict[tuple, list[dict]] = defaultdict(list)
+    for tx_id, dt, description, amount, account_id, category_id, owner in rows:
+        m = _INSTALLMENT_RE.search(description.strip())
+        if not m:
+            continue
+        number, total = int(m.group(1)), int(m.group(2))
+        base = _INSTALLMENT_RE.sub("", description).strip()
+
+        plans = groups[(base, account_id, category_id, owner, amount, total)]
+        plan = next((p for p in plans if number not in p["numbers"] and max(p["numbers"]) < number), None)
+        if plan is None:
+            plan = {"numbers": set(), "tx": [], "first_date": dt}
+            plans.append(plan)
+        plan["numbers"].add(number)
+        plan["tx"].append((tx_id, number))
+
+    next_id = conn.exec_driver_sql("SELECT COALESCE(MAX(id), 0) + 1 FROM installmentplan").scalar()
+    created_at = datetime.utcnow().isoformat(sep=" ")
+    new_plans, links = [], []
+    for (base, account_id, category_id, owner, amount, total), plans in groups.items():
+        for plan in plans:
+            plan_id = next_id + len(new_plans)
+            new_plans.append(
+                (plan_id, base, amount, total, account_id, category_id, owner, plan["first_date"], created_at)
+            )
+            links.extend((plan_id, number, tx_id) for tx_id, number in plan["tx"])
+
+    if new_plans:
+        conn.exec_driver_sql(
+            "INSERT INTO installmentplan "
+            "(id, description, amount, total_installments, account_id, category_id, owner, first_date, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            new_plans,
+        )
+        conn.exec_driver_sql(
+            'UPDATE "transaction" SET installment_plan_id = ?, installment_number = ? WHERE id = ?',
+            links,
+        )
+
+
+# Tabela FTS5 de conteúdo externo e os triggers que a mantêm (ver `src.services.search`).
+_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS transaction_fts USING fts5("
+    "description, content='transaction', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    'CREATE TRIGGER IF NOT EXISTS transaction_fts_ai AFTER INSERT ON "transaction" BEGIN '
+    "INSERT INTO transaction_fts (rowid, description) VALUES (new.id, new.description); END",
+    'CREATE TRIGGER IF NOT EXISTS transaction_fts_ad AFTER DELETE ON "transaction" BEGIN '
+    "INSERT INTO transaction_fts (transaction_fts, rowid, description) "
+    "VALUES ('delete', old.id, old.description); END",
+    'CREATE TRIGGER IF NOT EXISTS transaction_fts_au AFTER UPDATE OF description ON "transaction" BEGIN '
+    "INSERT INTO transaction_fts (transaction_fts, rowid, description) "
+    "VALUES ('delete', old.id, old.description); "
+    "INSERT INTO transaction_fts (rowid, description) VALUES (new.id, new.description); END",
+    # Indexa as descrições já existentes.
+    "INSERT INTO transaction_fts (transaction_fts) VALUES ('rebuild')",
+]
+
+
+def _backfill_card_cycles(conn: Connection) -> None:
+    from src.config import DEFAULT_CLOSING_DAY, DEFAULT_DUE_DAY
+
+    # Cartões existentes mantêm o ciclo que o app usava fixo (4 -> 3, vence dia 10).
+    conn.exec_driver_sql(
+        "UPDATE account SET closing_day = COALESCE(closing_day, ?), due_day = COALESCE(due_day, ?) "
+        "WHERE type = 'credit'",
+        (DEFAULT_CLOSING_DAY, DEFAULT_DUE_DAY),
+    )
+
+
+MIGRATIONS: list[tuple[int, str, list[Step]]] = [
+    (
+        1,
+        "indices_de_transacoes",
+        [
+            'CREATE INDEX IF NOT EXISTS ix_transaction_account_date ON "transaction" (account_id, date)',
+            'CREATE INDEX IF NOT EXISTS ix_transaction_date_id ON "transaction" (date, id)',
+            'CREATE INDEX IF NOT EXISTS ix_transaction_owner_date ON "transaction" (owner, date)',
+            'CREATE INDEX IF NOT EXISTS ix_transaction_category_date ON "transaction" (category_id, date)',
+        ],
+    ),
+    (2, "rollup_mensal", [_backfill_rollup]),
+    (3, "razao_saldos_diarios", [_backfill_ledger]),
+    (
+        4,
+        "planos_de_parcelamento",
+        [
+            _add_column("transaction", "installment_plan_id", "INTEGER REFERENCES installmentplan (id)"),
+            _add_column("transaction", "installment_number", "INTEGER"),
+            'CREATE INDEX IF NOT EXISTS ix_transaction_plan ON "transaction" (installment_plan_id, installment_number)',
+            _link_installments,
+        ],
+    ),
+    (
+        5,
+        "grupos_de_transferencia",
+        [
+            _add_column("transaction", "transfer_group", "VARCHAR"),
+            'CREATE INDEX IF NOT EXISTS ix_transaction_transfer_group ON "transaction" (transfer_group)',
+        ],
+    ),
+    (
+        6,
+        "hash_de_importacao",
+        [
+            _add_column("transaction", "import_hash", "VARCHAR"),
+            'CREATE UNIQUE INDEX IF NOT EXISTS ux_transaction_import_hash ON "transaction" (import_hash)',
+        ],
+    ),
+    (
+        7,
+        "ciclo_de_fatura_por_cartao",
+        [
+            _add_column("account", "closing_day", "INTEGER"),
+            _add_column("account", "due_day", "INTEGER"),
+            _backfill_card_cycles,
+        ],
+    ),
+    (8, "busca_textual_fts5", _FTS_DDL),
+    (
+        9,
+        "valores_em_centavos",
+        [
+            _to_cents("transaction", "amount"),
+            _to_cents("account", "initial_balance"),
+            _to_cents("installmentplan", "amount"),
+            _to_cents("monthlyrollup", "income"),
+            _to_cents("monthlyrollup", "expense"),
+            _to_cents("dailybalance", "delta"),
+            _to_cents("dailybalance", "closing"),
+            # Agregados refeitos a partir dos centavos, sem herdar resíduo de float.
+            _backfill_rollup,
+            _backfill_ledger,
+        ],
+    ),
+    (
+        10,
+        "versao_dos_dados",
+        [
+            "CREATE TABLE IF NOT EXISTS dataversion ("
+            "id INTEGER PRIMARY KEY CHECK (id = 1), "
+            "version INTEGER NOT NULL)",
+            "INSERT OR IGNORE INTO dataversion (id, version) VALUES (1, 0)",
+        ],
+    ),
+    (
+        11,
+        "indice_por_valor",
+        ['CREATE INDEX IF NOT EXISTS ix_transaction_amount_id ON "transaction" (amount, id)'],
+    ),
+]
+
+
+def _ensure_table(conn: Connection) -> None:
+    conn.exec_driver_sql(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version INTEGER PRIMARY KEY, "
+        "name VARCHAR NOT NULL, "
+        "applied_at DATETIME NOT NULL)"
+    )
+
+
+def applied_versions(engine: Engine) -> set[int]:
+    """Versões já registradas em `schema_migrations`."""
+    with engine.begin() as conn:
+        _ensure_table(conn)
+        return {row[0] for row in conn.exec_driver_sql("SELECT version FROM schema_migrations")}
+
+
+def run_migrations(engine: Engine) -> list[int]:
+    """Aplica, em ordem, as migrações pendentes. Retorna as versões aplicadas agora.
+
+    Cada migração roda na sua própria transação; os passos DDL usam
+    `IF NOT EXISTS` para que uma migração interrompida possa ser refeita.
+    """
+    done = applied_versions(engine)
+    applied_now = []
+
+    for version, name, steps in MIGRATIONS:
+        if version in done:
+            continue
+
+        with engine.begin() as conn:
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.exec_driver_sql(step)
+
+            conn.exec_driver_sql(
+                "INSERT INTO schema_migrations (version, name, applied_at) VALUES (?, ?, ?)",
+                (version, name, datetime.utcnow().isoformat(sep=" ")),
+            )
+        applied_now.append(version)
+
+    return applied_now
+
+
+# ---------------------------------------
+# ----- Verificação de planos (EQP) -----
+# ---------------------------------------
+
+def query_plan(engine: Engine, stmt) -> list[str]:
+    """Executa `EXPLAIN QUERY PLAN` para um statement SQLAlchemy e retorna as linhas de detalhe."""
+    compiled = stmt.compile(dialect=engine.dialect)
+    params = tuple(compiled.params[k] for k in compiled.positiontup or [])
+
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).fetchall()
+
+    return [row[-1] for row in rows]
+
+
+def _service_queries() -> dict[str, tuple[object, str]]:
+    """Consultas representativas dos serviços e o índice que cada uma deve usar."""
+    from sqlalchemy import tuple_
+    from sqlmodel import select
+
+    from src.models import Account, Transaction
+    from src.services.dashboards import balances_query
+    from src.services.installments import active_installments_query
+    from src.services.ledger import closing_subquery
+    from src.services.transactions import PAGE_SIZE, transactions_query
+
+    d0, d1 = date(2024, 1, 1), date(2024, 1, 31)
+
+    return {
+        "list_transactions(start, end)": (
+            transactions_query(start=d0, end=d1), "ix_transaction_date_id"),
+        "list_transactions(start, end, owner)": (
+            transactions_query(start=d0, end=d1, owner="partner"), "ix_transaction_owner_date"),
+        "list_transactions(account_id)": (
+            transactions_query(account_id=1), "ix_transaction_account_date"),
+        "list_transactions_page(cursor)": (
+            transactions_query().order_by(None)
+            .where(tuple_(Transaction.date, Transaction.id) < tuple_(d1, 1))
+            .order_by(Transaction.date.desc(), Transaction.id.desc()).limit(PAGE_SIZE + 1),
+            "ix_transaction_date_id"),
+        "list_transactions_page(sort=amount, cursor)": (
+            transactions_query().order_by(None)
+            .where(tuple_(Transaction.amount, Transaction.id) < tuple_(-5000, 1))
+            .order_by(Transaction.amount.desc(), Transaction.id.desc()).limit(PAGE_SIZE + 1),
+            "ix_transaction_amount_id"),
+        "current_balance_for_account": (
+            select(closing_subquery(Account.id)).where(Account.id == 1), "sqlite_autoindex_dailybalance_1"),
+        "balances_by_account(as_of)": (
+            balances_query(as_of=d1), "sqlite_autoindex_dailybalance_1"),
+        "list_active_installments": (
+            active_installments_query(d1), "ix_transaction_plan"),
+    }
+
+
+# Tabelas grandes que nunca devem ser varridas sem índice pelas consultas do app.
+_LARGE_TABLES = ("transaction", "dailybalance", "monthlyrollup")
+
+
+def _is_full_scan(line: str) -> bool:
+    return line.startswith("SCAN ") and "USING" not in line and line.split()[1] in _LARGE_TABLES
+
+
+def check_query_plans(engine: Engine) -> dict[str, tuple[bool, list[str]]]:
+    """Confere se as consultas dos serviços usam os índices esperados.
+
+    Retorna `{nome: (usa_indice, linhas_do_plano)}`.
+    """
+    out = {}
+    for name, (stmt, index) in _service_queries().items():
+        plan = query_plan(engine, stmt)
+        uses_index = any(index in p for p in plan) and not any(_is_full_scan(p) for p in plan)
+        out[name] = (uses_index, plan)
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Migrações do banco FinDash.")
+    parser.add_argument("--check", action="store_true", help="valida os planos de consulta")
+    args = parser.parse_args()
+
+    import src.models  # noqa: F401  (registra as tabelas no metadata)
+    from src.db import engine, init_db
+
+    init_db()
+    done = applied_versions(engine)
+    for version, name, _ in MIGRATIONS:
+        print(f"{'[x]' if version in done else '[ ]'} {version:03d} {name}")
+
+    if not args.check:
+        return
+
+    ok = True
+    for name, (uses_index, plan) in check_query_plans(engine).items():
+        ok &= uses_index
+        print(f"\n{'OK ' if uses_index else 'FALHA'} {name}")
+        for line in plan:
+            print(f"    {line}")
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
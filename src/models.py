@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import datetime as dt
 from datetime import date, datetime
 from enum import Enum
 from typing import Optional
@@ -37,7 +38,12 @@ class Account(SQLModel, table=True):
     name: str
     owner: Owner = Field(default=Owner.petrus)
     type: AccountType = Field(default=AccountType.checking)
-    initial_balance: float = Field(default=0.0)
+    initial_balance: int = Field(default=0)  # centavos (ver `src/money.py`)
+
+    # Cartões: dia do fechamento (última compra do ciclo) e dia do vencimento.
+    # Vazio = padrão de `src.config` (DEFAULT_CLOSING_DAY / DEFAULT_DUE_DAY).
+    closing_day: Optional[int] = Field(default=None)
+    due_day: Optional[int] = Field(default=None)
 
 
 class Category(SQLModel, table=True):
@@ -54,7 +60,7 @@ class Transaction(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
 
     date: date
-    amount: float
+    amount: int  # centavos, com sinal (ver `src/money.py`)
     description: str = Field(default="")
 
     account_id: int
@@ -67,5 +73,67 @@ class Transaction(SQLModel, table=True):
 
     card_label: Optional[str] = Field(default=None)
 
+    # Parcelamento: plano de origem e número desta parcela (1..total).
+    installment_plan_id: Optional[int] = Field(default=None, foreign_key="installmentplan.id")
+    installment_number: Optional[int] = Field(default=None)
+
+    # Transferência: as duas pernas (origem/destino) compartilham o mesmo grupo.
+    transfer_group: Optional[str] = Field(default=None)
+
+    # Importação de CSV: hash de (conta, data, valor, descrição, ocorrência), único.
+    import_hash: Optional[str] = Field(default=None)
+
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class InstallmentPlan(SQLModel, table=True):
+    """Compra parcelada: cada parcela é uma `Transaction` ligada ao plano."""
+    __table_args__ = {"extend_existing": True}
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+
+    description: str = Field(default="")  # sem o sufixo "(n/N)"
+    amount: int                           # valor de cada parcela em centavos (com sinal)
+    total_installments: int
+
+    account_id: int
+    category_id: int
+    owner: Owner = Field(default=Owner.petrus)
+
+    first_date: date
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class MonthlyRollup(SQLModel, table=True):
+    """Totais pré-agregados por (conta, categoria, dono, mês).
+
+    Mantido pelos serviços de escrita de `transactions.py` na mesma transação;
+    ver `src/services/rollups.py` para rebuild e checagem de consistência.
+    """
+    __table_args__ = {"extend_existing": True}
+
+    account_id: int = Field(primary_key=True)
+    category_id: int = Field(primary_key=True)
+    owner: Owner = Field(primary_key=True)
+    month: str = Field(primary_key=True)  # "YYYY-MM"
+
+    income: int = Field(default=0)   # soma dos valores > 0 (centavos)
+    expense: int = Field(default=0)  # soma dos valores < 0 (centavos)
+    count: int = Field(default=0)
+
+
+class DailyBalance(SQLModel, table=True):
+    """Saldo de fechamento diário por conta (sem o `initial_balance`).
+
+    `closing` é a soma acumulada das transações da conta até `date`, inclusive.
+    Mantido pelos serviços de escrita; ver `src/services/ledger.py`.
+    """
+    __table_args__ = {"extend_existing": True}
+
+    account_id: int = Field(primary_key=True)
+    date: dt.date = Field(primary_key=True)  # `dt.date`: evita conflito do nome do campo com o tipo
+
+    delta: int = Field(default=0)    # soma das transações do dia (centavos)
+    count: int = Field(default=0)    # transações do dia
+    closing: int = Field(default=0)  # acumulado até o fim do dia (centavos)
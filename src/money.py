@@ -0,0 +1,32 @@
+"""Valores monetários em centavos (inteiros).
+
+O banco guarda todo valor como inteiro de centavos (`Transaction.amount`,
+`Account.initial_balance`, `InstallmentPlan.amount`, rollup e razão), e os
+quadros dos serviços trazem essas colunas como `int64`. Somas em SQL e em
+NumPy ficam exatas, sem o resíduo binário de `float`.
+
+Reais só aparecem nas bordas: formulários (`to_cents`), CSV importado e
+exportado e exibição (`fmt_brl`, tabelas e gráficos via `to_reais`).
+"""
+from __future__ import annotations
+
+from typing import Union
+
+import pandas as pd
+
+Number = Union[int, float]
+
+
+def to_cents(reais: Number) -> int:
+    """Reais -> centavos, arredondando como o `round(x, 2)` usado antes."""
+    return int(round(float(reais) * 100))
+
+
+def to_cents_series(reais: pd.Series) -> pd.Series:
+    """Versão vetorizada de `to_cents`; valores ausentes continuam ausentes (`Int64`)."""
+    return (reais.astype("float64") * 100).round().astype("Int64")
+
+
+def to_reais(cents):
+    """Centavos -> reais (`float`), para escalar ou `Series`. Só na exibição/exportação."""
+    return cents / 100
@@ -0,0 +1,203 @@
+"""Tempo de renderização por página/seção do app.
+
+`profiled` funciona como decorator (`@profiled()`) e como context manager
+(`with profiled("dashboard.faturas"):`). Fora de um `profile_rerun()` ativo na
+thread, entrar e sair custa só a checagem de um atributo thread-local.
+
+Ligado por `?profile=...` na URL ou `FINDASH_PROFILE=...` no ambiente:
+    time          só tempo de parede por seção (padrão para "1")
+    tracemalloc   + memória alocada (líquida) em cada seção
+    cprofile      + funções mais caras do rerun inteiro (cProfile)
+Os modos podem ser combinados: `?profile=tracemalloc,cprofile`.
+
+Cada rerun perfilado vira uma linha JSON em `PROFILE_FILE`
+(`FINDASH_PROFILE_FILE` sobrescreve) e uma tabela no sidebar.
+
+tracemalloc e cProfile são do processo, não da sessão: só o primeiro
+`profile_rerun` ativo liga e desliga os tracers; reruns concorrentes (outras
+sessões) ou aninhados medem com o que já está ligado e saem com
+`tracer_owner: false`. Os números de memória e de funções valem para o
+processo inteiro (`process_wide` no JSONL).
+"""
+from __future__ import annotations
+
+import cProfile
+import functools
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterable
+
+import pandas as pd
+
+PROFILE_FILE = Path(os.environ.get("FINDASH_PROFILE_FILE", Path(__file__).resolve().parents[1] / "data" / "profile.jsonl"))
+PROFILE_MODES = {"time", "tracemalloc", "cprofile"}
+CPROFILE_TOP = 15
+
+_local = threading.local()
+_lock = threading.Lock()
+_tracer_owner: "RerunProfile | None" = None
+
+
+def parse_modes(value: str | None) -> set[str]:
+    """`"1"` / `"time"` / `"cprofile,tracemalloc"` -> conjunto de modos (vazio = desligado)."""
+    if not value or value in ("0", "false"):
+        return set()
+    modes = {m.strip() for m in value.split(",")} & PROFILE_MODES
+    return modes | {"time"}
+
+
+class RerunProfile:
+    """Seções medidas num rerun, na ordem em que terminaram."""
+
+    def __init__(self, label: str, modes: set[str]) -> None:
+        self.label = label
+        self.modes = modes
+        self.sections: list[dict] = []
+        self.depth = 0
+        self.cprofile_top: list[dict] = []
+        self.wall_ms = 0.0
+        self.tracer_owner = False
+
+    def table(self) -> pd.DataFrame:
+        """Seções na ordem de início, com o nome recuado pelo aninhamento."""
+        if not self.sections:
+            return pd.DataFrame(columns=["seção", "ms"])
+        df = pd.DataFrame(sorted(self.sections, key=lambda s: s["start"]))
+        df["seção"] = df.apply(lambda r: "  " * r["depth"] + r["name"], axis=1)
+        cols = ["seção", "ms"] + (["mem_kb"] if "mem_kb" in df.columns else [])
+        return df[cols].round(1)
+
+    def to_json(self) -> dict:
+        return {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "label": self.label,
+            "modes": sorted(self.modes),
+            "process_wide": bool(self.modes & {"tracemalloc", "cprofile"}),
+            "tracer_owner": self.tracer_owner,
+            "wall_ms": round(self.wall_ms, 3),
+            "sections": [{k: v for k, v in s.items() if k != "start"} for s in self.sections],
+            "cprofile_top": self.cprofile_top,
+        }
+
+
+class profiled:
+    """Mede o bloco/função `name` no `RerunProfile` ativo da thread (se houver)."""
+
+    def __init__(self, name: str | None = None) -> None:
+        self.name = name
+
+    def __call__(self, fn: Callable) -> Callable:
+        name = self.name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if getattr(_local, "profile", None) is None:
+                return fn(*args, **kwargs)
+            with profiled(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    def __enter__(self) -> "profiled":
+        prof: RerunProfile | None = getattr(_local, "profile", None)
+        self._prof = prof
+        if prof is not None:
+            self._depth = prof.depth
+            prof.depth += 1
+            tracing = "tracemalloc" in prof.modes and tracemalloc.is_tracing()
+            self._mem0 = tracemalloc.get_traced_memory()[0] if tracing else None
+            self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        prof = self._prof
+        if prof is None:
+            return
+        section = {
+            "name": self.name,
+            "depth": self._depth,
+            "start": self._t0,
+            "ms": (time.perf_counter() - self._t0) * 1000,
+        }
+        if self._mem0 is not None:
+            section["mem_kb"] = (tracemalloc.get_traced_memory()[0] - self._mem0) / 1024
+        prof.sections.append(section)
+        prof.depth -= 1
+
+
+def _top_functions(profiler: cProfile.Profile, limit: int) -> list[dict]:
+    stats = pstats.Stats(profiler)
+    rows = []
+    for (filename, line, func), (_cc, ncalls, tottime, cumtime, _callers) in stats.stats.items():
+        rows.append(
+            {
+                "function": f"{Path(filename).name}:{line}({func})",
+                "ncalls": ncalls,
+                "tottime_ms": round(tottime * 1000, 3),
+                "cumtime_ms": round(cumtime * 1000, 3),
+            }
+        )
+    return sorted(rows, key=lambda r: r["cumtime_ms"], reverse=True)[:limit]
+
+
+def current() -> RerunProfile | None:
+    """`RerunProfile` do `profile_rerun()` ativo na thread, se houver."""
+    return getattr(_local, "profile", None)
+
+
+@contextmanager
+def profile_rerun(modes: Iterable[str], label: str = ""):
+    """Ativa o perfil na thread durante o bloco; grava o JSONL ao sair.
+
+    Com `modes` vazio não faz nada e produz `None`.
+    """
+    modes = set(modes)
+    if not modes:
+        yield None
+        return
+
+    global _tracer_owner
+    prof = RerunProfile(label, modes)
+    profiler = None
+    started_tracemalloc = False
+    with _lock:
+        if _tracer_owner is None and modes & {"tracemalloc", "cprofile"}:
+            _tracer_owner = prof
+            prof.tracer_owner = True
+            profiler = cProfile.Profile() if "cprofile" in modes else None
+            started_tracemalloc = "tracemalloc" in modes and not tracemalloc.is_tracing()
+            if started_tracemalloc:
+                tracemalloc.start()
+            if profiler is not None:
+                profiler.enable()
+
+    outer = getattr(_local, "profile", None)
+    _local.profile = prof
+    t0 = time.perf_counter()
+    try:
+        yield prof
+    finally:
+        prof.wall_ms = (time.perf_counter() - t0) * 1000
+        _local.profile = outer
+        if prof.tracer_owner:
+            with _lock:
+                if profiler is not None:
+                    profiler.disable()
+                    prof.cprofile_top = _top_functions(profiler, CPROFILE_TOP)
+                if started_tracemalloc:
+                    tracemalloc.stop()
+                _tracer_owner = None
+        write_jsonl(prof)
+
+
+def write_jsonl(prof: RerunProfile, path: Path = PROFILE_FILE) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as fh:
+        fh.write(json.dumps(prof.to_json(), ensure_ascii=False) + "\n")
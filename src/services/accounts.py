@@ -2,39 +2,66 @@ from __future__ import annotations
 
 from sqlmodel import select
 
-from src.db import get_session
+from src.db import bump_data_version, get_read_session, get_session
 from src.models import Account, Owner, AccountType
 
 
 def list_accounts() -> list[Account]:
-    with get_session() as session:
+    with get_read_session() as session:
         return list(session.exec(select(Account).order_by(Account.name)).all())
 
 
-def create_account(name: str, owner: str, typ: str, initial_balance: float = 0.0) -> None:
+def create_account(
+    name: str,
+    owner: str,
+    typ: str,
+    initial_balance: int = 0,
+    closing_day: int | None = None,
+    due_day: int | None = None,
+) -> None:
     with get_session() as session:
         session.add(
             Account(
                 name=name.strip(),
                 owner=Owner(owner),
                 type=AccountType(typ),
-                initial_balance=float(initial_balance),
+                initial_balance=int(initial_balance),
+                closing_day=closing_day,
+                due_day=due_day,
             )
         )
+        bump_data_version(session)
         session.commit()
 
 
-def update_account_initial_balance(account_id: int, new_initial_balance: float) -> None:
+def update_account_initial_balance(account_id: int, new_initial_balance: int) -> None:
     # (a gente não vai usar no teu fluxo, porque vamos ajustar saldo por transação)
     with get_session() as session:
         acc = session.get(Account, account_id)
         if not acc:
             return
-        acc.initial_balance = float(new_initial_balance)
+        acc.initial_balance = int(new_initial_balance)
         session.add(acc)
+        bump_data_version(session)
         session.commit()
 
 
-def get_account_by_name(name: str) -> Account | None:
+def update_account_cycle(account_id: int, closing_day: int, due_day: int) -> None:
+    """Dias de fechamento e vencimento da fatura de um cartão."""
+    if not (1 <= closing_day <= 31 and 1 <= due_day <= 31):
+        raise ValueError("Dias de fechamento e vencimento precisam estar entre 1 e 31.")
+
     with get_session() as session:
+        acc = session.get(Account, account_id)
+        if not acc:
+            return
+        acc.closing_day = int(closing_day)
+        acc.due_day = int(due_day)
+        session.add(acc)
+        bump_data_version(session)
+        session.commit()
+
+
+def get_account_by_name(name: str) -> Account | None:
+    with get_read_session() as session:
         return session.exec(select(Account).where(Account.name == name)).first()
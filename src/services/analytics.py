@@ -0,0 +1,475 @@
+"""Agregações do dashboard com motor plugável (pandas ou Polars).
+
+Cada seção do dashboard descreve o recorte que desenha com um `TxFilter`
+(período, dono, contas, categoria, ids da busca, ciclos de fatura) e pede ao
+motor do `DataContext` (`ctx.analytics`) as linhas e as agregações desse
+recorte: totais do período, gasto por categoria, fatura por cartão e
+parcelamentos "(n/N)" ativos. O motor vem de `ANALYTICS_BACKEND` (ou
+`FINDASH_ANALYTICS_BACKEND`):
+
+    pandas   padrão: filtra e agrega as janelas de `list_transactions`
+    polars   lê a janela do `finance.db` direto para Arrow (`arrow_transactions`,
+             cursor -> RecordBatch, + partições do arquivo frio) e filtra e
+             agrega em lazy frames do Polars; só o que vai para a tela (as
+             linhas do recorte e os quadros agregados) vira pandas. Sem
+             `polars`/`pyarrow` instalados, volta para pandas com um aviso.
+
+Os dois motores devolvem os mesmos valores, na mesma ordem
+(`tests/test_analytics.py`); `benchmarks/bench_analytics.py` compara os tempos.
+"""
+from __future__ import annotations
+
+import logging
+import os
+from dataclasses import dataclass
+from datetime import date, datetime, time
+from functools import lru_cache
+from typing import Optional
+
+import pandas as pd
+from sqlalchemy import select
+
+from src.config import ANALYTICS_BACKEND, INSTALLMENT_RE
+from src.db import get_read_session
+from src.models import Account, Category
+from src.services.archive import read_archive
+from src.services.installments import unlinked_installments_query
+from src.services.transactions import TX_COLUMNS, TX_DTYPES, transactions_query
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # dependência opcional: só o motor Polars precisa dela
+    pa = pc = None
+
+try:
+    import polars as pl
+except ImportError:  # dependência opcional
+    pl = None
+
+logger = logging.getLogger("findash.analytics")
+
+# Linhas por RecordBatch lido do cursor em `arrow_transactions`.
+ARROW_BATCH_SIZE = 50_000
+
+INSTALLMENT_COLUMNS = [
+    "date",
+    "account",
+    "category",
+    "owner",
+    "amount",
+    "base_description",
+    "current_installment",
+    "total_installments",
+    "remaining_installments",
+    "next_installment",
+    "future_commitment",
+    "next_due_date",
+]
+
+# Colunas de rótulo que saem das agregações como texto (não `category`), iguais nos dois motores.
+_LABELS = ["account", "category", "owner"]
+
+
+@dataclass(frozen=True)
+class TxFilter:
+    """Recorte de transações que uma seção do dashboard desenha e agrega.
+
+    `start`/`end` delimitam a janela lida do banco; os demais campos filtram
+    dentro dela (`None` = sem filtro). `cycles` guarda, por cartão, o ciclo de
+    fatura selecionado: `(account_id, início, fim)`.
+    """
+
+    start: date
+    end: date
+    owner: Optional[str] = None
+    account_ids: Optional[frozenset[int]] = None
+    account: Optional[str] = None
+    category: Optional[str] = None
+    ids: Optional[frozenset[int]] = None
+    cycles: Optional[tuple[tuple[int, date, date], ...]] = None
+
+
+# ----- leitura direta para Arrow -----
+
+def _require_arrow() -> None:
+    if pa is None:
+        raise RuntimeError("Leitura em Arrow requer o pacote `pyarrow` (pip install pyarrow).")
+
+
+def _arrow_schema() -> "pa.Schema":
+    """Tipos Arrow das colunas de `TX_COLUMNS` (rótulos como texto, data em ns)."""
+    fields = []
+    for name in TX_COLUMNS:
+        if name == "date":
+            fields.append((name, pa.timestamp("ns")))
+        else:
+            fields.append((name, pa.int64() if TX_DTYPES.get(name) == "int64" else pa.string()))
+    return pa.schema(fields)
+
+
+def _record_batch(rows, schema: "pa.Schema") -> "pa.RecordBatch":
+    """Linhas do cursor -> RecordBatch coluna a coluna, sem passar por pandas."""
+    columns = list(zip(*rows))
+    arrays = []
+    for i, field in enumerate(schema):
+        if field.name == "date":
+            arrays.append(pc.strptime(pa.array(columns[i], pa.string()), format="%Y-%m-%d", unit="ns"))
+        else:
+            arrays.append(pa.array(columns[i], field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def arrow_rows(q, batch_size: int = ARROW_BATCH_SIZE) -> "pa.Table":
+    """Linhas de um SELECT de `transactions_query` direto para Arrow, em lotes de `batch_size`."""
+    _require_arrow()
+    schema = _arrow_schema()
+    with get_read_session() as session:
+        result = session.connection().execution_options(yield_per=batch_size).execute(q)
+        batches = [_record_batch(rows, schema) for rows in result.partitions()]
+    return pa.Table.from_batches(batches, schema=schema)
+
+
+def _archived_rows(cold: "pa.Table") -> "pa.Table":
+    """Linhas cruas do Parquet -> colunas de `TX_COLUMNS`, com os nomes de conta e categoria (join no Arrow)."""
+    with get_read_session() as session:
+        conn = session.connection()
+        accounts = conn.execute(select(Account.id, TX_COLUMNS["account"], TX_COLUMNS["account_type"])).fetchall()
+        categories = conn.execute(
+            select(Category.id, TX_COLUMNS["category"], TX_COLUMNS["category_type"])
+        ).fetchall()
+
+    def names(rows, key: str, cols: list[str]) -> "pa.Table":
+        ids, *values = zip(*rows) if rows else ((), *([()] * len(cols)))
+        return pa.table({key: pa.array(ids, pa.int64()), **{c: pa.array(v, pa.string()) for c, v in zip(cols, values)}})
+
+    table = (
+        cold.join(names(accounts, "account_id", ["account", "account_type"]), "account_id", join_type="inner")
+        .join(names(categories, "category_id", ["category", "category_type"]), "category_id", join_type="inner")
+    )
+    table = table.set_column(
+        table.schema.get_field_index("date"), "date", table["date"].cast(pa.timestamp("ns"))
+    ).set_column(
+        table.schema.get_field_index("card_label"), "card_label", pc.fill_null(table["card_label"], "")
+    )
+    return table.select(list(TX_COLUMNS)).cast(_arrow_schema())
+
+
+def arrow_transactions(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    owner: Optional[str] = None,
+    account_id: Optional[int] = None,
+) -> "pa.Table":
+    """Mesmas linhas e colunas de `list_transactions` (rótulos como texto), lidas direto para Arrow.
+
+    O SQLite sai do cursor em RecordBatches; os meses arquivados entram pelo
+    scan das partições (`read_archive`), sem passar por pandas.
+    """
+    table = arrow_rows(transactions_query(start=start, end=end, owner=owner, account_id=account_id))
+    cold = read_archive(start, end, owner=owner, account_id=account_id)
+    if cold is None or cold.num_rows == 0:
+        return table
+    table = pa.concat_tables([table, _archived_rows(cold)])
+    return table.sort_by([("date", "descending"), ("id", "descending")])
+
+
+def arrow_unlinked_installments() -> "pa.Table":
+    """`list_unlinked_installments` lido direto para Arrow."""
+    return arrow_rows(unlinked_installments_query())
+
+
+# ----- pandas -----
+
+def period_totals(tx: pd.DataFrame) -> tuple[int, int]:
+    """`(entradas, saídas)` do período, em centavos (saídas negativas)."""
+    amount = tx["amount"]
+    return int(amount[amount > 0].sum()), int(amount[amount < 0].sum())
+
+
+def category_expenses(df: pd.DataFrame, value_col: str = "amount") -> pd.DataFrame:
+    """Gasto (positivo) por categoria, sem transferências; maiores gastos primeiro.
+
+    Também serve às linhas do rollup mensal (`value_col="expense"`), nos dois motores.
+    """
+    out = (
+        df[(df[value_col] < 0) & (df["category_type"] != "transfer")]
+        .groupby("category", as_index=False, observed=True)[value_col]
+        .sum()
+        .rename(columns={value_col: "amount"})
+    )
+    out["category"] = out["category"].astype(str)
+    out = out.sort_values(["amount", "category"], kind="stable").reset_index(drop=True)
+    out["amount"] = out["amount"].abs()
+    return out
+
+
+def card_totals(df: pd.DataFrame) -> pd.DataFrame:
+    """Fatura (despesas, positiva) por cartão: colunas `cartão` e `fatura`, em ordem alfabética."""
+    out = (
+        df[df["amount"] < 0]
+        .groupby("account", as_index=False, observed=True)["amount"]
+        .sum()
+        .rename(columns={"account": "cartão"})
+    )
+    out["cartão"] = out["cartão"].astype(str)
+    out["fatura"] = out["amount"].abs()
+    return out[["cartão", "fatura"]].sort_values("cartão").reset_index(drop=True)
+
+
+def active_installments(tx_df: pd.DataFrame, as_of: date) -> pd.DataFrame:
+    """Última parcela "(n/N)" de cada compra até `as_of`, com as parcelas que faltam.
+
+    Compras são agrupadas por descrição-base, conta, categoria, dono e valor;
+    o quadro sai vazio (sem colunas) quando não há parcelamento ativo.
+    """
+    if tx_df.empty:
+        return pd.DataFrame()
+
+    # "(n/N)" no fim da descrição, extraído de uma vez para a coluna inteira.
+    desc = tx_df["description"].astype(str)
+    parts = desc.str.strip().str.extract(INSTALLMENT_RE)
+    found = parts[0].notna()
+    if not found.any():
+        return pd.DataFrame()
+
+    df = pd.DataFrame(
+        {
+            "date":                tx_df.loc[found, "date"],
+            "account":             tx_df.loc[found, "account"].astype(str),
+            "category":            tx_df.loc[found, "category"].astype(str),
+            "owner":               tx_df.loc[found, "owner"].astype(str),
+            "amount":              tx_df.loc[found, "amount"].abs(),
+            "base_description":    desc[found].str.replace(INSTALLMENT_RE, "", regex=True).str.strip(),
+            "current_installment": parts.loc[found, 0].astype(int),
+            "total_installments":  parts.loc[found, 1].astype(int),
+        }
+    ).reset_index(drop=True)
+
+    # importante: considerar apenas o que já "chegou" até `as_of`
+    df = df[df["date"] <= pd.Timestamp(as_of)]
+    if df.empty:
+        return pd.DataFrame()
+
+    grp_cols = ["base_description", "account", "category", "owner", "amount"]
+    df = df.sort_values(["base_description", "current_installment", "date"])
+    latest = df.groupby(grp_cols, as_index=False, observed=True).tail(1)
+
+    latest["remaining_installments"] = (
+        latest["total_installments"] - latest["current_installment"]
+    ).clip(lower=0)
+
+    # mantém só parcelamentos ainda ativos
+    latest = latest[latest["remaining_installments"] > 0]
+    if latest.empty:
+        return pd.DataFrame()
+
+    latest["next_installment"]  = latest["current_installment"] + 1
+    latest["future_commitment"] = latest["amount"] * latest["remaining_installments"]
+    # DateOffset ajusta para o fim do mês como `add_months` (31/01 -> 28/02).
+    latest["next_due_date"]     = (latest["date"] + pd.DateOffset(months=1)).dt.date
+
+    return latest[INSTALLMENT_COLUMNS].sort_values(["next_due_date", "base_description"]).reset_index(drop=True)
+
+
+class PandasBackend:
+    """Recortes das janelas pandas do `DataContext` (`ctx.transactions`)."""
+
+    name = "pandas"
+
+    def __init__(self, ctx) -> None:
+        self.ctx = ctx
+
+    def prefetch(self, start: date, end: date) -> None:
+        self.ctx.prefetch(start, end)
+
+    def rows(self, flt: TxFilter) -> pd.DataFrame:
+        """Linhas do recorte, como `list_transactions`."""
+        df = self.ctx.transactions(flt.start, flt.end, owner=flt.owner)
+        if df.empty:
+            return df
+        mask = pd.Series(True, index=df.index)
+        if flt.account_ids is not None:
+            mask &= df["account_id"].isin(flt.account_ids)
+        if flt.account is not None:
+            mask &= df["account"] == flt.account
+        if flt.category is not None:
+            mask &= df["category"] == flt.category
+        if flt.ids is not None:
+            mask &= df["id"].isin(flt.ids)
+        if flt.cycles is not None:
+            in_cycle = pd.Series(False, index=df.index)
+            for account_id, start, end in flt.cycles:
+                in_cycle |= (df["account_id"] == account_id) & df["date"].between(pd.Timestamp(start), pd.Timestamp(end))
+            mask &= in_cycle
+        return df if mask.all() else df[mask]
+
+    def period_totals(self, flt: TxFilter) -> tuple[int, int]:
+        return period_totals(self.rows(flt))
+
+    def category_expenses(self, flt: TxFilter) -> pd.DataFrame:
+        return category_expenses(self.rows(flt))
+
+    def card_totals(self, flt: TxFilter) -> pd.DataFrame:
+        return card_totals(self.rows(flt))
+
+    def active_installments(self, as_of: date) -> pd.DataFrame:
+        """Parcelas "(n/N)" sem plano ainda ativas em `as_of`."""
+        return active_installments(self.ctx.source.list_unlinked_installments(), as_of)
+
+
+# ----- Polars -----
+
+def _timestamp(d: date) -> datetime:
+    return datetime.combine(d, time.min)
+
+
+class PolarsBackend:
+    """Lazy frames do Polars sobre as janelas Arrow do `DataContext` (`ctx.arrow`)."""
+
+    name = "polars"
+
+    def __init__(self, ctx) -> None:
+        self.ctx = ctx
+
+    def prefetch(self, start: date, end: date) -> None:
+        self.ctx.arrow(start, end)
+
+    def _lazy(self, flt: TxFilter) -> "pl.LazyFrame":
+        date_col = pl.col("date")
+        expr = date_col.is_between(_timestamp(flt.start), _timestamp(flt.end))
+        if flt.owner and flt.owner != "todos":
+            expr &= pl.col("owner") == flt.owner
+        if flt.account_ids is not None:
+            expr &= pl.col("account_id").is_in(list(flt.account_ids))
+        if flt.account is not None:
+            expr &= pl.col("account") == flt.account
+        if flt.category is not None:
+            expr &= pl.col("category") == flt.category
+        if flt.ids is not None:
+            expr &= pl.col("id").is_in(list(flt.ids))
+        if flt.cycles is not None:
+            expr &= pl.any_horizontal(
+                [
+                    (pl.col("account_id") == account_id) & date_col.is_between(_timestamp(start), _timestamp(end))
+                    for account_id, start, end in flt.cycles
+                ]
+                or [pl.lit(False)]
+            )
+        return self._frame(self.ctx.arrow(flt.start, flt.end)).lazy().filter(expr)
+
+    def _frame(self, table: "pa.Table") -> "pl.DataFrame":
+        """Janela Arrow -> DataFrame do Polars, convertida uma vez por janela (memória do contexto)."""
+        kept, frame = self.ctx.memo(("polars", id(table)), lambda: (table, pl.from_arrow(table)))
+        return frame if kept is table else pl.from_arrow(table)
+
+    def rows(self, flt: TxFilter) -> pd.DataFrame:
+        """Linhas do recorte, como `list_transactions`: a única conversão das linhas para pandas."""
+        df = self._lazy(flt).collect().to_pandas()
+        df["date"] = df["date"].astype("datetime64[ns]")
+        return df.astype(TX_DTYPES)
+
+    def period_totals(self, flt: TxFilter) -> tuple[int, int]:
+        amount = pl.col("amount")
+        income, expense = (
+            self._lazy(flt)
+            .select(
+                amount.filter(amount > 0).sum().alias("income"),
+                amount.filter(amount < 0).sum().alias("expense"),
+            )
+            .collect()
+            .row(0)
+        )
+        return int(income), int(expense)
+
+    def category_expenses(self, flt: TxFilter) -> pd.DataFrame:
+        out = (
+            self._lazy(flt)
+            .filter((pl.col("amount") < 0) & (pl.col("category_type") != "transfer"))
+            .group_by("category")
+            .agg(pl.col("amount").sum())
+            .sort(["amount", "category"], maintain_order=True)
+            .with_columns(pl.col("amount").abs())
+            .collect()
+            .to_pandas()
+        )
+        return out.astype({"category": str})
+
+    def card_totals(self, flt: TxFilter) -> pd.DataFrame:
+        out = (
+            self._lazy(flt)
+            .filter(pl.col("amount") < 0)
+            .group_by(pl.col("account").alias("cartão"))
+            .agg(pl.col("amount").sum().abs().alias("fatura"))
+            .sort("cartão")
+            .collect()
+            .to_pandas()
+        )
+        return out.astype({"cartão": str})
+
+    def active_installments(self, as_of: date) -> pd.DataFrame:
+        """Parcelas "(n/N)" sem plano ainda ativas em `as_of`, lidas direto para Arrow."""
+        pattern = INSTALLMENT_RE.pattern
+        desc = pl.col("description").str.strip_chars()
+        grp_cols = ["base_description", "account", "category", "owner", "amount"]
+        out = (
+            pl.from_arrow(self.ctx.source.arrow_unlinked_installments())
+            .lazy()
+            .with_columns(
+                current_installment=desc.str.extract(pattern, 1).cast(pl.Int64),
+                total_installments=desc.str.extract(pattern, 2).cast(pl.Int64),
+            )
+            .filter(pl.col("current_installment").is_not_null() & (pl.col("date") <= _timestamp(as_of)))
+            .with_columns(
+                amount=pl.col("amount").abs(),
+                base_description=pl.col("description").str.replace(pattern, "").str.strip_chars(),
+            )
+            .sort(["base_description", "current_installment", "date"], maintain_order=True)
+            # `_row` guarda a posição da última parcela, para desempatar a ordem
+            # final exatamente como o `tail(1)` + `sort_values` do pandas.
+            .with_row_index("_row")
+            .group_by(grp_cols)
+            .last()
+            .with_columns(
+                remaining_installments=(pl.col("total_installments") - pl.col("current_installment")).clip(lower_bound=0)
+            )
+            .filter(pl.col("remaining_installments") > 0)
+            .with_columns(
+                next_installment=pl.col("current_installment") + 1,
+                future_commitment=pl.col("amount") * pl.col("remaining_installments"),
+                next_due_date=pl.col("date").dt.offset_by("1mo").dt.date(),
+            )
+            .sort(["next_due_date", "base_description", "_row"])
+            .select(INSTALLMENT_COLUMNS)
+            .collect()
+        )
+        if out.is_empty():
+            return pd.DataFrame()
+
+        df = out.to_pandas().astype({c: str for c in _LABELS})
+        df["date"] = df["date"].astype("datetime64[ns]")
+        df["next_due_date"] = df["next_due_date"].dt.date
+        return df
+
+
+# ----- escolha do motor -----
+
+BACKENDS = {"pandas": PandasBackend, "polars": PolarsBackend}
+
+
+@lru_cache(maxsize=None)
+def backend_name(name: Optional[str] = None) -> str:
+    """Motor configurado (ou `name`); "polars" sem os pacotes instalados cai para pandas."""
+    name = name or os.environ.get("FINDASH_ANALYTICS_BACKEND", ANALYTICS_BACKEND)
+    if name not in BACKENDS:
+        raise ValueError(f"Motor de análise desconhecido: {name!r} (use {', '.join(BACKENDS)}).")
+    if name == "polars" and (pl is None or pa is None):
+        logger.warning("Polars/pyarrow não instalados; usando o motor pandas.")
+        return "pandas"
+    return name
+
+
+def get_backend(ctx, name: Optional[str] = None):
+    """Motor de análise ligado às janelas de `ctx` (um `DataContext`)."""
+    return BACKENDS[backend_name(name)](ctx)
+
@@ -0,0 +1,516 @@
+"""Arquivo frio: meses antigos de transações em Parquet, fora do SQLite.
+
+Meses encerrados há mais de `ARCHIVE_HORIZON_MONTHS` quase nunca mudam, mas
+pesam em toda leitura do histórico. `archive_months` move as transações desses
+meses para um Parquet por mês (`ARCHIVE_DIR/AAAA-MM.parquet`, com as linhas
+cruas de `"transaction"`) e as apaga do SQLite; `unarchive_month` faz o caminho
+de volta, para correções.
+
+- O rollup mensal e o razão diário não mudam: continuam com a contribuição dos
+  meses arquivados. `--rebuild`/`--check` desses agregados leem o arquivo junto,
+  já somado por dia no Arrow (`daily_totals`).
+- As leituras do histórico (`list_transactions`, `iter_transactions`,
+  `search_transactions`, o motor DuckDB de `src.services.olap`) unem as
+  partições cujo mês cai no intervalo pedido: a poda é pelo nome do arquivo e,
+  dentro dele, por data/dono/conta. A busca textual filtra a descrição no
+  próprio scan (`search_archive`) e para de ler partições ao atingir o limite.
+- O editor (paginação e edição) vê só o SQLite; editar ou apagar uma transação
+  arquivada é `ValueError` (`archived_month_of` diz o mês): desarquive o mês. Transações novas com data num mês arquivado
+  entram no SQLite e aparecem junto nas leituras; arquivar de novo as junta ao
+  Parquet do mês.
+- Os arquivos só trocam depois do commit do SQLite; uma troca interrompida
+  deixa um `.tmp`/`.restore` que `recover_pending` (no `init_db()`) conclui ou
+  desfaz.
+
+Requer `pyarrow` (opcional no resto do app). Sem arquivos em `ARCHIVE_DIR`, as
+leituras seguem só pelo SQLite, sem custo extra.
+
+Uso pela linha de comando:
+    python -m src.services.archive --list
+    python -m src.services.archive --archive [--horizon 24]
+    python -m src.services.archive --unarchive 2023-04
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import re
+from contextlib import contextmanager
+from datetime import date
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Sequence
+
+from sqlalchemy import bindparam, text
+
+from src.config import ARCHIVE_HORIZON_MONTHS
+from src.db import ARCHIVE_DIR, bump_data_version, engine
+from src.services.search import arrow_patterns, text_mask
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # dependência opcional: só o arquivo frio precisa dela
+    pa = pc = ds = pq = None
+
+logger = logging.getLogger("findash.archive")
+
+ARCHIVE_HORIZON = int(os.environ.get("FINDASH_ARCHIVE_HORIZON_MONTHS", ARCHIVE_HORIZON_MONTHS))
+
+# Colunas de `"transaction"` guardadas no Parquet: a linha inteira, para o
+# desarquivamento devolvê-la como estava. Datas de auditoria ficam como o texto do SQLite.
+ARCHIVE_COLUMNS = {
+    "id":                  "int64",
+    "date":                "date32",
+    "amount":              "int64",
+    "description":         "string",
+    "account_id":          "int64",
+    "category_id":         "int64",
+    "owner":               "string",
+    "paid_by":             "string",
+    "split_mode":          "string",
+    "card_label":          "string",
+    "installment_plan_id": "int64",
+    "installment_number":  "int64",
+    "transfer_group":      "string",
+    "import_hash":         "string",
+    "created_at":          "string",
+    "updated_at":          "string",
+}
+
+# Colunas que o rollup e o razão agregam e os totais diários que saem delas (`daily_totals`).
+AGGREGATE_COLUMNS = ["account_id", "category_id", "owner", "date", "amount"]
+TOTALS_COLUMNS = ["account_id", "category_id", "owner", "date", "income", "expense", "count"]
+
+_MONTH_RE = re.compile(r"\d{4}-\d{2}")
+
+_COLUMNS_SQL = ", ".join(ARCHIVE_COLUMNS)
+_SELECT_MONTH = text(
+    f'SELECT {_COLUMNS_SQL} FROM "transaction" WHERE date >= :first AND date < :stop ORDER BY date, id'
+)
+_DELETE_MONTH = text('DELETE FROM "transaction" WHERE date >= :first AND date < :stop')
+_TAKEN_IDS = text('SELECT id FROM "transaction" WHERE id IN :ids').bindparams(bindparam("ids", expanding=True))
+_INSERT_ROW = text(
+    f'INSERT INTO "transaction" ({_COLUMNS_SQL}) VALUES ({", ".join(":" + c for c in ARCHIVE_COLUMNS)})'
+)
+
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise RuntimeError("O arquivo de transações requer o pacote `pyarrow` (pip install pyarrow).")
+
+
+def _schema() -> "pa.Schema":
+    return pa.schema([(name, getattr(pa, dtype)()) for name, dtype in ARCHIVE_COLUMNS.items()])
+
+
+def _month(d: date) -> str:
+    return f"{d.year:04d}-{d.month:02d}"
+
+
+def month_bounds(month: str) -> tuple[date, date]:
+    """`"AAAA-MM"` -> (primeiro dia do mês, primeiro dia do mês seguinte)."""
+    year, mon = int(month[:4]), int(month[5:7])
+    return date(year, mon, 1), date(year + mon // 12, mon % 12 + 1, 1)
+
+
+def archive_cutoff(today: date, horizon: int = ARCHIVE_HORIZON) -> date:
+    """Primeiro dia do mês mais antigo que fica no SQLite; os anteriores podem ser arquivados."""
+    months = today.year * 12 + today.month - 1 - horizon
+    return date(months // 12, months % 12 + 1, 1)
+
+
+def archive_path(month: str) -> Path:
+    return ARCHIVE_DIR / f"{month}.parquet"
+
+
+# ----- leitura -----
+
+def archived_months(start: Optional[date] = None, end: Optional[date] = None) -> list[str]:
+    """Meses arquivados (`"AAAA-MM"`, em ordem) que caem em `[start, end]`: a poda por partição."""
+    if not ARCHIVE_DIR.is_dir():
+        return []
+    months = sorted(p.stem for p in ARCHIVE_DIR.glob("*.parquet") if _MONTH_RE.fullmatch(p.stem))
+    lo, hi = start and _month(start), end and _month(end)
+    return [m for m in months if (lo is None or m >= lo) and (hi is None or m <= hi)]
+
+
+def _filter(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    owner: Optional[str] = None,
+    account_id: Optional[int] = None,
+    category_id: Optional[int] = None,
+) -> "pc.Expression":
+    """Filtros de `transactions_query` como expressão do Arrow (poda por estatísticas do Parquet)."""
+    expr = pc.scalar(True)
+    if start:
+        expr &= pc.field("date") >= start
+    if end:
+        expr &= pc.field("date") <= end
+    if owner and owner != "todos":
+        expr &= pc.field("owner") == owner
+    if account_id:
+        expr &= pc.field("account_id") == int(account_id)
+    if category_id:
+        expr &= pc.field("category_id") == int(category_id)
+    return expr
+
+
+def read_archive(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    owner: Optional[str] = None,
+    account_id: Optional[int] = None,
+    category_id: Optional[int] = None,
+    columns: Optional[Sequence[str]] = None,
+) -> Optional["pa.Table"]:
+    """Linhas arquivadas com os filtros de `transactions_query`; `None` se nenhuma partição cai no intervalo."""
+    months = archived_months(start, end)
+    if not months:
+        return None
+    _require_pyarrow()
+
+    expr = _filter(start, end, owner, account_id, category_id)
+    dataset = ds.dataset([str(archive_path(m)) for m in months], schema=_schema(), format="parquet")
+    return dataset.to_table(columns=list(columns) if columns else None, filter=expr)
+
+
+def search_archive(
+    query: str,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    owner: Optional[str] = None,
+    account_id: Optional[int] = None,
+    category_id: Optional[int] = None,
+    limit: Optional[int] = None,
+    columns: Optional[Sequence[str]] = None,
+) -> Optional["pa.Table"]:
+    """Linhas arquivadas cuja descrição casa com `query`, mais recentes primeiro, no máximo `limit`.
+
+    A busca roda no scan (`pc.match_substring_regex` com `arrow_patterns`),
+    junto dos filtros, e só as linhas que passam saem do Parquet; `text_mask`
+    confere o resultado, para o critério ser o mesmo do FTS. As partições de
+    `[start, end]` são lidas do mês mais novo ao mais antigo, e a leitura para
+    quando já há `limit` linhas. `None` se nenhuma partição cai no intervalo.
+    """
+    months = archived_months(start, end)
+    if not months:
+        return None
+    _require_pyarrow()
+
+    out = list(columns or ARCHIVE_COLUMNS)
+    read = list(dict.fromkeys([*out, "id", "date", "description"]))
+    expr = _filter(start, end, owner, account_id, category_id)
+    for pattern in arrow_patterns(query):
+        expr &= pc.match_substring_regex(pc.field("description"), pattern)
+
+    # Sem limite não há por que parar cedo: um scan só, sobre todas as partições.
+    batches = [months[::-1]] if limit is None else [[m] for m in reversed(months)]
+    found: list[pa.Table] = []
+    remaining = limit
+    for batch in batches:
+        if remaining is not None and remaining <= 0:
+            break
+        paths = [str(archive_path(m)) for m in batch]
+        table = ds.dataset(paths, schema=_schema(), format="parquet").to_table(columns=read, filter=expr)
+        if table.num_rows == 0:
+            continue
+        keep = text_mask(table["description"].to_pandas(), query)
+        table = table.filter(pa.array(keep.to_numpy())).sort_by([("date", "descending"), ("id", "descending")])
+        if remaining is not None:
+            table = table.slice(0, remaining)
+            remaining -= table.num_rows
+        found.append(table.select(out))
+    return pa.concat_tables(found) if found else _schema().empty_table().select(out)
+
+
+def archived_hashes(hashes: Sequence[str], dates: Iterable[date]) -> set[str]:
+    """Quais `import_hash` já estão arquivados, lendo só as partições dos meses de `dates`."""
+    months = {_month(d) for d in dates}
+    paths = [str(archive_path(m)) for m in sorted(months) if archive_path(m).exists()]
+    if not paths or not hashes:
+        return set()
+    _require_pyarrow()
+
+    dataset = ds.dataset(paths, schema=_schema(), format="parquet")
+    table = dataset.to_table(columns=["import_hash"], filter=pc.field("import_hash").isin(list(hashes)))
+    return set(table["import_hash"].to_pylist())
+
+
+def archived_month_of(t_id: int) -> Optional[str]:
+    """Mês (`"AAAA-MM"`) da partição que guarda a transação `t_id`; `None` se não está arquivada."""
+    months = archived_months()
+    if not months:
+        return None
+    _require_pyarrow()
+
+    dataset = ds.dataset([str(archive_path(m)) for m in months], schema=_schema(), format="parquet")
+    table = dataset.to_table(columns=["date"], filter=pc.field("id") == int(t_id))
+    return _month(table["date"][0].as_py()) if table.num_rows else None
+
+
+def archived_totals() -> Optional["pa.Table"]:
+    """Totais das transações arquivadas por (conta, categoria, dono, dia), agregados no Arrow.
+
+    Colunas de `TOTALS_COLUMNS`; `None` sem arquivo. Só as colunas de
+    `AGGREGATE_COLUMNS` são lidas das partições.
+    """
+    table = read_archive(columns=AGGREGATE_COLUMNS)
+    if table is None or table.num_rows == 0:
+        return None
+
+    amount, zero = table["amount"], pa.scalar(0, pa.int64())
+    table = table.append_column("income", pc.if_else(pc.greater(amount, zero), amount, zero))
+    table = table.append_column("expense", pc.if_else(pc.less(amount, zero), amount, zero))
+    totals = table.group_by(["account_id", "category_id", "owner", "date"]).aggregate(
+        [("income", "sum"), ("expense", "sum"), ("amount", "count")]
+    )
+    return totals.rename_columns(
+        {"income_sum": "income", "expense_sum": "expense", "amount_count": "count"}
+    ).select(TOTALS_COLUMNS)
+
+
+@contextmanager
+def daily_totals(conn) -> Iterator[str]:
+    """Relação SQL com os totais por (conta, categoria, dono, dia) das transações do SQLite + arquivadas.
+
+    Colunas de `TOTALS_COLUMNS` (`income`/`expense` em centavos e `count`),
+    que o rollup e o razão somam de novo. Sem arquivo é uma linha por
+    transação do SQLite. Com arquivo, os totais frios (`archived_totals`, bem
+    menos linhas que as transações) vão para uma tabela temporária da
+    conexão, descartada na saída.
+    """
+    hot = (
+        "SELECT account_id, category_id, owner, date, "
+        "CASE WHEN amount > 0 THEN amount ELSE 0 END AS income, "
+        "CASE WHEN amount < 0 THEN amount ELSE 0 END AS expense, "
+        '1 AS count FROM "transaction"'
+    )
+    totals = archived_totals()
+    if totals is None:
+        yield f"({hot})"
+        return
+
+    cols = ", ".join(TOTALS_COLUMNS)
+    rows = totals.to_pylist()
+    for row in rows:
+        row["date"] = row["date"].isoformat()
+
+    # Uma sobra de chamada anterior na mesma conexão do pool (o DROP final some
+    # junto com o rollback de uma conexão só de leitura).
+    conn.execute(text("DROP TABLE IF EXISTS temp.archived_totals"))
+    conn.execute(
+        text(
+            "CREATE TEMP TABLE archived_totals (account_id INTEGER, category_id INTEGER, owner VARCHAR, "
+            "date DATE, income INTEGER, expense INTEGER, count INTEGER)"
+        )
+    )
+    try:
+        conn.execute(text(f"INSERT INTO temp.archived_totals ({cols}) VALUES (:{', :'.join(TOTALS_COLUMNS)})"), rows)
+        yield f"({hot} UNION ALL SELECT {cols} FROM temp.archived_totals)"
+    finally:
+        conn.execute(text("DROP TABLE temp.archived_totals"))
+
+
+# ----- arquivar / desarquivar -----
+
+def _arrow_rows(rows) -> "pa.Table":
+    """Linhas cruas do SQLite -> tabela com o esquema do arquivo."""
+    schema = _schema()
+    columns = list(zip(*rows)) or [()] * len(schema)
+    arrays = []
+    for values, field in zip(columns, schema):
+        if field.name == "date":
+            arrays.append(pc.strptime(pa.array(values, pa.string()), format="%Y-%m-%d", unit="s").cast(pa.date32()))
+        else:
+            arrays.append(pa.array(values, field.type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def archive_month(month: str) -> int:
+    """Move as transações do mês para `ARCHIVE_DIR/AAAA-MM.parquet`. Retorna quantas saíram do SQLite.
+
+    Se o mês já tem partição (linhas que entraram depois do arquivamento), as
+    novas são juntadas a ela. O Parquet é gravado em `AAAA-MM.parquet.tmp`
+    antes do DELETE e só substitui a partição depois do commit: se o SQLite
+    voltar atrás, o temporário é apagado e a partição antiga fica como estava.
+    Se o processo cair entre o commit e a troca, o `.tmp` fica para
+    `recover_pending` concluir.
+    """
+    _require_pyarrow()
+    first, stop = month_bounds(month)
+    bounds = {"first": first.isoformat(), "stop": stop.isoformat()}
+    path = archive_path(month)
+    tmp = path.with_name(path.name + ".tmp")
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    try:
+        with engine.begin() as conn:
+            table = _arrow_rows(conn.execute(_SELECT_MONTH, bounds).fetchall())
+            moved = table.num_rows
+            if moved == 0:
+                return 0
+            if path.exists():
+                table = pa.concat_tables([pq.read_table(path, schema=_schema()), table])
+                table = table.sort_by([("date", "ascending"), ("id", "ascending")])
+
+            pq.write_table(table, tmp)
+            conn.execute(_DELETE_MONTH, bounds)
+            bump_data_version(conn)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+    os.replace(tmp, path)
+    return moved
+
+
+def archive_months(before: date) -> dict[str, int]:
+    """Arquiva todos os meses com transações antes de `before` (ver `archive_cutoff`). Retorna `{mês: linhas}`."""
+    with engine.connect() as conn:
+        months = conn.execute(
+            text('SELECT DISTINCT strftime(\'%Y-%m\', date) FROM "transaction" WHERE date < :before ORDER BY 1'),
+            {"before": before.isoformat()},
+        ).scalars().all()
+
+    return {month: archive_month(month) for month in months}
+
+
+def unarchive_month(month: str) -> int:
+    """Devolve ao SQLite as transações arquivadas do mês e apaga a partição. Retorna quantas voltaram.
+
+    Rollup e razão já contam essas linhas, então nada é reaplicado. Se o `id`
+    de alguma já foi reaproveitado por uma transação nova, ela volta com outro.
+    """
+    path = archive_path(month)
+    if not path.exists():
+        raise ValueError(f"O mês {month} não está arquivado.")
+    _require_pyarrow()
+
+    rows = pq.read_table(path, schema=_schema()).to_pylist()
+    for row in rows:
+        row["date"] = row["date"].isoformat()
+
+    held = path.with_name(path.name + ".restore")
+    try:
+        with engine.begin() as conn:
+            ids = [row["id"] for row in rows]
+            taken: set[int] = set()
+            # Fatias abaixo do limite de variáveis do SQLite.
+            for i in range(0, len(ids), 900):
+                taken.update(conn.execute(_TAKEN_IDS, {"ids": ids[i : i + 900]}).scalars())
+            for row in rows:
+                if row["id"] in taken:
+                    row["id"] = None
+            conn.execute(_INSERT_ROW, rows)
+            bump_data_version(conn)
+            os.replace(path, held)
+    except BaseException:
+        if held.exists():
+            os.replace(held, path)
+        raise
+
+    held.unlink()
+    return len(rows)
+
+
+def _in_sqlite(conn, month: str, rows: "pa.Table") -> bool:
+    """As linhas (uma basta: a escrita é atômica) estão no SQLite?
+
+    Compara data, valor, descrição e `created_at`, não o `id`: o
+    desarquivamento troca os ids já reaproveitados.
+    """
+    if rows.num_rows == 0:
+        return False
+    first, stop = month_bounds(month)
+    row = rows.select(["amount", "description", "created_at"]).slice(0, 1).to_pylist()[0]
+    found = conn.execute(
+        text(
+            'SELECT 1 FROM "transaction" WHERE date >= :first AND date < :stop '
+            "AND amount = :amount AND description IS :description AND created_at IS :created_at LIMIT 1"
+        ),
+        {"first": first.isoformat(), "stop": stop.isoformat(), **row},
+    ).first()
+    return found is not None
+
+
+def recover_pending() -> list[str]:
+    """Conclui ou desfaz arquivamentos interrompidos entre o commit do SQLite e a troca dos arquivos.
+
+    - `AAAA-MM.parquet.tmp` (`archive_month`): se as linhas novas já saíram do
+      SQLite, o commit aconteceu e o temporário vira a partição; senão é apagado.
+    - `AAAA-MM.parquet.restore` (`unarchive_month`): se as linhas já voltaram
+      ao SQLite, a partição guardada é apagada; senão volta para o lugar.
+
+    Roda no `init_db()`. Retorna os meses tocados.
+    """
+    if not ARCHIVE_DIR.is_dir():
+        return []
+    pending = sorted(ARCHIVE_DIR.glob("*.parquet.tmp")) + sorted(ARCHIVE_DIR.glob("*.parquet.restore"))
+    if not pending:
+        return []
+    _require_pyarrow()
+
+    recovered = []
+    with engine.begin() as conn:
+        for held in pending:
+            month = held.name.split(".", 1)[0]
+            if not _MONTH_RE.fullmatch(month):
+                continue
+            path = archive_path(month)
+            rows = pq.read_table(held, schema=_schema())
+            if held.suffix == ".tmp":
+                if path.exists():
+                    # Só as linhas que saíram do SQLite nesta tentativa.
+                    old_ids = pq.read_table(path, columns=["id"])["id"]
+                    rows = rows.filter(pc.invert(pc.is_in(rows["id"], value_set=old_ids)))
+                if _in_sqlite(conn, month, rows):
+                    held.unlink()
+                else:
+                    os.replace(held, path)
+            elif _in_sqlite(conn, month, rows):
+                held.unlink()
+            else:
+                os.replace(held, path)
+            logger.warning("Arquivamento interrompido de %s recuperado (%s).", month, held.name)
+            recovered.append(month)
+        bump_data_version(conn)
+    return recovered
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Arquivo frio de transações (Parquet por mês).")
+    parser.add_argument("--list", action="store_true", help="lista os meses arquivados")
+    parser.add_argument("--archive", action="store_true", help="arquiva os meses além do horizonte")
+    parser.add_argument("--horizon", type=int, default=ARCHIVE_HORIZON, help="meses mantidos no SQLite")
+    parser.add_argument("--unarchive", metavar="AAAA-MM", help="devolve um mês ao SQLite")
+    args = parser.parse_args()
+
+    from src.db import init_db
+
+    init_db()
+    if args.unarchive:
+        if not _MONTH_RE.fullmatch(args.unarchive):
+            parser.error("--unarchive espera um mês no formato AAAA-MM")
+        print(f"{args.unarchive}: {unarchive_month(args.unarchive)} transações de volta ao SQLite.")
+
+    if args.archive:
+        cutoff = archive_cutoff(date.today(), args.horizon)
+        moved = archive_months(cutoff)
+        for month, n in moved.items():
+            print(f"{month}: {n} transações arquivadas.")
+        print(f"Meses arquivados antes de {cutoff:%Y-%m}: {len(moved)}.")
+
+    if args.list:
+        months = archived_months()
+        if not months:
+            print("Nenhum mês arquivado.")
+        for month in months:
+            print(f"{month}  {pq.ParquetFile(archive_path(month)).metadata.num_rows:>8} linhas")
+
+
+if __name__ == "__main__":
+    main()
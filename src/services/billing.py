@@ -0,0 +1,122 @@
+"""Ciclos de fatura dos cartões de crédito.
+
+Cada cartão tem seu dia de fechamento (`Account.closing_day`, última data de
+compra do ciclo) e de vencimento (`Account.due_day`). Um ciclo é identificado
+pela sua data de fechamento: com fechamento no dia 3, a fatura de março vai
+de 04/02 a 03/03. Meses curtos fecham no último dia (fechamento 31 -> 28/02).
+
+`assign_cycles` marca o ciclo de todas as transações de uma vez (um
+`numpy.searchsorted` por dia de fechamento distinto), então várias faturas de
+vários cartões saem de uma única leitura de `list_transactions`.
+"""
+from __future__ import annotations
+
+import calendar
+from datetime import date, timedelta
+from typing import Iterable, Mapping
+
+import numpy as np
+import pandas as pd
+
+from src.config import DEFAULT_CLOSING_DAY, DEFAULT_DUE_DAY
+from src.models import Account
+
+INVOICE_COLUMNS = ["account_id", "account", "cycle_start", "cycle_end", "due_date", "fatura"]
+
+
+def card_cycle(account: Account) -> tuple[int, int]:
+    """`(dia de fechamento, dia de vencimento)` do cartão, com os padrões do config."""
+    return account.closing_day or DEFAULT_CLOSING_DAY, account.due_day or DEFAULT_DUE_DAY
+
+
+def closing_date(year: int, month: int, closing_day: int) -> date:
+    """Fechamento do mês `year`/`month` (o mês pode vir fora de 1..12: é normalizado)."""
+    y, m = divmod(month - 1, 12)
+    year, month = year + y, m + 1
+    return date(year, month, min(closing_day, calendar.monthrange(year, month)[1]))
+
+
+def cycle_bounds(d: date, closing_day: int = DEFAULT_CLOSING_DAY) -> tuple[date, date]:
+    """Primeiro e último dia (fechamento) do ciclo que contém `d`."""
+    end = closing_date(d.year, d.month, closing_day)
+    if d > end:
+        end = closing_date(d.year, d.month + 1, closing_day)
+    start = closing_date(end.year, end.month - 1, closing_day) + timedelta(days=1)
+    return start, end
+
+
+def due_date(cycle_end: date, closing_day: int, due_day: int) -> date:
+    """Vencimento da fatura que fecha em `cycle_end` (no mês seguinte se o dia já passou)."""
+    month = cycle_end.month if due_day > closing_day else cycle_end.month + 1
+    return closing_date(cycle_end.year, month, due_day)
+
+
+def invoice_window(ref: date, months: int, closing_days: Iterable[int]) -> tuple[date, date]:
+    """Intervalo que cobre as `months` faturas até a que contém `ref`, em todos os cartões."""
+    starts, ends = [], []
+    for closing_day in set(closing_days) or {DEFAULT_CLOSING_DAY}:
+        _, end = cycle_bounds(ref, closing_day)
+        first_end = closing_date(end.year, end.month - (months - 1), closing_day)
+        starts.append(cycle_bounds(first_end, closing_day)[0])
+        ends.append(end)
+    return min(starts), max(ends)
+
+
+def _closings(first: np.datetime64, last: np.datetime64, closing_day: int) -> np.ndarray:
+    """Fechamentos (datetime64[D], ordenados) de todos os meses entre `first` e `last` + 1."""
+    months = np.arange(first.astype("datetime64[M]"), last.astype("datetime64[M]") + 2)
+    lengths = ((months + 1).astype("datetime64[D]") - months.astype("datetime64[D]")).astype(int)
+    return months.astype("datetime64[D]") + (np.minimum(closing_day, lengths) - 1)
+
+
+def assign_cycles(dates: pd.Series, account_ids: pd.Series, closing_days: Mapping[int, int]) -> pd.Series:
+    """Data de fechamento (datetime64) do ciclo de cada transação.
+
+    Contas fora de `closing_days` usam `DEFAULT_CLOSING_DAY`.
+    """
+    days = pd.to_datetime(dates).to_numpy("datetime64[D]")
+    per_row = account_ids.map(closing_days).fillna(DEFAULT_CLOSING_DAY).astype(int).to_numpy()
+    out = np.full(len(days), np.datetime64("NaT"), dtype="datetime64[D]")
+
+    for closing_day in np.unique(per_row):
+        mask = per_row == closing_day
+        sel = days[mask]
+        bounds = _closings(sel.min(), sel.max(), int(closing_day))
+        # Primeiro fechamento >= data da compra (o próprio dia do fechamento ainda entra).
+        out[mask] = bounds[np.searchsorted(bounds, sel, side="left")]
+
+    return pd.Series(out, index=dates.index, name="cycle")
+
+
+def invoices(tx_df: pd.DataFrame, cards: list[Account], cycles: pd.Series | None = None) -> pd.DataFrame:
+    """Uma linha por cartão e ciclo: período, vencimento e total das despesas (`fatura`).
+
+    `cycles` reaproveita um `assign_cycles` já calculado sobre `tx_df`.
+    """
+    by_id = {a.id: a for a in cards}
+    if tx_df.empty or not by_id:
+        return pd.DataFrame(columns=INVOICE_COLUMNS)
+
+    if cycles is None:
+        cycles = assign_cycles(tx_df["date"], tx_df["account_id"], {i: card_cycle(a)[0] for i, a in by_id.items()})
+
+    mask = tx_df["account_id"].isin(by_id.keys()) & (tx_df["amount"] < 0)
+    if not mask.any():
+        return pd.DataFrame(columns=INVOICE_COLUMNS)
+
+    out = (
+        pd.DataFrame({"account_id": tx_df.loc[mask, "account_id"], "cycle": cycles[mask], "amount": tx_df.loc[mask, "amount"]})
+        .groupby(["account_id", "cycle"], as_index=False)["amount"]
+        .sum()
+    )
+    out["fatura"] = out["amount"].abs()
+    out["cycle_end"] = out["cycle"].dt.date
+    out["account"] = out["account_id"].map(lambda i: by_id[i].name)
+
+    # Poucas linhas (cartões x meses): datas do ciclo calculadas uma a uma.
+    closing = out["account_id"].map(lambda i: card_cycle(by_id[i])[0])
+    due = out["account_id"].map(lambda i: card_cycle(by_id[i])[1])
+    out["cycle_start"] = [cycle_bounds(end, c)[0] for end, c in zip(out["cycle_end"], closing)]
+    out["due_date"] = [due_date(end, c, d) for end, c, d in zip(out["cycle_end"], closing, due)]
+
+    return out[INVOICE_COLUMNS].sort_values(["cycle_end", "account"]).reset_index(drop=True)
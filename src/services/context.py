@@ -0,0 +1,182 @@
+"""Contexto de dados de uma execução (rerun) do app.
+
+Cada página recebe o mesmo `DataContext`: contas, categorias, saldos e janelas
+de transações são lidos do banco uma única vez por rerun, e os quadros
+derivados ficam memorizados no próprio objeto. Com o motor de análise Polars
+(`ctx.analytics`, ver `src.services.analytics`) as janelas são lidas direto
+para Arrow (`arrow`) em vez de pandas.
+
+Um rerun só de fragmento reaproveita o contexto do último rerun completo:
+`sync` recebe a versão dos dados fixada pelo rerun e descarta o que foi lido
+numa versão anterior. A memória e as janelas são LRU com teto
+(`MEMO_MAX_ENTRIES`, `WINDOWS_MAX`), já que um fragmento pode navegar por
+muitos períodos sem nenhum rerun completo no meio.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from datetime import date
+from functools import cached_property
+from types import ModuleType, SimpleNamespace
+from typing import Any, Callable
+
+import pandas as pd
+
+from src.models import Account, Category
+from src.services import analytics
+from src.services.accounts import list_accounts
+from src.services.billing import card_cycle
+from src.services.categories import list_categories
+from src.services.dashboards import balances_by_account
+from src.services.installments import list_unlinked_installments
+from src.services.rollups import monthly_rollup
+from src.services.transactions import list_transactions
+
+# Leituras usadas pelo contexto; `source` pode trocá-las (ex: `src.cache`).
+SERVICES = SimpleNamespace(
+    list_accounts=list_accounts,
+    list_categories=list_categories,
+    list_transactions=list_transactions,
+    balances_by_account=balances_by_account,
+    monthly_rollup=monthly_rollup,
+    list_unlinked_installments=list_unlinked_installments,
+    arrow_transactions=analytics.arrow_transactions,
+    arrow_unlinked_installments=analytics.arrow_unlinked_installments,
+)
+
+MEMO_MAX_ENTRIES = 32
+WINDOWS_MAX = 4
+_CACHED_PROPERTIES = ("accounts", "categories", "credit_ids", "closing_days", "analytics")
+
+
+class DataContext:
+    def __init__(self, today: date, source: ModuleType | SimpleNamespace = SERVICES):
+        self.today = today
+        self.source = source
+        self.version: int | None = None
+        self._memo: OrderedDict[tuple, Any] = OrderedDict()
+        # Janelas já carregadas (todos os donos): [(start, end, df)]; None = sem limite.
+        self._windows: list[tuple[date | None, date | None, pd.DataFrame]] = []
+        # O mesmo, lidas direto para Arrow (motor Polars).
+        self._arrow_windows: list[tuple[date | None, date | None, Any]] = []
+
+    def sync(self, version: int) -> None:
+        """Descarta cadastros, janelas e quadros lidos numa versão dos dados diferente de `version`."""
+        if self.version is not None and version != self.version:
+            self._memo.clear()
+            self._windows.clear()
+            self._arrow_windows.clear()
+            for name in _CACHED_PROPERTIES:
+                self.__dict__.pop(name, None)
+        self.version = version
+
+    # ----- cadastros -----
+
+    @cached_property
+    def accounts(self) -> list[Account]:
+        return self.source.list_accounts()
+
+    @cached_property
+    def categories(self) -> list[Category]:
+        return self.source.list_categories()
+
+    @cached_property
+    def credit_ids(self) -> set[int]:
+        return {a.id for a in self.accounts if a.type.value == "credit"}
+
+    @cached_property
+    def closing_days(self) -> dict[int, int]:
+        """Dia de fechamento de cada cartão (`card_cycle`)."""
+        return {a.id: card_cycle(a)[0] for a in self.accounts if a.id in self.credit_ids}
+
+    @cached_property
+    def analytics(self):
+        """Motor de análise configurado (`ANALYTICS_BACKEND`), sobre as janelas deste contexto."""
+        return analytics.get_backend(self)
+
+    # ----- transações -----
+
+    def prefetch(self, start: date | None, end: date | None) -> None:
+        """Carrega de uma vez uma janela que cobre as consultas seguintes do rerun."""
+        if self.analytics.name == "polars":
+            self.arrow(start, end)
+        elif self._covering_window(start, end) is None:
+            df = self.source.list_transactions(start=start, end=end, owner="todos")
+            self._windows.append((start, end, df))
+            del self._windows[:-WINDOWS_MAX]
+
+    def transactions(
+        self,
+        start: date | None = None,
+        end: date | None = None,
+        owner: str | None = None,
+    ) -> pd.DataFrame:
+        """Mesmo contrato de `list_transactions`, servido das janelas já carregadas."""
+        key = ("transactions", start, end, owner)
+        if key in self._memo:
+            self._memo.move_to_end(key)
+            return self._memo[key]
+
+        self.prefetch(start, end)
+        w_start, w_end, df = self._covering_window(start, end)
+
+        if not df.empty:
+            mask = pd.Series(True, index=df.index)
+            if start and start != w_start:
+                mask &= df["date"] >= pd.Timestamp(start)
+            if end and end != w_end:
+                mask &= df["date"] <= pd.Timestamp(end)
+            if owner and owner != "todos":
+                mask &= df["owner"] == owner
+            if not mask.all():
+                df = df[mask]
+
+        self._remember(key, df)
+        return df
+
+    def arrow(self, start: date | None, end: date | None):
+        """Janela (todos os donos) que cobre `[start, end]`, como tabela Arrow (`arrow_transactions`)."""
+        window = self._covering_window(start, end, self._arrow_windows)
+        if window is not None:
+            return window[2]
+        table = self.source.arrow_transactions(start=start, end=end, owner="todos")
+        self._arrow_windows.append((start, end, table))
+        del self._arrow_windows[:-WINDOWS_MAX]
+        return table
+
+    def _covering_window(self, start: date | None, end: date | None, windows: list | None = None):
+        windows = self._windows if windows is None else windows
+        for i, (w_start, w_end, df) in enumerate(windows):
+            starts_before = w_start is None or (start is not None and w_start <= start)
+            ends_after = w_end is None or (end is not None and w_end >= end)
+            if starts_before and ends_after:
+                windows.append(windows.pop(i))
+                return w_start, w_end, df
+        return None
+
+    # ----- agregados -----
+
+    def balances(self, include_credit: bool = True, as_of: date | None = None) -> pd.DataFrame:
+        return self.memo(
+            ("balances", include_credit, as_of),
+            lambda: self.source.balances_by_account(include_credit, as_of),
+        )
+
+    def rollup(self, start: date, end: date, owner: str | None = None) -> pd.DataFrame:
+        return self.memo(
+            ("rollup", start, end, owner),
+            lambda: self.source.monthly_rollup(start, end, owner=owner),
+        )
+
+    def memo(self, key: tuple, build: Callable[[], Any]) -> Any:
+        """Memoriza um quadro derivado pelo restante do rerun (e pelos reruns de fragmento na mesma versão)."""
+        if key in self._memo:
+            self._memo.move_to_end(key)
+            return self._memo[key]
+        return self._remember(key, build())
+
+    def _remember(self, key: tuple, value: Any) -> Any:
+        self._memo[key] = value
+        if len(self._memo) > MEMO_MAX_ENTRIES:
+            self._memo.popitem(last=False)
+        return value
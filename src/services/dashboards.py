@@ -2,41 +2,46 @@ from __future__ import annotations
 
 import pandas as pd
 from datetime import date
+from sqlalchemy import String, type_coerce
+from sqlmodel import select
 
-from src.services.accounts import list_accounts
-from src.services.transactions import list_transactions
+from src.db import get_read_session
+from src.models import Account, AccountType
+from src.services.ledger import closing_subquery
 
 
-def balances_by_account(include_credit: bool = True, as_of: date | None = None) -> pd.DataFrame:
-    accs = list_accounts()
+def balances_query(include_credit: bool = True, as_of: date | None = None):
+    """Saldo por conta (centavos) em uma única consulta: `initial_balance` + fechamento do razão diário.
+
+    Cada conta faz uma busca indexada em `dailybalance` (último dia até `as_of`).
+    """
+    q = select(
+        Account.name.label("account"),
+        type_coerce(Account.type, String).label("type"),
+        (Account.initial_balance + closing_subquery(Account.id, as_of)).label("balance"),
+    )
 
-    # puxa todas transações e filtra por data se as_of foi passado
-    txs = list_transactions()
-    if not txs.empty and as_of is not None and "date" in txs.columns:
-        txs = txs[txs["date"] <= as_of]
+    if not include_credit:
+        q = q.where(Account.type != AccountType.credit)
 
-    out = []
-    for a in accs:
-        acc_type = a.type.value if hasattr(a.type, "value") else str(a.type)
+    return q.order_by(Account.name)
 
-        if not include_credit and acc_type == "credit":
-            continue
 
-        if txs.empty:
-            bal = float(a.initial_balance)
-        else:
-            bal = float(a.initial_balance + txs.loc[txs["account_id"] == a.id, "amount"].sum())
+def balances_by_account(include_credit: bool = True, as_of: date | None = None) -> pd.DataFrame:
+    with get_read_session() as session:
+        rows = session.connection().execute(balances_query(include_credit, as_of)).fetchall()
 
-        out.append({"account": a.name, "type": acc_type, "balance": bal})
+    if not rows:
+        return pd.DataFrame()
 
-    return pd.DataFrame(out).sort_values("account") if out else pd.DataFrame()
+    return pd.DataFrame.from_records(rows, columns=["account", "type", "balance"])
 
 
-def cash_total_balance(as_of: date | None = None) -> float:
+def cash_total_balance(as_of: date | None = None) -> int:
     df = balances_by_account(include_credit=False, as_of=as_of)
     if df.empty:
-        return 0.0
-    return float(df["balance"].sum())
+        return 0
+    return int(df["balance"].sum())
 
 
 def credit_outstanding_by_account(as_of: date | None = None) -> pd.DataFrame:
@@ -48,14 +53,14 @@ def credit_outstanding_by_account(as_of: date | None = None) -> pd.DataFrame:
     if credit_df.empty:
         return pd.DataFrame()
 
-    credit_df["em_aberto"] = credit_df["balance"].apply(lambda x: max(0.0, -float(x)))
-    credit_df["a_favor"] = credit_df["balance"].apply(lambda x: max(0.0, float(x)))
+    credit_df["em_aberto"] = (-credit_df["balance"]).clip(lower=0)
+    credit_df["a_favor"] = credit_df["balance"].clip(lower=0)
 
     return credit_df[["account", "em_aberto", "a_favor"]].sort_values("account")
 
 
-def total_credit_outstanding(as_of: date | None = None) -> float:
+def total_credit_outstanding(as_of: date | None = None) -> int:
     df = credit_outstanding_by_account(as_of=as_of)
     if df.empty:
-        return 0.0
-    return float(df["em_aberto"].sum())
+        return 0
+    return int(df["em_aberto"].sum())
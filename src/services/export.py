@@ -0,0 +1,174 @@
+"""Exportação das transações filtradas para CSV ou Parquet.
+
+Lê o banco em lotes de tamanho fixo (`iter_transactions`) e grava cada lote
+assim que chega, então a memória fica constante qualquer que seja o tamanho
+do histórico. O Parquet sai particionado por mês (`month=AAAA-MM/`), e o
+`pyarrow` só é exigido nesse formato. Os valores saem em reais (o banco
+guarda centavos; ver `src/money.py`).
+
+Uso pela linha de comando:
+    python -m src.services.export transacoes.csv --start 2024-01-01 --end 2024-12-31
+    python -m src.services.export export/ --format parquet --owner petrus
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import tempfile
+import zipfile
+from datetime import date
+from pathlib import Path
+from typing import IO, Callable, Optional, Union
+
+from src.money import to_reais
+from src.services.transactions import EXPORT_BATCH_SIZE, TX_COLUMNS, iter_transactions
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # dependência opcional: só o Parquet precisa dela
+    pa = pq = None
+
+
+def _parquet_schema():
+    types = {
+        "id": pa.int64(),
+        "date": pa.date32(),
+        "amount": pa.float64(),
+        "account_id": pa.int64(),
+        "category_id": pa.int64(),
+    }
+    return pa.schema([(name, types.get(name, pa.string())) for name in TX_COLUMNS])
+
+
+def _batches(*filters, batch_size: int):
+    """Lotes de `iter_transactions` com `amount` convertido para reais."""
+    for batch in iter_transactions(*filters, batch_size=batch_size):
+        batch["amount"] = to_reais(batch["amount"])
+        yield batch
+
+
+def export_csv(
+    dest: Union[str, Path, IO],
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    owner: Optional[str] = None,
+    account_id: Optional[int] = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> int:
+    """Grava as transações filtradas em CSV (caminho ou arquivo aberto). Retorna o nº de linhas."""
+    own = isinstance(dest, (str, Path))
+    fh = open(dest, "w", encoding="utf-8", newline="") if own else dest
+    total = 0
+    try:
+        for batch in _batches(start, end, owner, account_id, batch_size=batch_size):
+            batch.to_csv(fh, index=False, header=total == 0)
+            total += len(batch)
+        if total == 0:
+            fh.write(",".join(TX_COLUMNS) + "\n")
+    finally:
+        if own:
+            fh.close()
+    return total
+
+
+def export_parquet(
+    dest_dir: Union[str, Path],
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    owner: Optional[str] = None,
+    account_id: Optional[int] = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> int:
+    """Grava as transações em `dest_dir/month=AAAA-MM/part-0.parquet`. Retorna o nº de linhas."""
+    if pq is None:
+        raise RuntimeError("Exportar Parquet requer o pacote `pyarrow` (pip install pyarrow).")
+
+    dest_dir = Path(dest_dir)
+    schema = _parquet_schema()
+    writers: dict[str, "pq.ParquetWriter"] = {}
+    total = 0
+    try:
+        for batch in _batches(start, end, owner, account_id, batch_size=batch_size):
+            months = batch["date"].dt.strftime("%Y-%m")
+            for month, part in batch.groupby(months, sort=False):
+                writer = writers.get(month)
+                if writer is None:
+                    path = dest_dir / f"month={month}" / "part-0.parquet"
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    writer = writers[month] = pq.ParquetWriter(path, schema)
+                writer.write_table(pa.Table.from_pandas(part, schema=schema, preserve_index=False))
+            total += len(batch)
+            # O SELECT vem ordenado por data: meses que já passaram não voltam.
+            for month in [m for m in writers if m > months.iloc[-1]]:
+                writers.pop(month).close()
+    finally:
+        for writer in writers.values():
+            writer.close()
+    return total
+
+
+def _download_file(write: Callable[[IO[bytes]], None]) -> IO[bytes]:
+    """Roda `write` sobre um arquivo temporário em disco e o devolve no início, para o `st.download_button`.
+
+    O arquivo volta sem buffer (`io.RawIOBase`, um dos tipos que o Streamlit
+    aceita em `data`) e é apagado ao ser fechado; a escrita passa por um buffer.
+    """
+    raw = tempfile.TemporaryFile(buffering=0)
+    buf = io.BufferedWriter(raw)
+    write(buf)
+    buf.detach()
+    raw.seek(0)
+    return raw
+
+
+def parquet_zip(**filters) -> IO[bytes]:
+    """Exporta em Parquet particionado e devolve as partições num .zip em disco (download pela UI)."""
+
+    def write(out: IO[bytes]) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            export_parquet(tmp, **filters)
+            with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as zf:
+                for path in sorted(Path(tmp).rglob("*.parquet")):
+                    zf.write(path, path.relative_to(tmp).as_posix())
+
+    return _download_file(write)
+
+
+def csv_file(**filters) -> IO[bytes]:
+    """Exporta em CSV (UTF-8) para um arquivo temporário em disco (download pela UI)."""
+
+    def write(out: IO[bytes]) -> None:
+        text = io.TextIOWrapper(out, encoding="utf-8", newline="")
+        export_csv(text, **filters)
+        text.detach()
+
+    return _download_file(write)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Exporta transações para CSV ou Parquet.")
+    parser.add_argument("dest", help="arquivo CSV ou diretório do Parquet")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--start", type=date.fromisoformat)
+    parser.add_argument("--end", type=date.fromisoformat)
+    parser.add_argument("--owner", default="todos")
+    parser.add_argument("--account-id", type=int)
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    from src.db import init_db
+
+    init_db()
+    filters = dict(
+        start=args.start, end=args.end, owner=args.owner, account_id=args.account_id, batch_size=args.batch_size
+    )
+    if args.format == "csv":
+        n = export_csv(args.dest, **filters)
+    else:
+        n = export_parquet(args.dest, **filters)
+    print(f"{n} transações exportadas para {args.dest}")
+
+
+if __name__ == "__main__":
+    main()
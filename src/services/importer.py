@@ -0,0 +1,294 @@
+"""Importação de extratos CSV (banco e cartão de crédito).
+
+O arquivo é lido em blocos (`pd.read_csv(chunksize=...)`); cada bloco é
+mapeado para os campos de `Transaction`, filtrado contra os hashes já gravados
+e inserido num único commit. O `import_hash` (conta, data, valor, descrição e
+ocorrência no arquivo) tem índice único, então reimportar o mesmo extrato não
+duplica nada e duas compras idênticas no mesmo dia continuam distintas. Os
+hashes dos meses arquivados também contam (`archived_hashes`).
+
+Uso pela linha de comando:
+    python -m src.services.importer extrato.csv --account "Nubank"
+    python -m src.services.importer fatura.csv --account "Cartão" --negate --sep ";" --decimal ","
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+from typing import IO, Callable, Iterable, Optional, Union
+
+import pandas as pd
+from sqlmodel import select
+
+from src.db import bump_data_version, get_session
+from src.money import to_cents_series
+from src.models import Account, Category, Owner, Transaction
+from src.services.archive import archived_hashes
+from src.services.transactions import insert_transactions
+
+IMPORT_CHUNK_SIZE = 5_000
+
+# Nomes de coluna aceitos em cada campo (comparados sem acento e sem caixa).
+COLUMN_ALIASES: dict[str, list[str]] = {
+    "date": ["data", "date", "data lancamento", "data da compra", "dt"],
+    "amount": ["valor", "amount", "valor (r$)", "quantia"],
+    "description": ["descricao", "description", "historico", "lancamento", "estabelecimento", "title"],
+    "account": ["conta", "account"],
+    "category": ["categoria", "category"],
+    "owner": ["dono", "owner"],
+}
+
+REQUIRED_FIELDS = ("date", "amount", "description")
+
+
+@dataclass
+class ImportReport:
+    read: int = 0
+    inserted: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    plans: int = 0
+
+
+def _normalize(name: str) -> str:
+    text = unicodedata.normalize("NFKD", str(name)).encode("ascii", "ignore").decode()
+    return " ".join(text.lower().split())
+
+
+def resolve_columns(columns: Iterable[str], mapping: Optional[dict[str, str]] = None) -> dict[str, str]:
+    """Mapeia campo -> coluna do CSV: `mapping` explícito primeiro, depois os apelidos."""
+    mapping = dict(mapping or {})
+    by_norm = {_normalize(c): c for c in columns}
+
+    for field, aliases in COLUMN_ALIASES.items():
+        if field in mapping:
+            continue
+        found = next((by_norm[a] for a in aliases if a in by_norm), None)
+        if found is not None:
+            mapping[field] = found
+
+    missing = [f for f in REQUIRED_FIELDS if f not in mapping]
+    if missing:
+        raise ValueError(f"Colunas não encontradas no CSV: {', '.join(missing)}.")
+    return mapping
+
+
+def parse_amount(values: pd.Series, decimal: str = ".", thousands: Optional[str] = None) -> pd.Series:
+    """Texto -> reais (float), aceitando "R$", espaços e separadores regionais ("1.234,56")."""
+    text = values.fillna("").astype(str).str.replace(r"[R$\s]", "", regex=True)
+    if thousands:
+        text = text.str.replace(thousands, "", regex=False)
+    if decimal != ".":
+        text = text.str.replace(decimal, ".", regex=False)
+    return pd.to_numeric(text, errors="coerce")
+
+
+def _reais_series(amounts: pd.Series) -> pd.Series:
+    """Centavos -> texto em reais com duas casas ("-12.34"), sem passar por float."""
+    sign = amounts.lt(0).map({True: "-", False: ""})
+    whole = (amounts.abs() // 100).astype(str)
+    cents = (amounts.abs() % 100).astype(str).str.zfill(2)
+    return sign + whole + "." + cents
+
+
+def _lookup(session, model) -> dict[str, int]:
+    """Nome normalizado -> id, lido uma vez por importação."""
+    return {_normalize(name): id_ for id_, name in session.exec(select(model.id, model.name)).all()}
+
+
+def _chunk_rows(
+    chunk: pd.DataFrame,
+    cols: dict[str, str],
+    account_id: Optional[int],
+    category_id: Optional[int],
+    owner: str,
+    negate: bool,
+    decimal: str,
+    thousands: Optional[str],
+    dayfirst: bool,
+    accounts: dict[str, int],
+    categories: dict[str, int],
+    seen: Counter,
+) -> tuple[list[dict], int]:
+    """Converte um bloco do CSV em linhas de `insert_transactions`. Retorna (linhas, inválidas)."""
+    df = pd.DataFrame(
+        {
+            "date": pd.to_datetime(chunk[cols["date"]], dayfirst=dayfirst, errors="coerce").dt.date,
+            "amount": to_cents_series(parse_amount(chunk[cols["amount"]], decimal, thousands)),
+            "description": chunk[cols["description"]].fillna("").astype(str).str.strip(),
+        }
+    )
+    if negate:
+        df["amount"] = -df["amount"]
+
+    if "account" in cols:
+        df["account_id"] = chunk[cols["account"]].map(lambda v: accounts.get(_normalize(v))).fillna(account_id or 0)
+    else:
+        df["account_id"] = account_id or 0
+    if "category" in cols:
+        df["category_id"] = chunk[cols["category"]].map(lambda v: categories.get(_normalize(v))).fillna(category_id or 0)
+    else:
+        df["category_id"] = category_id or 0
+    if "owner" in cols:
+        owners = chunk[cols["owner"]].fillna("").astype(str).str.strip().str.lower()
+        df["owner"] = owners.where(owners.isin([o.value for o in Owner]), owner)
+    else:
+        df["owner"] = owner
+
+    valid = df["date"].notna() & df["amount"].notna() & (df["account_id"] > 0) & (df["category_id"] > 0)
+    df = df[valid].astype({"amount": "int64", "account_id": int, "category_id": int})
+
+    # Hash de "conta|data|valor em reais|descrição|ocorrência": o valor em reais
+    # no texto mantém os hashes de antes da troca para centavos. A chave sem a
+    # ocorrência termina na descrição, então duas chaves iguais são a mesma transação.
+    key = (
+        df["account_id"].astype(str) + "|" + df["date"].astype(str) + "|"
+        + _reais_series(df["amount"]) + "|" + df["description"]
+    )
+    # Ocorrência = vezes que a chave já apareceu em blocos anteriores + posição no bloco.
+    occurrence = key.map(seen).astype("int64") + key.groupby(key).cumcount() + 1
+    seen.update(key.value_counts().to_dict())
+
+    df["import_hash"] = (key + "|" + occurrence.astype(str)).map(lambda k: hashlib.sha1(k.encode()).hexdigest())
+    rows = df[["date", "amount", "description", "account_id", "category_id", "owner", "import_hash"]].to_dict("records")
+    return rows, int((~valid).sum())
+
+
+def _existing_hashes(session, hashes: list[str]) -> set[str]:
+    found: set[str] = set()
+    # Fatias abaixo do limite de variáveis do SQLite.
+    for i in range(0, len(hashes), 900):
+        part = hashes[i : i + 900]
+        found.update(session.exec(select(Transaction.import_hash).where(Transaction.import_hash.in_(part))).all())
+    return found
+
+
+def import_csv(
+    source: Union[str, IO],
+    account_id: Optional[int] = None,
+    category_id: Optional[int] = None,
+    owner: str = "petrus",
+    mapping: Optional[dict[str, str]] = None,
+    negate: bool = False,
+    sep: str = ",",
+    decimal: str = ".",
+    thousands: Optional[str] = None,
+    dayfirst: bool = True,
+    encoding: str = "utf-8",
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    link_plans: bool = True,
+    on_progress: Optional[Callable[[ImportReport], None]] = None,
+) -> ImportReport:
+    """Importa um extrato CSV em blocos, um commit por bloco.
+
+    `account_id`/`category_id` valem para as linhas sem coluna de conta/categoria
+    (ou com nome desconhecido). `negate` inverte o sinal (faturas de cartão que
+    trazem compras como valores positivos). Com `link_plans`, as parcelas
+    "(n/N)" importadas viram planos de parcelamento ao final.
+    """
+    report = ImportReport()
+    seen: Counter = Counter()
+
+    reader = pd.read_csv(
+        source,
+        sep=sep,
+        encoding=encoding,
+        dtype=str,
+        keep_default_na=False,
+        chunksize=chunk_size,
+    )
+
+    try:
+        with get_session() as session:
+            accounts = _lookup(session, Account)
+            categories = _lookup(session, Category)
+
+        cols: Optional[dict[str, str]] = None
+        for chunk in reader:
+            if cols is None:
+                cols = resolve_columns(chunk.columns, mapping)
+
+            rows, invalid = _chunk_rows(
+                chunk, cols, account_id, category_id, owner, negate, decimal, thousands, dayfirst,
+                accounts, categories, seen,
+            )
+            report.read += len(chunk)
+            report.invalid += invalid
+
+            with get_session() as session:
+                hashes = [r["import_hash"] for r in rows]
+                existing = _existing_hashes(session, hashes) | archived_hashes(hashes, [r["date"] for r in rows])
+                new_rows = [r for r in rows if r["import_hash"] not in existing]
+                insert_transactions(session, new_rows)
+                if new_rows:
+                    bump_data_version(session)
+                session.commit()
+
+            report.inserted += len(new_rows)
+            report.duplicates += len(rows) - len(new_rows)
+            if on_progress:
+                on_progress(report)
+
+        if link_plans and report.inserted:
+            from src.services.installments import link_installments
+
+            with get_session() as session:
+                report.plans = link_installments(session.connection())
+                bump_data_version(session)
+                session.commit()
+    finally:
+        reader.close()
+
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Importa um extrato CSV.")
+    parser.add_argument("path", help="arquivo CSV")
+    parser.add_argument("--account", help="conta padrão (nome)")
+    parser.add_argument("--category", default="Outros", help="categoria padrão (nome)")
+    parser.add_argument("--owner", default="petrus")
+    parser.add_argument("--negate", action="store_true", help="inverte o sinal dos valores")
+    parser.add_argument("--sep", default=",")
+    parser.add_argument("--decimal", default=".")
+    parser.add_argument("--thousands", default=None)
+    parser.add_argument("--encoding", default="utf-8")
+    args = parser.parse_args()
+
+    from src.db import init_db
+
+    init_db()
+    with get_session() as session:
+        accounts = _lookup(session, Account)
+        categories = _lookup(session, Category)
+
+    account_id = accounts.get(_normalize(args.account)) if args.account else None
+    category_id = categories.get(_normalize(args.category))
+    if args.account and account_id is None:
+        parser.error(f"conta não encontrada: {args.account}")
+    if category_id is None:
+        parser.error(f"categoria não encontrada: {args.category}")
+
+    report = import_csv(
+        args.path,
+        account_id=account_id,
+        category_id=category_id,
+        owner=args.owner,
+        negate=args.negate,
+        sep=args.sep,
+        decimal=args.decimal,
+        thousands=args.thousands,
+        encoding=args.encoding,
+        on_progress=lambda r: print(f"\r{r.read} linhas lidas, {r.inserted} novas", end="", flush=True),
+    )
+    print(
+        f"\nImportadas: {report.inserted} | duplicadas: {report.duplicates} | "
+        f"inválidas: {report.invalid} | planos: {report.plans}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""Planos de parcelamento.
+
+Cada compra parcelada vira um `InstallmentPlan`, e suas parcelas são
+transações com `installment_plan_id`/`installment_number`. O painel de
+parcelamentos ativos sai de uma consulta indexada sobre os planos, sem
+reinterpretar descrições.
+
+Transações antigas no formato "Descrição (n/N)" são convertidas em planos por
+`link_installments` (migração 004), que também pode ser rodado à mão:
+    python -m src.services.installments --link
+"""
+from __future__ import annotations
+
+import argparse
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Optional
+
+import pandas as pd
+from sqlalchemy import text
+
+from src.config import INSTALLMENT_RE
+from src.db import bump_data_version, engine, get_read_session, get_session
+from src.models import InstallmentPlan, Owner, Transaction
+from src.services.transactions import insert_transactions, transactions_query, tx_frame
+
+# A última parcela de cada plano até `as_of` sai de uma subconsulta correlacionada:
+# percorre os planos e desce `ix_transaction_plan` do maior número para o menor
+# até a primeira parcela dentro da data, em vez de varrer o histórico por data.
+# Só lê o SQLite: a última parcela até `as_of` de um plano ativo é recente, bem
+# dentro do horizonte do arquivo frio (`src.services.archive`).
+_ACTIVE_SQL = text(
+    "SELECT p.id AS plan_id, p.description AS base_description, "
+    "a.name AS account, c.name AS category, p.owner AS owner, "
+    "ABS(t.amount) AS amount, t.date AS date, "
+    "t.installment_number AS current_installment, p.total_installments "
+    "FROM installmentplan p "
+    'JOIN "transaction" t ON t.id = ('
+    '  SELECT last.id FROM "transaction" last '
+    "  WHERE last.installment_plan_id = p.id AND last.date <= :as_of "
+    "  ORDER BY last.installment_number DESC, last.id DESC LIMIT 1) "
+    "JOIN account a ON a.id = p.account_id "
+    "JOIN category c ON c.id = p.category_id "
+    "WHERE p.total_installments - t.installment_number > 0"
+)
+
+
+def active_installments_query(as_of: date):
+    """Consulta dos planos com parcelas restantes em `as_of`, com o parâmetro já ligado."""
+    return _ACTIVE_SQL.bindparams(as_of=as_of.isoformat())
+
+
+def create_installment_plan(
+    description: str,
+    amount: int,
+    total_installments: int,
+    dates: dict[int, date],
+    account_id: int,
+    category_id: int,
+    owner: str = "petrus",
+    paid_by: str = "petrus",
+    split_mode: str = "none",
+    card_label: Optional[str] = None,
+) -> int:
+    """Cria o plano e as parcelas `{número: data}` numa única transação do banco.
+
+    `amount` é o valor de cada parcela, em centavos.
+    """
+    base = description.strip()
+
+    with get_session() as session:
+        plan = InstallmentPlan(
+            description=base,
+            amount=int(amount),
+            total_installments=int(total_installments),
+            account_id=int(account_id),
+            category_id=int(category_id),
+            owner=Owner(owner),
+            first_date=min(dates.values()),
+        )
+        session.add(plan)
+        session.flush()
+
+        insert_transactions(
+            session,
+            [
+                {
+                    "date": dt,
+                    "amount": amount,
+                    "description": f"{base} ({n}/{total_installments})".strip(),
+                    "account_id": account_id,
+                    "category_id": category_id,
+                    "owner": owner,
+                    "paid_by": paid_by,
+                    "split_mode": split_mode,
+                    "card_label": card_label,
+                    "installment_plan_id": plan.id,
+                    "installment_number": n,
+                }
+                for n, dt in sorted(dates.items())
+            ],
+        )
+        bump_data_version(session)
+        session.commit()
+        return plan.id
+
+
+def list_active_installments(as_of: date) -> pd.DataFrame:
+    """Planos com parcelas restantes em `as_of` (mesmas colunas de `get_active_installments`)."""
+    with get_read_session() as session:
+        result = session.connection().execute(active_installments_query(as_of))
+        df = pd.DataFrame.from_records(result.fetchall(), columns=list(result.keys()))
+
+    if df.empty:
+        return pd.DataFrame()
+
+    df["date"] = pd.to_datetime(df["date"]).astype("datetime64[ns]")
+    df["remaining_installments"] = df["total_installments"] - df["current_installment"]
+    df["next_installment"] = df["current_installment"] + 1
+    df["future_commitment"] = df["amount"] * df["remaining_installments"]
+    df["next_due_date"] = (df["date"] + pd.DateOffset(months=1)).dt.date
+
+    return df.sort_values(["next_due_date", "base_description"]).reset_index(drop=True)
+
+
+def list_unlinked_installments() -> pd.DataFrame:
+    """Transações "(n/N)" ainda sem plano (ex: descrição editada à mão), no formato de `list_transactions`.
+
+    Só o SQLite: meses arquivados já passaram do horizonte de qualquer parcela ativa.
+    """
+    with get_read_session() as session:
+        rows = session.connection().execute(unlinked_installments_query()).fetchall()
+    return tx_frame(rows)
+
+
+def unlinked_installments_query():
+    """SELECT de `list_unlinked_installments` (também lido direto para Arrow em `src.services.analytics`)."""
+    return transactions_query().where(
+        Transaction.installment_plan_id.is_(None),
+        Transaction.description.like("%(%/%)%"),
+    )
+
+
+def link_installments(conn) -> int:
+    """Agrupa transações "(n/N)" sem plano em planos novos. Retorna quantos planos criou.
+
+    Parcelas com mesma descrição-base, conta, categoria, dono, valor e total
+    pertencem à mesma compra; se o número de uma parcela já existe no plano
+    aberto (duas compras iguais em paralelo), ela inicia outro plano.
+    """
+    rows = conn.execute(
+        text(
+            'SELECT id, date, description, amount, account_id, category_id, owner FROM "transaction" '
+            "WHERE installment_plan_id IS NULL AND description LIKE '%(%/%)%' ORDER BY date, id"
+        )
+    ).fetchall()
+
+    groups: dict[tuple, list[dict]] = defaultdict(list)
+    for tx_id, dt, description, amount, account_id, category_id, owner in rows:
+        m = INSTALLMENT_RE.search(description.strip())
+        if not m:
+            continue
+        number, total = int(m.group(1)), int(m.group(2))
+        base = INSTALLMENT_RE.sub("", description).strip()
+
+        plans = groups[(base, account_id, category_id, owner, amount, total)]
+        plan = next((p for p in plans if number not in p["numbers"] and max(p["numbers"]) < number), None)
+        if plan is None:
+            plan = {"numbers": set(), "tx": [], "first_date": dt}
+            plans.append(plan)
+        plan["numbers"].add(number)
+        plan["tx"].append((tx_id, number))
+
+    # Ids explícitos a partir do maior existente: planos e vínculos saem em
+    # dois executemany, em vez de um INSERT + UPDATE por plano.
+    next_id = conn.execute(text("SELECT COALESCE(MAX(id), 0) + 1 FROM installmentplan")).scalar()
+    created_at = datetime.utcnow().isoformat(sep=" ")
+    new_plans, links = [], []
+    for (base, account_id, category_id, owner, amount, total), plans in groups.items():
+        for plan in plans:
+            plan_id = next_id + len(new_plans)
+            new_plans.append(
+                {
+                    "id": plan_id,
+                    "description": base,
+                    "amount": amount,
+                    "total": total,
+                    "account_id": account_id,
+                    "category_id": category_id,
+                    "owner": owner,
+                    "first_date": plan["first_date"],
+                    "created_at": created_at,
+                }
+            )
+            links.extend({"plan_id": plan_id, "number": number, "id": tx_id} for tx_id, number in plan["tx"])
+
+    if new_plans:
+        conn.execute(
+            text(
+                "INSERT INTO installmentplan "
+                "(id, description, amount, total_installments, account_id, category_id, owner, first_date, created_at) "
+                "VALUES (:id, :description, :amount, :total, :account_id, :category_id, :owner, :first_date, :created_at)"
+            ),
+            new_plans,
+        )
+        conn.execute(
+            text(
+                'UPDATE "transaction" SET installment_plan_id = :plan_id, installment_number = :number '
+                "WHERE id = :id"
+            ),
+            links,
+        )
+
+    return len(new_plans)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Planos de parcelamento.")
+    parser.add_argument("--link", action="store_true", help='converte transações "(n/N)" sem plano')
+    args = parser.parse_args()
+
+    from src.db import init_db
+
+    init_db()
+    if args.link:
+        with engine.begin() as conn:
+            print(f"Planos criados: {link_installments(conn)}")
+            bump_data_version(conn)
+
+
+if __name__ == "__main__":
+    main()
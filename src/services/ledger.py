@@ -0,0 +1,201 @@
+"""Razão de saldos diários por conta.
+
+Cada linha guarda o saldo de fechamento de uma conta num dia com movimento.
+O saldo numa data qualquer é `initial_balance` + o `closing` da última linha
+até essa data: uma busca na chave primária `(account_id, date)`.
+
+Escritas (inclusive retroativas) ajustam os dias afetados e refazem os
+fechamentos seguintes na mesma transação do banco.
+
+Uso pela linha de comando:
+    python -m src.services.ledger --rebuild
+    python -m src.services.ledger --check
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Iterable
+
+import pandas as pd
+from sqlalchemy import func, text
+from sqlmodel import select
+
+from src.db import bump_data_version, engine, get_read_session
+from src.models import Account, DailyBalance
+from src.services.archive import daily_totals
+
+_OPEN_DAY = text(
+    "INSERT INTO dailybalance (account_id, date, delta, count, closing) "
+    "VALUES (:account_id, :date, 0, 0, COALESCE(("
+    "  SELECT closing FROM dailybalance "
+    "  WHERE account_id = :account_id AND date < :date "
+    "  ORDER BY date DESC LIMIT 1), 0)) "
+    "ON CONFLICT (account_id, date) DO NOTHING"
+)
+
+_BUMP_DAY = text(
+    "UPDATE dailybalance SET delta = delta + :delta, count = count + :count "
+    "WHERE account_id = :account_id AND date = :date"
+)
+
+# Refaz os fechamentos da conta a partir de `:start` com a soma acumulada dos
+# `delta` já ajustados: um único UPDATE por conta, qualquer que seja o número
+# de dias tocados no lote.
+_RECOMPUTE_CLOSINGS = text(
+    "UPDATE dailybalance AS b SET closing = r.closing FROM ("
+    "  SELECT date, COALESCE(("
+    "    SELECT closing FROM dailybalance "
+    "    WHERE account_id = :account_id AND date < :start "
+    "    ORDER BY date DESC LIMIT 1), 0) "
+    "    + SUM(delta) OVER (ORDER BY date) AS closing "
+    "  FROM dailybalance WHERE account_id = :account_id AND date >= :start"
+    ") AS r "
+    "WHERE b.account_id = :account_id AND b.date = r.date"
+)
+
+_PRUNE = text(
+    "DELETE FROM dailybalance WHERE account_id = :account_id AND date = :date AND count <= 0"
+)
+
+# Mesmo conteúdo do razão, calculado dos totais diários das transações (`{source}`, ver `daily_totals`).
+_LEDGER_SQL = (
+    "SELECT account_id, date, SUM(income + expense) AS delta, SUM(count) AS count, "
+    "SUM(SUM(income + expense)) OVER (PARTITION BY account_id ORDER BY date) AS closing "
+    "FROM {source} GROUP BY account_id, date"
+)
+
+
+def apply_to_ledger(session, entries: Iterable[tuple], sign: int = 1) -> None:
+    """Aplica entradas `(account_id, category_id, owner, date, amount)` ao razão, sem commit."""
+    deltas: dict[tuple, list] = defaultdict(lambda: [0, 0])
+    for account_id, _category_id, _owner, dt, amount in entries:
+        d = deltas[(int(account_id), dt.isoformat())]
+        d[0] += sign * int(amount)
+        d[1] += sign
+
+    if not deltas:
+        return
+
+    params = [
+        {"account_id": account_id, "date": dt, "delta": delta, "count": count}
+        for (account_id, dt), (delta, count) in deltas.items()
+    ]
+    starts: dict[int, str] = {}
+    for account_id, dt in deltas:
+        starts[account_id] = min(dt, starts.get(account_id, dt))
+
+    session.execute(_OPEN_DAY, params)
+    session.execute(_BUMP_DAY, params)
+    session.execute(
+        _RECOMPUTE_CLOSINGS,
+        [{"account_id": account_id, "start": start} for account_id, start in starts.items()],
+    )
+    if sign < 0:
+        session.execute(_PRUNE, params)
+
+
+def rebuild_ledger(conn) -> None:
+    """Recalcula o razão inteiro a partir das transações, arquivadas inclusive (conexão/sessão aberta)."""
+    conn.execute(text("DELETE FROM dailybalance"))
+    with daily_totals(conn) as source:
+        conn.execute(
+            text("INSERT INTO dailybalance (account_id, date, delta, count, closing) " + _LEDGER_SQL.format(source=source))
+        )
+
+
+def check_ledger() -> pd.DataFrame:
+    """Compara o razão com os dados brutos; retorna as linhas divergentes.
+
+    Em centavos a comparação é exata: qualquer diferença é divergência.
+    """
+    with engine.connect() as conn:
+        stored = pd.read_sql_query("SELECT * FROM dailybalance", conn)
+        with daily_totals(conn) as source:
+            fresh = pd.read_sql_query(_LEDGER_SQL.format(source=source), conn)
+
+    cmp = stored.merge(fresh, on=["account_id", "date"], how="outer", suffixes=("", "_raw"), indicator=True)
+    cmp = cmp.fillna({c: 0 for c in ["delta", "count", "closing", "delta_raw", "count_raw", "closing_raw"]})
+
+    bad = (
+        (cmp["_merge"] != "both")
+        | (cmp["closing"] != cmp["closing_raw"])
+        | (cmp["count"] != cmp["count_raw"])
+    )
+    return cmp[bad].drop(columns="_merge").reset_index(drop=True)
+
+
+def closing_subquery(account_id_col, as_of: date | None = None):
+    """Subconsulta escalar com o último `closing` da conta até `as_of` (0 se não houver)."""
+    q = select(DailyBalance.closing).where(DailyBalance.account_id == account_id_col)
+    if as_of is not None:
+        q = q.where(DailyBalance.date <= as_of)
+    return func.coalesce(q.order_by(DailyBalance.date.desc()).limit(1).scalar_subquery(), 0)
+
+
+def balance_on(account_id: int, as_of: date | None = None) -> int:
+    """Saldo da conta, em centavos, no fim do dia `as_of` (ou o atual, se `None`)."""
+    q = select(Account.initial_balance + closing_subquery(Account.id, as_of)).where(Account.id == account_id)
+    with get_read_session() as session:
+        value = session.connection().execute(q).scalar()
+    return int(value) if value is not None else 0
+
+
+def balance_history(account_id: int, start: date, end: date) -> pd.DataFrame:
+    """Saldo de fechamento (centavos) mês a mês entre `start` e `end` (colunas `month`, `balance`)."""
+    months = pd.period_range(start, end, freq="M")
+    if months.empty:
+        return pd.DataFrame(columns=["month", "balance"])
+
+    first_day, last_day = months[0].start_time.date(), months[-1].end_time.date()
+
+    with get_read_session() as session:
+        conn = session.connection()
+        initial, opening = conn.execute(
+            select(Account.initial_balance, closing_subquery(Account.id, first_day - timedelta(days=1)))
+            .where(Account.id == account_id)
+        ).one_or_none() or (0, 0)
+        # Última linha de cada mês (SQLite devolve a linha do MAX() nas colunas "soltas").
+        rows = conn.execute(
+            text(
+                "SELECT strftime('%Y-%m', date) AS month, closing, MAX(date) "
+                "FROM dailybalance WHERE account_id = :account_id AND date BETWEEN :start AND :end "
+                "GROUP BY month"
+            ),
+            {"account_id": account_id, "start": first_day.isoformat(), "end": last_day.isoformat()},
+        ).fetchall()
+
+    closings = pd.Series({m: c for m, c, _ in rows}, dtype="Int64")
+    out = pd.DataFrame({"month": [str(m) for m in months]})
+    out["balance"] = out["month"].map(closings + initial).ffill().fillna(initial + opening).astype("int64")
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Razão de saldos diários.")
+    parser.add_argument("--rebuild", action="store_true", help="recalcula do zero")
+    parser.add_argument("--check", action="store_true", help="compara com as transações")
+    args = parser.parse_args()
+
+    from src.db import init_db
+
+    init_db()
+    if args.rebuild:
+        with engine.begin() as conn:
+            rebuild_ledger(conn)
+            bump_data_version(conn)
+        print("Razão recalculado.")
+
+    if args.check:
+        diff = check_ledger()
+        if diff.empty:
+            print("Razão consistente.")
+        else:
+            print(diff.to_string())
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""Consultas analíticas do histórico: pivô mês x categoria, tendência mensal e saldos no tempo.
+
+Dois motores, escolhidos por `OLAP_ENGINE` (ou `FINDASH_OLAP_ENGINE`), que
+devolvem os mesmos quadros:
+
+- `"sqlite"` (padrão, o caminho do app): lê o rollup mensal e o razão diário,
+  já materializados por mês; o custo depende do número de meses, não de
+  transações.
+- `"duckdb"` (opcional, para consultas ad hoc e para conferir o rollup e o
+  razão): anexa o `finance.db` somente leitura pela extensão `sqlite` do
+  DuckDB e agrega direto de `"transaction"` (unido às partições Parquet dos
+  meses arquivados no intervalo, ver `src.services.archive`), sem depender
+  das tabelas derivadas. Varre as transações a cada consulta, então não é
+  mais rápido que o SQLite para o dashboard (`benchmarks/bench_olap.py`).
+  O pacote só é importado quando esse motor é pedido; sem ele, ou se o
+  ATTACH falhar (ex: extensão indisponível offline), volta para o SQLite.
+
+As escritas continuam só no SQLite, pelos serviços.
+
+Meses são `"AAAA-MM"` e o intervalo cobre os meses inteiros de `start` a `end`.
+"""
+from __future__ import annotations
+
+import logging
+import os
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Optional
+
+import pandas as pd
+
+from src.config import OLAP_ENGINE
+from src.db import DB_PATH
+from src.services.archive import archive_path, archived_months
+from src.services.accounts import list_accounts
+from src.services.ledger import balance_history
+from src.services.rollups import monthly_rollup
+
+logger = logging.getLogger("findash.olap")
+
+TREND_COLUMNS = ["month", "income", "expense", "net"]
+BALANCE_COLUMNS = ["month", "account", "balance"]
+
+# Colunas das transações que as consultas usam (SQLite e partições arquivadas).
+_TX_COLUMNS = "date, amount, account_id, category_id, owner"
+
+_EXPENSE_SQL = """
+SELECT strftime(t.date, '%Y-%m') AS month, c.name AS category, SUM(t.amount)::BIGINT AS expense
+FROM {tx} t
+JOIN fin.category c ON c.id = t.category_id
+WHERE t.amount < 0 AND c.type <> 'transfer'
+  AND t.date >= $first AND t.date < $stop {owner}
+GROUP BY ALL
+"""
+
+_TREND_SQL = """
+SELECT strftime(t.date, '%Y-%m') AS month,
+       SUM(CASE WHEN t.amount > 0 THEN t.amount ELSE 0 END)::BIGINT AS income,
+       SUM(CASE WHEN t.amount < 0 THEN t.amount ELSE 0 END)::BIGINT AS expense
+FROM {tx} t
+WHERE t.date >= $first AND t.date < $stop {owner}
+GROUP BY ALL
+ORDER BY month
+"""
+
+# Soma por (conta, mês) e acumulado por janela: cada mês do intervalo sai com o
+# saldo de fechamento, inclusive os meses sem movimento.
+_BALANCE_SQL = """
+WITH deltas AS (
+    SELECT account_id, date_trunc('month', date)::DATE AS m, SUM(amount) AS delta
+    FROM {tx}
+    WHERE date < $stop
+    GROUP BY ALL
+),
+opening AS (
+    SELECT account_id, SUM(delta) AS before FROM deltas WHERE m < $first GROUP BY ALL
+),
+grid AS (
+    SELECT a.id AS account_id, a.name AS account, a.initial_balance, g.m::DATE AS m
+    FROM fin.account a
+    CROSS JOIN range($first::TIMESTAMP, $stop::TIMESTAMP, INTERVAL 1 MONTH) g(m)
+    {credit}
+)
+SELECT strftime(grid.m, '%Y-%m') AS month, grid.account,
+       (grid.initial_balance + COALESCE(o.before, 0)
+        + SUM(COALESCE(d.delta, 0)) OVER (PARTITION BY grid.account_id ORDER BY grid.m))::BIGINT AS balance
+FROM grid
+LEFT JOIN deltas d ON d.account_id = grid.account_id AND d.m = grid.m
+LEFT JOIN opening o ON o.account_id = grid.account_id
+ORDER BY month, account
+"""
+
+
+def _bounds(start: date, end: date) -> dict[str, date]:
+    """Primeiro dia do mês de `start` e primeiro dia do mês seguinte a `end`."""
+    stop = date(end.year + end.month // 12, end.month % 12 + 1, 1)
+    return {"first": date(start.year, start.month, 1), "stop": stop}
+
+
+# ----- conexão DuckDB -----
+
+@lru_cache(maxsize=None)
+def _attached(path: str):
+    """Conexão DuckDB em memória com `path` anexado como `fin` (somente leitura); `None` se falhar."""
+    try:
+        import duckdb
+    except ImportError:  # dependência opcional
+        logger.warning("Pacote duckdb não instalado; usando o SQLite.")
+        return None
+    try:
+        con = duckdb.connect()
+        con.execute(f"ATTACH '{path}' AS fin (TYPE sqlite, READ_ONLY)")
+    except duckdb.Error as exc:
+        logger.warning("DuckDB não conseguiu anexar %s (%s); usando o SQLite.", path, exc)
+        return None
+    return con
+
+
+def _use_duckdb() -> bool:
+    """Motor `duckdb` pedido e disponível (o pacote só é importado aqui dentro)."""
+    return os.environ.get("FINDASH_OLAP_ENGINE", OLAP_ENGINE) == "duckdb" and _attached(str(DB_PATH)) is not None
+
+
+def duckdb_connection():
+    """Cursor DuckDB para a thread atual, ou `None` quando o motor é (ou caiu para) o SQLite."""
+    if not _use_duckdb():
+        return None
+    # Um cursor por chamada: a conexão base não é segura entre threads do Streamlit.
+    return _attached(str(DB_PATH)).cursor()
+
+
+def engine_name() -> str:
+    return "duckdb" if _use_duckdb() else "sqlite"
+
+
+def _query(con, sql: str, params: dict) -> pd.DataFrame:
+    try:
+        return con.execute(sql, params).df()
+    finally:
+        con.close()
+
+
+def _transactions(params: dict, since_first: bool = True) -> str:
+    """Relação das transações: `fin."transaction"` + as partições arquivadas até `$stop`.
+
+    Só entram os meses arquivados do intervalo (desde `$first`, ou todos os
+    anteriores quando `since_first=False`, para os saldos de abertura).
+    """
+    first = params["first"] if since_first else None
+    months = archived_months(first, params["stop"] - timedelta(days=1))
+    if not months:
+        return 'fin."transaction"'
+    params["archive"] = [str(archive_path(m)) for m in months]
+    return (
+        f'(SELECT {_TX_COLUMNS} FROM fin."transaction" '
+        f"UNION ALL SELECT {_TX_COLUMNS} FROM read_parquet($archive))"
+    )
+
+
+def _owner_filter(owner: Optional[str], params: dict) -> str:
+    if not owner or owner == "todos":
+        return ""
+    params["owner"] = owner
+    return "AND t.owner = $owner"
+
+
+# ----- consultas -----
+
+def category_pivot(start: date, end: date, owner: Optional[str] = None) -> pd.DataFrame:
+    """Gasto (positivo, centavos) por mês (linhas) e categoria (colunas), sem transferências."""
+    con = duckdb_connection()
+    if con is not None:
+        params = _bounds(start, end)
+        sql = _EXPENSE_SQL.format(tx=_transactions(params), owner=_owner_filter(owner, params))
+        long = _query(con, sql, params)
+    else:
+        rollup = monthly_rollup(start, end, owner=owner)
+        long = rollup[(rollup["expense"] < 0) & (rollup["category_type"] != "transfer")] if not rollup.empty else rollup
+
+    if long.empty:
+        return pd.DataFrame()
+    return (
+        long.pivot_table(index="month", columns="category", values="expense", aggfunc="sum", fill_value=0)
+        .abs()
+        .astype("int64")
+        .rename_axis(columns=None)
+    )
+
+
+def monthly_trend(start: date, end: date, owner: Optional[str] = None) -> pd.DataFrame:
+    """Entradas, saídas e resultado (`net`) por mês, em centavos; meses sem movimento não aparecem."""
+    con = duckdb_connection()
+    if con is not None:
+        params = _bounds(start, end)
+        sql = _TREND_SQL.format(tx=_transactions(params), owner=_owner_filter(owner, params))
+        df = _query(con, sql, params)
+    else:
+        rollup = monthly_rollup(start, end, owner=owner)
+        if rollup.empty:
+            return pd.DataFrame(columns=TREND_COLUMNS)
+        df = rollup.groupby("month", as_index=False)[["income", "expense"]].sum().sort_values("month")
+
+    df = df.astype({"income": "int64", "expense": "int64"})
+    df["net"] = df["income"] + df["expense"]
+    return df[TREND_COLUMNS].reset_index(drop=True)
+
+
+def balance_trend(start: date, end: date, include_credit: bool = True) -> pd.DataFrame:
+    """Saldo de fechamento (centavos) de cada conta em cada mês do intervalo (formato longo)."""
+    con = duckdb_connection()
+    if con is not None:
+        params = _bounds(start, end)
+        credit = "" if include_credit else "WHERE a.type <> 'credit'"
+        df = _query(con, _BALANCE_SQL.format(tx=_transactions(params, since_first=False), credit=credit), params)
+    else:
+        # Caminho do razão diário: uma leitura indexada por conta.
+        frames = [
+            balance_history(acc.id, start, end).assign(account=acc.name)
+            for acc in list_accounts()
+            if include_credit or acc.type.value != "credit"
+        ]
+        if not frames:
+            return pd.DataFrame(columns=BALANCE_COLUMNS)
+        df = pd.concat(frames, ignore_index=True).sort_values(["month", "account"])
+
+    return df.astype({"balance": "int64"})[BALANCE_COLUMNS].reset_index(drop=True)
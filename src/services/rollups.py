@@ -0,0 +1,170 @@
+"""Rollup mensal de transações por (conta, categoria, dono, mês).
+
+Os serviços de escrita chamam `apply_to_rollup` na mesma sessão em que gravam
+a transação, então a tabela nunca fica defasada em relação aos dados brutos.
+
+Uso pela linha de comando:
+    python -m src.services.rollups --rebuild   # recalcula do zero
+    python -m src.services.rollups --check     # compara com as transações
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from collections import defaultdict
+from datetime import date
+from typing import Iterable
+
+import pandas as pd
+from sqlalchemy import String, text, type_coerce
+from sqlmodel import select
+
+from src.db import bump_data_version, engine, get_read_session
+from src.models import Account, Category, MonthlyRollup, Owner
+from src.services.archive import daily_totals
+
+# (account_id, category_id, owner, date, amount em centavos)
+RollupEntry = tuple[int, int, str, date, int]
+
+ROLLUP_KEY = ["account_id", "category_id", "owner", "month"]
+
+_UPSERT = text(
+    "INSERT INTO monthlyrollup (account_id, category_id, owner, month, income, expense, count) "
+    "VALUES (:account_id, :category_id, :owner, :month, :income, :expense, :count) "
+    "ON CONFLICT (account_id, category_id, owner, month) DO UPDATE SET "
+    "income = income + excluded.income, "
+    "expense = expense + excluded.expense, "
+    "count = count + excluded.count"
+)
+
+_PRUNE = text(
+    "DELETE FROM monthlyrollup "
+    "WHERE account_id = :account_id AND category_id = :category_id "
+    "AND owner = :owner AND month = :month AND count <= 0"
+)
+
+# Mesma agregação do rollup, calculada dos totais diários das transações (`{source}`, ver `daily_totals`).
+_AGGREGATE_SQL = (
+    "SELECT account_id, category_id, owner, strftime('%Y-%m', date) AS month, "
+    "SUM(income) AS income, SUM(expense) AS expense, SUM(count) AS count "
+    "FROM {source} GROUP BY account_id, category_id, owner, month"
+)
+
+
+def month_key(d: date) -> str:
+    return f"{d.year:04d}-{d.month:02d}"
+
+
+def apply_to_rollup(session, entries: Iterable[RollupEntry], sign: int = 1) -> None:
+    """Soma (`sign=1`) ou subtrai (`sign=-1`) transações do rollup, sem commit."""
+    deltas: dict[tuple, list] = defaultdict(lambda: [0, 0, 0])
+    for account_id, category_id, owner, dt, amount in entries:
+        key = (int(account_id), int(category_id), Owner(owner).value, month_key(dt))
+        d = deltas[key]
+        if amount > 0:
+            d[0] += sign * int(amount)
+        elif amount < 0:
+            d[1] += sign * int(amount)
+        d[2] += sign
+
+    if not deltas:
+        return
+
+    params = [
+        dict(zip(ROLLUP_KEY, key), income=income, expense=expense, count=count)
+        for key, (income, expense, count) in deltas.items()
+    ]
+    session.execute(_UPSERT, params)
+    if sign < 0:
+        session.execute(_PRUNE, [{k: p[k] for k in ROLLUP_KEY} for p in params])
+
+
+def rebuild_rollup(conn) -> None:
+    """Recalcula a tabela inteira a partir das transações, arquivadas inclusive (conexão/sessão aberta)."""
+    conn.execute(text("DELETE FROM monthlyrollup"))
+    with daily_totals(conn) as source:
+        conn.execute(
+            text(
+                "INSERT INTO monthlyrollup (account_id, category_id, owner, month, income, expense, count) "
+                + _AGGREGATE_SQL.format(source=source)
+            )
+        )
+
+
+def check_rollup() -> pd.DataFrame:
+    """Compara o rollup com a agregação dos dados brutos.
+
+    Retorna as chaves divergentes (vazio quando está consistente). Em
+    centavos a comparação é exata.
+    """
+    with engine.connect() as conn:
+        stored = pd.read_sql_query("SELECT * FROM monthlyrollup", conn)
+        with daily_totals(conn) as source:
+            fresh = pd.read_sql_query(_AGGREGATE_SQL.format(source=source), conn)
+
+    cmp = stored.merge(fresh, on=ROLLUP_KEY, how="outer", suffixes=("", "_raw"), indicator=True)
+    cmp = cmp.fillna({c: 0 for c in ["income", "expense", "count", "income_raw", "expense_raw", "count_raw"]})
+
+    bad = (
+        (cmp["_merge"] != "both")
+        | (cmp["income"] != cmp["income_raw"])
+        | (cmp["expense"] != cmp["expense_raw"])
+        | (cmp["count"] != cmp["count_raw"])
+    )
+    return cmp[bad].drop(columns="_merge").reset_index(drop=True)
+
+
+def monthly_rollup(start: date, end: date, owner: str | None = None) -> pd.DataFrame:
+    """Linhas do rollup entre os meses de `start` e `end`, com nomes e tipos."""
+    q = (
+        select(
+            MonthlyRollup.month,
+            Account.name.label("account"),
+            MonthlyRollup.account_id,
+            type_coerce(Account.type, String).label("account_type"),
+            Category.name.label("category"),
+            Category.type.label("category_type"),
+            MonthlyRollup.category_id,
+            type_coerce(MonthlyRollup.owner, String).label("owner"),
+            MonthlyRollup.income,
+            MonthlyRollup.expense,
+            MonthlyRollup.count,
+        )
+        .join(Account, MonthlyRollup.account_id == Account.id)
+        .join(Category, MonthlyRollup.category_id == Category.id)
+        .where(MonthlyRollup.month >= month_key(start), MonthlyRollup.month <= month_key(end))
+    )
+    if owner and owner != "todos":
+        q = q.where(MonthlyRollup.owner == Owner(owner))
+
+    with get_read_session() as session:
+        result = session.connection().execute(q)
+        return pd.DataFrame.from_records(result.fetchall(), columns=list(result.keys()))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rollup mensal de transações.")
+    parser.add_argument("--rebuild", action="store_true", help="recalcula do zero")
+    parser.add_argument("--check", action="store_true", help="compara com as transações")
+    args = parser.parse_args()
+
+    from src.db import init_db
+
+    init_db()
+    if args.rebuild:
+        with engine.begin() as conn:
+            rebuild_rollup(conn)
+            bump_data_version(conn)
+        print("Rollup recalculado.")
+
+    if args.check:
+        diff = check_rollup()
+        if diff.empty:
+            print("Rollup consistente.")
+        else:
+            print(diff.to_string())
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Busca textual (FTS5) nas descrições das transações.
+
+`transaction_fts` é uma tabela FTS5 de conteúdo externo: guarda só o índice
+invertido e lê o texto de `"transaction".description` pelo `rowid` (= `id`).
+Triggers no `"transaction"` mantêm o índice em dia em qualquer escrita, venha
+ela dos serviços, da importação ou de SQL direto. Tabela e triggers são
+criados pela migração 008 (`src.migrations`).
+
+O tokenizador `unicode61` com `remove_diacritics 2` ignora maiúsculas e
+acentos: "farmacia" encontra "Farmácia", "ifood" encontra "IFOOD *SP".
+"""
+from __future__ import annotations
+
+import re
+import unicodedata
+from typing import Optional
+
+import pandas as pd
+from sqlalchemy import column, literal_column, table
+
+FTS_TABLE = "transaction_fts"
+
+fts = table(FTS_TABLE, column("rowid"), column("rank"))
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def fts_query(text: Optional[str]) -> Optional[str]:
+    """Texto livre -> consulta FTS5: cada palavra vira um prefixo e todas precisam aparecer.
+
+    `"uber vi"` -> `"uber"* "vi"*`. Aspas e operadores do usuário são ignorados,
+    então nenhuma entrada gera erro de sintaxe. `None` quando não sobra palavra.
+    """
+    words = _WORD_RE.findall(text or "")
+    if not words:
+        return None
+    return " ".join(f'"{w}"*' for w in words)
+
+
+def fts_match(query: str):
+    """Condição `transaction_fts MATCH :query` para usar num SELECT que junta `fts`."""
+    return literal_column(FTS_TABLE).op("MATCH")(query)
+
+
+def _fold(text: str) -> str:
+    """Minúsculas e sem acentos, como o `unicode61 remove_diacritics 2`."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+
+
+def text_mask(descriptions: pd.Series, text: Optional[str]) -> pd.Series:
+    """Mesmo critério de `fts_query` fora do FTS (ex: transações arquivadas).
+
+    Cada palavra de `text` precisa ser prefixo de alguma palavra da descrição.
+    """
+    words = _WORD_RE.findall(_fold(text or ""))
+    folded = descriptions.astype(str).map(_fold)
+    mask = pd.Series(bool(words), index=descriptions.index)
+    for word in words:
+        mask &= folded.str.contains(rf"(?<![^\W_]){re.escape(word)}", regex=True)
+    return mask
+
+
+def _variants() -> dict[str, str]:
+    """Letra base -> letras latinas acentuadas que `_fold` reduz a ela ("a" -> "áàâã...")."""
+    variants: dict[str, str] = {}
+    for code in (*range(0x00C0, 0x0250), *range(0x1E00, 0x1F00)):
+        ch = chr(code)
+        base = _fold(ch)
+        if len(base) == 1 and base != ch.casefold():
+            variants[base] = variants.get(base, "") + ch
+    return variants
+
+
+_VARIANTS = _variants()
+
+
+def arrow_patterns(text: Optional[str]) -> list[str]:
+    """Uma regex RE2 por palavra de `text`, para `pyarrow.compute.match_substring_regex`.
+
+    O Arrow não tem o `_fold`: maiúsculas ficam com o `(?i)` e os acentos com
+    classes como `[aáàâã...]`. O início de palavra fica de fora (custa mais que
+    o resto no RE2), então os padrões aceitam tudo o que `text_mask` aceita e
+    um pouco mais; quem filtra pelo Arrow confere as linhas que sobram com ele.
+    """
+    patterns = []
+    for word in _WORD_RE.findall(_fold(text or "")):
+        chars = "".join(f"[{ch}{_VARIANTS[ch]}]" if ch in _VARIANTS else re.escape(ch) for ch in word)
+        patterns.append(f"(?i){chars}")
+    return patterns
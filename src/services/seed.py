@@ -1,13 +1,13 @@
 from __future__ import annotations
 
 from sqlmodel import select
-from src.db import get_session
+from src.db import bump_data_version, get_session
 from src.models import Account, Category
 
 DEFAULT_ACCOUNTS = [
-    ("BB | PP",             "petrus", "checking",  0.0),
-    ("Santander | PP",      "petrus", "checking",  0.0),
-    ("Santander | Crédito", "petrus", "credit",    0.0),
+    ("BB | PP",             "petrus", "checking",  0),
+    ("Santander | PP",      "petrus", "checking",  0),
+    ("Santander | Crédito", "petrus", "credit",    0),
 ]
 
 # categorias exatamente como na planilha + "Ajuste de saldo"
@@ -39,4 +39,5 @@ def seed_defaults() -> None:
             for name, typ in DEFAULT_CATEGORIES:
                 session.add(Category(name=name, type=typ))
 
+        bump_data_version(session)
         session.commit()
@@ -1,18 +1,91 @@
+"""Leitura e escrita de transações.
+
+Valores monetários entram e saem em centavos (`int`, ver `src/money.py`).
+As leituras do histórico unem o SQLite às partições dos meses arquivados que
+caem no intervalo pedido (ver `src.services.archive`); as escritas e o editor
+paginado tocam só o SQLite.
+"""
 from __future__ import annotations
 
-from datetime import date, datetime
-from typing import Optional
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Iterator, Optional, Sequence
 
 import pandas as pd
+from sqlalchemy import String, func, insert, literal, tuple_, type_coerce
 from sqlmodel import select
 
-from src.db import get_session
+from src.db import bump_data_version, get_read_session, get_session
 from src.models import Transaction, Account, Category, Owner, Payer, SplitMode
+from src.services.archive import archived_month_of, archived_months, month_bounds, read_archive, search_archive
+from src.services.ledger import apply_to_ledger, balance_on
+from src.services.rollups import apply_to_rollup
+from src.services.search import fts, fts_match, fts_query
+
+
+def _tx_entry(tx: Transaction) -> tuple:
+    """Campos de uma transação que alimentam os agregados derivados."""
+    return (tx.account_id, tx.category_id, tx.owner, tx.date, tx.amount)
+
+
+def _apply_derived(session, entries: list[tuple], sign: int = 1) -> None:
+    """Propaga transações gravadas/removidas para os agregados (mesma transação do banco)."""
+    apply_to_rollup(session, entries, sign)
+    apply_to_ledger(session, entries, sign)
+
+
+def _tx_row(row: dict, now: datetime) -> dict:
+    """Normaliza um dicionário de entrada nos parâmetros do INSERT de `transaction`."""
+    return {
+        "date": row["date"],
+        "amount": int(row["amount"]),
+        "description": row.get("description", ""),
+        "account_id": int(row["account_id"]),
+        "category_id": int(row["category_id"]),
+        "owner": Owner(row.get("owner", "petrus")),
+        "paid_by": Payer(row.get("paid_by", "petrus")),
+        "split_mode": SplitMode(row.get("split_mode", "none")),
+        "card_label": row.get("card_label"),
+        "installment_plan_id": row.get("installment_plan_id"),
+        "installment_number": row.get("installment_number"),
+        "transfer_group": row.get("transfer_group"),
+        "import_hash": row.get("import_hash"),
+        # `insert()` não aplica o `default_factory` do modelo.
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def insert_transactions(session, rows: list[dict]) -> None:
+    """Insere as linhas com um único executemany e atualiza os agregados (sem commit).
+
+    Cada linha tem as chaves de `Transaction` (`date`, `amount` em centavos,
+    `account_id`, `category_id`, ...); as opcionais assumem o default do modelo.
+    """
+    if not rows:
+        return
+
+    now = datetime.utcnow()
+    params = [_tx_row(row, now) for row in rows]
+    session.execute(insert(Transaction), params)
+    _apply_derived(
+        session,
+        [(p["account_id"], p["category_id"], p["owner"], p["date"], p["amount"]) for p in params],
+    )
+
+
+def create_transactions_bulk(rows: list[dict]) -> int:
+    """Grava várias transações num único commit. Retorna quantas foram inseridas."""
+    with get_session() as session:
+        insert_transactions(session, rows)
+        bump_data_version(session)
+        session.commit()
+    return len(rows)
 
 
 def create_transaction(
     dt: date,
-    amount: float,
+    amount: int,
     description: str,
     account_id: int,
     category_id: int,
@@ -21,30 +94,79 @@ def create_transaction(
     split_mode: str = "none",
     card_label: Optional[str] = None,
 ) -> None:
-    with get_session() as session:
-        session.add(
-            Transaction(
-                date=dt,
-                amount=float(amount),
-                description=description,
-                account_id=int(account_id),
-                category_id=int(category_id),
-                owner=Owner(owner),
-                paid_by=Payer(paid_by),
-                split_mode=SplitMode(split_mode),
-                card_label=card_label,
-                updated_at=datetime.utcnow(),
-            )
+    create_transactions_bulk(
+        [
+            {
+                "date": dt,
+                "amount": amount,
+                "description": description,
+                "account_id": account_id,
+                "category_id": category_id,
+                "owner": owner,
+                "paid_by": paid_by,
+                "split_mode": split_mode,
+                "card_label": card_label,
+            }
+        ]
+    )
+
+
+def create_transfer(
+    dt: date,
+    amount: int,
+    description: str,
+    from_account_id: int,
+    to_account_id: int,
+    category_id: int,
+    owner: str = "petrus",
+    paid_by: str = "petrus",
+) -> str:
+    """Grava as duas pernas de uma transferência (origem -X, destino +X) no mesmo commit.
+
+    `amount` em centavos. As pernas compartilham `transfer_group`, retornado para referência.
+    """
+    value = abs(int(amount))
+    if value == 0:
+        raise ValueError("Valor da transferência precisa ser diferente de zero.")
+    if int(from_account_id) == int(to_account_id):
+        raise ValueError("Contas de origem e destino precisam ser diferentes.")
+
+    group = uuid.uuid4().hex
+    leg = {
+        "date": dt,
+        "description": description,
+        "category_id": category_id,
+        "owner": owner,
+        "paid_by": paid_by,
+        "transfer_group": group,
+    }
+    create_transactions_bulk(
+        [
+            {**leg, "amount": -value, "account_id": from_account_id},
+            {**leg, "amount": +value, "account_id": to_account_id},
+        ]
+    )
+    return group
+
+
+def _check_not_archived(t_id: int) -> None:
+    """Erro claro para uma transação que saiu do SQLite para o arquivo (somente leitura)."""
+    month = archived_month_of(t_id)
+    if month is not None:
+        raise ValueError(
+            f"Transação {t_id} arquivada; desarquive o mês {month} "
+            f"(python -m src.services.archive --unarchive {month}) para editá-la."
         )
-        session.commit()
 
 
 def update_transaction(t_id: int, **fields) -> None:
     with get_session() as session:
         tx = session.get(Transaction, t_id)
         if not tx:
+            _check_not_archived(t_id)
             return
 
+        _apply_derived(session, [_tx_entry(tx)], sign=-1)
         for k, v in fields.items():
             if k == "owner":
                 v = Owner(v)
@@ -56,6 +178,8 @@ def update_transaction(t_id: int, **fields) -> None:
 
         tx.updated_at = datetime.utcnow()
         session.add(tx)
+        _apply_derived(session, [_tx_entry(tx)])
+        bump_data_version(session)
         session.commit()
 
 
@@ -63,66 +187,351 @@ def delete_transaction(t_id: int) -> None:
     with get_session() as session:
         tx = session.get(Transaction, t_id)
         if not tx:
+            _check_not_archived(t_id)
             return
+        _apply_derived(session, [_tx_entry(tx)], sign=-1)
         session.delete(tx)
+        bump_data_version(session)
         session.commit()
 
 
+EXPORT_BATCH_SIZE = 10_000
+
+# Linhas por página do editor de transações (`list_transactions_page`).
+PAGE_SIZE = 50
+
+# Máximo de resultados de `search_transactions` (os mais relevantes primeiro).
+SEARCH_LIMIT = 200
+
+# Acima de tantas descrições casando, a busca ordena por data em vez de bm25.
+RANK_MAX_MATCHES = 20_000
+
+# Colunas aceitas como chave de ordenação da paginação; o `id` desempata.
+SORT_COLUMNS = {"date": Transaction.date, "amount": Transaction.amount}
+
+# Colunas do DataFrame de transações, na ordem de saída de `list_transactions`.
+# Enums e a data são lidos como texto puro (`type_coerce`), sem hidratar
+# objetos Python linha a linha; `tx_frame` converte cada coluna de uma vez.
+TX_COLUMNS = {
+    "id":            Transaction.id,
+    "date":          type_coerce(Transaction.date, String),
+    "amount":        Transaction.amount,
+    "description":   Transaction.description,
+    "account":       Account.name,
+    "account_id":    Account.id,
+    "account_type":  type_coerce(Account.type, String),
+    "category":      Category.name,
+    "category_type": Category.type,
+    "category_id":   Category.id,
+    "owner":         type_coerce(Transaction.owner, String),
+    "paid_by":       type_coerce(Transaction.paid_by, String),
+    "split_mode":    type_coerce(Transaction.split_mode, String),
+    "card_label":    func.coalesce(Transaction.card_label, ""),
+}
+
+# Tipos do DataFrame de transações. Rótulos com poucos valores distintos
+# (contas, categorias, donos) viram `category`: um código inteiro por linha
+# em vez de uma `str` Python. A data vem como datetime64[ns].
+TX_DTYPES = {
+    "id":            "int64",
+    "amount":        "int64",
+    "account":       "category",
+    "account_id":    "int64",
+    "account_type":  "category",
+    "category":      "category",
+    "category_type": "category",
+    "category_id":   "int64",
+    "owner":         "category",
+    "paid_by":       "category",
+    "split_mode":    "category",
+    "card_label":    "category",
+}
+
+
+def tx_frame(rows, extra: Sequence[str] = ()) -> pd.DataFrame:
+    """Linhas de `transactions_query` (+ colunas `extra`) -> DataFrame com os tipos de `TX_DTYPES`."""
+    df = pd.DataFrame.from_records(rows, columns=[*TX_COLUMNS, *extra])
+    df["date"] = pd.to_datetime(df["date"], format="%Y-%m-%d").astype("datetime64[ns]")
+    return df.astype(TX_DTYPES)
+
+
+def archived_frame(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    owner: Optional[str] = None,
+    account_id: Optional[int] = None,
+    category_id: Optional[int] = None,
+    search: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> Optional[pd.DataFrame]:
+    """Transações arquivadas no formato de `tx_frame`; `None` se nenhuma partição cai no intervalo.
+
+    Com `search`, só as que casam com a busca (`search_archive`), no máximo `limit`.
+    """
+    filters = dict(owner=owner, account_id=account_id, category_id=category_id)
+    if search:
+        table = search_archive(search, start, end, limit=limit, **filters)
+    else:
+        table = read_archive(start, end, **filters)
+    if table is None:
+        return None
+
+    with get_read_session() as session:
+        conn = session.connection()
+        accounts = conn.execute(select(Account.id, TX_COLUMNS["account"], TX_COLUMNS["account_type"])).fetchall()
+        categories = conn.execute(
+            select(Category.id, TX_COLUMNS["category"], TX_COLUMNS["category_type"])
+        ).fetchall()
+
+    df = (
+        table.to_pandas(date_as_object=False)
+        .merge(pd.DataFrame(accounts, columns=["account_id", "account", "account_type"]), on="account_id")
+        .merge(pd.DataFrame(categories, columns=["category_id", "category", "category_type"]), on="category_id")
+        .sort_values(["date", "id"], ascending=False, ignore_index=True)
+    )
+    df["date"] = df["date"].astype("datetime64[ns]")
+    df["card_label"] = df["card_label"].fillna("")
+    df["description"] = df["description"].astype("str")
+    return df[list(TX_COLUMNS)].astype(TX_DTYPES)
+
+
+def _with_archived(hot: pd.DataFrame, cold: Optional[pd.DataFrame]) -> pd.DataFrame:
+    """Une as linhas do SQLite às arquivadas, na ordem de `transactions_query` (data, id decrescentes)."""
+    if cold is None or cold.empty:
+        return hot
+    if hot.empty:
+        return cold
+    df = pd.concat([hot, cold], ignore_index=True).astype(TX_DTYPES)
+    return df.sort_values(["date", "id"], ascending=False, ignore_index=True)
+
+
+def transactions_query(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    owner: Optional[str] = None,
+    account_id: Optional[int] = None,
+    category_id: Optional[int] = None,
+    search: Optional[str] = None,
+):
+    """Monta o SELECT colunar (SQLAlchemy Core) usado por `list_transactions`.
+
+    `search` filtra pela busca textual da descrição (FTS5, ver `src.services.search`).
+    """
+    q = (
+        select(*(col.label(name) for name, col in TX_COLUMNS.items()))
+        .join_from(Transaction, Account, Transaction.account_id == Account.id)
+        .join(Category, Transaction.category_id == Category.id)
+    )
+
+    if start:
+        q = q.where(Transaction.date >= start)
+    if end:
+        q = q.where(Transaction.date <= end)
+    if owner and owner != "todos":
+        q = q.where(Transaction.owner == Owner(owner))
+    if account_id:
+        q = q.where(Transaction.account_id == account_id)
+    if category_id:
+        q = q.where(Transaction.category_id == category_id)
+    match = fts_query(search)
+    if match:
+        q = q.where(Transaction.id.in_(select(fts.c.rowid).where(fts_match(match))))
+
+    return q.order_by(Transaction.date.desc(), Transaction.id.desc())
+
+
 def list_transactions(
     start: Optional[date] = None,
     end: Optional[date] = None,
     owner: Optional[str] = None,
     account_id: Optional[int] = None,
 ) -> pd.DataFrame:
-    
-    with get_session() as session:
-        q = (
-            select(Transaction, Account, Category)
-            .join(Account, Transaction.account_id == Account.id)
-            .join(Category, Transaction.category_id == Category.id)
-        )
+    """Transações filtradas como DataFrame tipado (`tx_frame`), montado direto do cursor (sem ORM).
 
-        if start:
-            q = q.where(Transaction.date >= start)
-        if end:
-            q = q.where(Transaction.date <= end)
-        if owner and owner != "todos":
-            q = q.where(Transaction.owner == Owner(owner))
-        if account_id:
-            q = q.where(Transaction.account_id == account_id)
+    Meses arquivados no intervalo entram junto (`archived_frame`).
+    """
+    q = transactions_query(start=start, end=end, owner=owner, account_id=account_id)
 
-        rows = session.exec(q.order_by(Transaction.date.desc(), Transaction.id.desc())).all()
+    with get_read_session() as session:
+        rows = session.connection().execute(q).fetchall()
 
-    data = []
-    for tx, acc, cat in rows:
-        data.append(
-            {
-                "id": tx.id,
-                "date": tx.date,
-                "amount": tx.amount,
-                "description": tx.description,
-                "account": acc.name,
-                "account_id": acc.id,
-                "account_type": acc.type.value if hasattr(acc.type, "value") else str(acc.type),
-                "category": cat.name,
-                "category_type": cat.type,
-                "category_id": cat.id,
-                "owner": tx.owner.value if hasattr(tx.owner, "value") else str(tx.owner),
-                "paid_by": tx.paid_by.value if hasattr(tx.paid_by, "value") else str(tx.paid_by),
-                "split_mode": tx.split_mode.value if hasattr(tx.split_mode, "value") else str(tx.split_mode),
-                "card_label": tx.card_label or "",
-            }
-        )
+    return _with_archived(tx_frame(rows), archived_frame(start, end, owner=owner, account_id=account_id))
 
-    return pd.DataFrame(data)
 
+def _segments(start: Optional[date], end: Optional[date]) -> list[tuple[Optional[date], Optional[date], bool]]:
+    """`[start, end]` em trechos `(início, fim, arquivado)`, do mais recente ao mais antigo.
 
-def current_balance_for_account(account_id: int) -> float:
-    with get_session() as session:
-        acc = session.get(Account, account_id)
-        if not acc:
-            return 0.0
-        rows = session.exec(select(Transaction.amount).where(Transaction.account_id == account_id)).all()
-        tx_sum = sum(rows) if rows else 0.0
-        
-        return float(acc.initial_balance + tx_sum)
+    Cada mês arquivado vira um trecho próprio; entre eles ficam os trechos só do SQLite.
+    """
+    segments = []
+    upper = end
+    for month in reversed(archived_months(start, end)):
+        first, stop = month_bounds(month)
+        last = stop - timedelta(days=1)
+        if upper is None or upper > last:
+            segments.append((stop, upper, False))
+        segments.append((max(first, start) if start else first, min(last, end) if end else last, True))
+        upper = first - timedelta(days=1)
+    if upper is None or start is None or start <= upper:
+        segments.append((start, upper, False))
+    return segments
+
+
+def iter_transactions(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    owner: Optional[str] = None,
+    account_id: Optional[int] = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Iterator[pd.DataFrame]:
+    """Mesmas linhas de `list_transactions`, em DataFrames de até `batch_size` linhas.
+
+    O cursor é lido aos poucos (`yield_per`), então a memória não cresce com o
+    tamanho do histórico. Um mês arquivado é lido de uma vez (uma partição) e
+    sai na mesma ordem, entre os trechos do SQLite.
+    """
+    for seg_start, seg_end, archived in _segments(start, end):
+        if archived:
+            df = list_transactions(seg_start, seg_end, owner=owner, account_id=account_id)
+            for i in range(0, len(df), batch_size):
+                yield df.iloc[i : i + batch_size]
+            continue
+
+        q = transactions_query(start=seg_start, end=seg_end, owner=owner, account_id=account_id)
+        with get_read_session() as session:
+            result = session.connection().execution_options(yield_per=batch_size).execute(q)
+            for rows in result.partitions():
+                yield tx_frame(rows)
+
+
+def list_transactions_page(
+    cursor: Optional[tuple] = None,
+    limit: int = PAGE_SIZE,
+    filters: Optional[dict] = None,
+    search: Optional[str] = None,
+    sort: str = "date",
+    descending: bool = True,
+) -> tuple[pd.DataFrame, Optional[tuple]]:
+    """Uma página de transações por keyset em `(sort, id)`; retorna `(página, próximo cursor)`.
+
+    `cursor` é o `(valor de sort, id)` da última linha da página anterior (ou
+    `None` para a primeira) e `filters` aceita os filtros de `transactions_query`.
+    Nada é pulado com OFFSET: cada página é uma busca no índice a partir do
+    cursor, com custo constante em qualquer profundidade. O próximo cursor é
+    `None` na última página. Só o SQLite: meses arquivados ficam fora do editor.
+    """
+    key = SORT_COLUMNS[sort]
+    q = transactions_query(**(filters or {}), search=search).order_by(None)
+
+    if cursor is not None:
+        after = tuple_(key, Transaction.id)
+        q = q.where(after < tuple_(*cursor) if descending else after > tuple_(*cursor))
+
+    if descending:
+        q = q.order_by(key.desc(), Transaction.id.desc())
+    else:
+        q = q.order_by(key.asc(), Transaction.id.asc())
+
+    with get_read_session() as session:
+        rows = session.connection().execute(q.limit(limit + 1)).fetchall()
+
+    page = tx_frame(rows[:limit])
+    if len(rows) <= limit:
+        return page, None
+    last = page.iloc[-1]
+    value = last["date"].date() if sort == "date" else int(last[sort])
+    return page, (value, int(last["id"]))
+
+
+def count_transactions(filters: Optional[dict] = None, search: Optional[str] = None) -> int:
+    """Quantas transações atendem aos mesmos filtros de `list_transactions_page`."""
+    q = transactions_query(**(filters or {}), search=search).order_by(None)
+
+    with get_read_session() as session:
+        return session.connection().execute(select(func.count()).select_from(q.subquery())).scalar_one()
+
+
+def search_transactions(
+    query: str,
+    filters: Optional[dict] = None,
+    limit: Optional[int] = SEARCH_LIMIT,
+) -> pd.DataFrame:
+    """Transações cuja descrição casa com `query`, das mais relevantes (bm25) às menos.
+
+    `filters` aceita os filtros de `transactions_query`; `limit=None` devolve
+    todas. A coluna extra `rank` é o bm25 do FTS5 (menor = mais relevante).
+
+    O bm25 custa proporcional ao número de descrições que casam. Acima de
+    `RANK_MAX_MATCHES` (termos genéricos como "uber", em que as notas quase
+    empatam) o resultado sai por data, mais recentes primeiro, e `rank` fica vazio.
+
+    Transações arquivadas que casam (`search_archive`, mesmo critério do FTS)
+    vêm depois das do SQLite, por data e com `rank` vazio; o scan do arquivo
+    para quando completa o `limit`.
+    """
+    match = fts_query(query)
+    if not match:
+        return tx_frame([], extra=["rank"])
+
+    with get_read_session() as session:
+        conn = session.connection()
+        n_matches = conn.execute(select(func.count()).select_from(fts).where(fts_match(match))).scalar_one()
+
+        if n_matches > RANK_MAX_MATCHES:
+            q = transactions_query(**(filters or {}), search=query).add_columns(literal(None).label("rank"))
+        else:
+            # MATERIALIZED: o MATCH roda uma vez; sem isso o SQLite pode
+            # percorrer os filtros e refazer a busca no FTS para cada linha.
+            ranked = (
+                select(fts.c.rowid.label("id"), fts.c.rank.label("rank"))
+                .where(fts_match(match))
+                .cte("ranked")
+                .prefix_with("MATERIALIZED")
+            )
+            q = (
+                transactions_query(**(filters or {}))
+                .order_by(None)
+                .add_columns(ranked.c.rank)
+                .join(ranked, ranked.c.id == Transaction.id)
+                .order_by(ranked.c.rank, Transaction.date.desc(), Transaction.id.desc())
+            )
+        if limit is not None:
+            q = q.limit(limit)
+
+        rows = conn.execute(q).fetchall()
+
+    found = tx_frame(rows, extra=["rank"])
+    if limit is not None and len(found) >= limit:
+        return found
+
+    remaining = None if limit is None else limit - len(found)
+    cold = archived_frame(**(filters or {}), search=query, limit=remaining)
+    if cold is None or cold.empty:
+        return found
+    cold = cold.assign(rank=None)
+    found = pd.concat([found, cold], ignore_index=True).astype(TX_DTYPES)
+    return found if limit is None else found.head(limit)
+
+
+def search_ids(query: str, filters: Optional[dict] = None) -> pd.Series:
+    """Ids de todas as transações que casam com `query`, sem ordem nem bm25.
+
+    Para filtrar um quadro já carregado (ex: o painel do mês): o FTS devolve só
+    os ids do SQLite e o arquivo só a coluna `id` do scan (`search_archive`).
+    """
+    if not fts_query(query):
+        return pd.Series([], dtype="int64", name="id")
+
+    filters = filters or {}
+    q = transactions_query(**filters, search=query).order_by(None).with_only_columns(Transaction.id)
+    with get_read_session() as session:
+        ids = list(session.connection().execute(q).scalars())
+
+    cold = search_archive(query, columns=["id"], **filters)
+    if cold is not None:
+        ids += cold["id"].to_pylist()
+    return pd.Series(ids, dtype="int64", name="id")
+
+
+def current_balance_for_account(account_id: int) -> int:
+    return balance_on(account_id)
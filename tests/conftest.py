@@ -0,0 +1,112 @@
+"""Fixtures dos testes: todo teste que grava roda num banco descartável.
+
+`data/finance.db` nunca é aberto: antes de qualquer import de `src`, o
+`FINDASH_DB_PATH` aponta para um diretório temporário. O banco sintético
+(`benchmarks.generator`) é gerado uma vez por sessão e copiado para cada
+teste; `use_database` descarta os módulos de `src` já importados, então os
+testes importam os serviços dentro do corpo, depois da fixture `db`.
+"""
+from __future__ import annotations
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+os.environ["FINDASH_DB_PATH"] = str(Path(tempfile.mkdtemp(prefix="findash-tests-")) / "finance.db")
+os.environ.pop("FINDASH_ARCHIVE_DIR", None)
+
+from benchmarks.generator import build_database, use_database  # noqa: E402
+
+# Tamanho e fim do histórico sintético (fixos: os testes não dependem de hoje).
+N_TRANSACTIONS = 3_000
+END = date(2026, 6, 30)
+
+
+def pytest_configure(config) -> None:
+    # Cada `use_database` reimporta `src.models`: o SQLModel avisa que as classes foram redeclaradas.
+    config.addinivalue_line("filterwarnings", "ignore:This declarative base already contains")
+
+
+@pytest.fixture(scope="session")
+def template_db(tmp_path_factory) -> Path:
+    path = tmp_path_factory.mktemp("template") / "finance.db"
+    build_database(path, N_TRANSACTIONS, end=END)
+    from src.db import engine
+
+    engine.dispose()
+    return path
+
+
+@pytest.fixture
+def db(template_db, tmp_path, monkeypatch) -> Path:
+    """Cópia do banco sintético, migrada, com o arquivo frio em `tmp_path/archive`."""
+    path = tmp_path / "finance.db"
+    shutil.copy(template_db, path)
+    monkeypatch.setenv("FINDASH_ARCHIVE_DIR", str(tmp_path / "archive"))
+    use_database(path)
+
+    import src.models  # noqa: F401  (registra as tabelas no metadata)
+    from src.db import engine, init_db, read_engine
+
+    init_db()
+    yield path
+    engine.dispose()
+    read_engine.dispose()
+
+
+def random_writes(rng: random.Random, n: int) -> None:
+    """`n` escritas sorteadas pelos serviços: criações, lotes, transferências, edições e exclusões."""
+    from src.services.accounts import list_accounts
+    from src.services.categories import list_categories
+    from src.services.transactions import (
+        create_transaction,
+        create_transactions_bulk,
+        create_transfer,
+        delete_transaction,
+        list_transactions_page,
+        update_transaction,
+    )
+
+    accounts = [a.id for a in list_accounts()]
+    categories = [c.id for c in list_categories()]
+    owners = ["petrus", "partner", "both"]
+
+    def day() -> date:
+        return END - timedelta(days=rng.randrange(3 * 365))
+
+    def row() -> dict:
+        return {
+            "date": day(),
+            "amount": rng.randint(-50_000, 50_000),
+            "description": f"Teste {rng.randrange(1000)}",
+            "account_id": rng.choice(accounts),
+            "category_id": rng.choice(categories),
+            "owner": rng.choice(owners),
+        }
+
+    ids = list_transactions_page(limit=500, sort="date")[0]["id"].tolist()
+    for _ in range(n):
+        op = rng.random()
+        if op < 0.3:
+            fields = row()
+            create_transaction(fields.pop("date"), **fields)
+        elif op < 0.4:
+            create_transactions_bulk([row() for _ in range(rng.randint(1, 20))])
+        elif op < 0.5:
+            src, dst = rng.sample(accounts, 2)
+            create_transfer(day(), rng.randint(1, 100_000), "Transferência", src, dst, rng.choice(categories))
+        elif op < 0.85 and ids:
+            # Muda de dia, conta, categoria e dono: sai de uma chave dos agregados e entra em outra.
+            update_transaction(ids.pop(rng.randrange(len(ids))), **row())
+        elif ids:
+            delete_transaction(ids.pop(rng.randrange(len(ids))))
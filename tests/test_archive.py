@@ -0,0 +1,147 @@
+"""Arquivo frio: arquivar e desarquivar não mudam o que as leituras devolvem."""
+import io
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from conftest import END
+
+pytest.importorskip("pyarrow")
+
+HORIZON = 48
+
+
+def _parquet_export() -> dict[str, pd.DataFrame]:
+    import pyarrow.parquet as pq
+
+    from src.services.export import export_parquet
+
+    with tempfile.TemporaryDirectory() as tmp:
+        export_parquet(tmp, batch_size=2_000)
+        return {str(p.relative_to(tmp)): pq.read_table(p).to_pandas() for p in sorted(Path(tmp).rglob("*.parquet"))}
+
+
+def _snapshot() -> dict:
+    from src.services.export import export_csv
+    from src.services.transactions import iter_transactions, list_transactions, search_transactions
+
+    full = list_transactions(owner="todos")
+    csv = io.StringIO()
+    export_csv(csv, batch_size=2_000)
+    return {
+        "full": full,
+        "window": list_transactions(END - timedelta(days=500), END - timedelta(days=200), owner="partner"),
+        "account": list_transactions(account_id=int(full["account_id"].iloc[0]), owner="todos"),
+        "iter": pd.concat(list(iter_transactions(batch_size=1_000)), ignore_index=True).astype(full.dtypes.to_dict()),
+        "csv": csv.getvalue(),
+        "parquet": _parquet_export(),
+        "search": sorted(search_transactions("mercado", limit=None)["id"]),
+    }
+
+
+def _assert_same(before: dict, after: dict) -> None:
+    for key, value in before.items():
+        if isinstance(value, pd.DataFrame):
+            pd.testing.assert_frame_equal(after[key], value, obj=key)
+        elif key == "parquet":
+            assert list(after[key]) == list(value)
+            for part, frame in value.items():
+                pd.testing.assert_frame_equal(after[key][part], frame, obj=part)
+        else:
+            assert after[key] == value, key
+
+
+def test_archive_round_trip(db):
+    from src.services import archive
+    from src.services.ledger import check_ledger
+    from src.services.rollups import check_rollup
+    from src.services.transactions import count_transactions
+
+    before = _snapshot()
+    moved = archive.archive_months(archive.archive_cutoff(END, HORIZON))
+
+    assert moved and archive.archived_months() == sorted(moved)
+    assert count_transactions() == len(before["full"]) - sum(moved.values())
+    _assert_same(before, _snapshot())
+    assert check_rollup().empty and check_ledger().empty
+
+    month = sorted(moved)[len(moved) // 2]
+    assert archive.unarchive_month(month) == moved[month]
+    assert month not in archive.archived_months()
+    _assert_same(before, _snapshot())
+    assert check_rollup().empty and check_ledger().empty
+
+
+def test_archived_rows_are_read_only(db):
+    from src.services import archive
+    from src.services.transactions import delete_transaction, list_transactions, update_transaction
+
+    full = list_transactions(owner="todos")
+    moved = archive.archive_months(archive.archive_cutoff(END, HORIZON))
+    month = min(moved)
+    t_id = int(full.loc[full["date"].dt.strftime("%Y-%m") == month, "id"].iloc[0])
+
+    assert archive.archived_month_of(t_id) == month
+    with pytest.raises(ValueError, match=month):
+        update_transaction(t_id, description="x")
+    with pytest.raises(ValueError, match=month):
+        delete_transaction(t_id)
+    pd.testing.assert_frame_equal(list_transactions(owner="todos"), full)
+
+
+def test_new_rows_in_archived_month_join_on_rearchive(db):
+    from src.services import archive
+    from src.services.transactions import count_transactions, create_transaction, list_transactions
+
+    moved = archive.archive_months(archive.archive_cutoff(END, HORIZON))
+    month = min(moved)
+    first, _ = archive.month_bounds(month)
+    row = list_transactions(owner="todos").iloc[0]
+    create_transaction(first, -4_321, "Lançamento atrasado", int(row["account_id"]), int(row["category_id"]))
+    before = list_transactions(owner="todos")
+
+    hot = count_transactions()
+    assert archive.archive_months(archive.archive_cutoff(END, HORIZON)) == {month: 1}
+    assert count_transactions() == hot - 1
+    pd.testing.assert_frame_equal(list_transactions(owner="todos"), before)
+
+
+def test_archived_search_scans_with_filters_and_limit(db):
+    from src.services import archive
+    from src.services.search import text_mask
+    from src.services.transactions import list_transactions, search_transactions
+
+    full = list_transactions(owner="todos")
+    moved = archive.archive_months(archive.archive_cutoff(END, HORIZON))
+    start, _ = archive.month_bounds(sorted(moved)[1])
+    _, stop = archive.month_bounds(sorted(moved)[-2])
+    end = stop - timedelta(days=1)
+    window = full[(full["date"] >= pd.Timestamp(start)) & (full["date"] <= pd.Timestamp(end))]
+
+    for query in ["merc", "uber", "farm", "pagamento fatura"]:
+        expected = set(full.loc[text_mask(full["description"], query), "id"])
+        assert set(search_transactions(query, limit=None)["id"]) == expected, query
+        expected = set(window.loc[text_mask(window["description"], query), "id"])
+        assert set(search_transactions(query, {"start": start, "end": end}, limit=None)["id"]) == expected, query
+
+    # Só arquivo no intervalo: o limite corta as mais recentes e o scan não passa dele.
+    matches = window[text_mask(window["description"], "merc")]
+    capped = archive.search_archive("merc", start, end, limit=5)
+    assert capped.num_rows == 5
+    assert capped["id"].to_pylist() == matches["id"].head(5).tolist()
+    assert len(search_transactions("merc", {"start": start, "end": end}, limit=5)) == 5
+
+
+def test_search_ids_matches_search(db):
+    from src.services import archive
+    from src.services.transactions import search_ids, search_transactions
+
+    archive.archive_months(archive.archive_cutoff(END, HORIZON))
+    start, end = END - timedelta(days=5 * 365), END
+    for query in ["merc", "uber", "farmacia"]:
+        filters = {"start": start, "end": end}
+        assert sorted(search_ids(query, filters)) == sorted(search_transactions(query, filters, limit=None)["id"])
+    assert search_ids("").empty
@@ -0,0 +1,65 @@
+import random
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+
+from src.config import DEFAULT_CLOSING_DAY
+from src.services.billing import assign_cycles, closing_date, cycle_bounds, due_date, invoice_window
+
+
+@pytest.mark.parametrize(
+    "d, closing_day, bounds",
+    [
+        # Fechamento no dia 3: a fatura de março vai de 04/02 a 03/03.
+        (date(2026, 3, 3), 3, (date(2026, 2, 4), date(2026, 3, 3))),
+        (date(2026, 3, 4), 3, (date(2026, 3, 4), date(2026, 4, 3))),
+        (date(2026, 2, 4), 3, (date(2026, 2, 4), date(2026, 3, 3))),
+        # Virada de ano.
+        (date(2026, 12, 20), 10, (date(2026, 12, 11), date(2027, 1, 10))),
+        # Meses curtos fecham no último dia.
+        (date(2026, 2, 15), 31, (date(2026, 2, 1), date(2026, 2, 28))),
+        (date(2024, 2, 29), 30, (date(2024, 1, 31), date(2024, 2, 29))),
+        (date(2026, 3, 1), 31, (date(2026, 3, 1), date(2026, 3, 31))),
+    ],
+)
+def test_cycle_bounds(d, closing_day, bounds):
+    assert cycle_bounds(d, closing_day) == bounds
+
+
+def test_closing_date_normalizes_month():
+    assert closing_date(2026, 13, 5) == date(2027, 1, 5)
+    assert closing_date(2026, 0, 31) == date(2025, 12, 31)
+    assert closing_date(2026, 14, 31) == date(2027, 2, 28)
+
+
+@pytest.mark.parametrize(
+    "cycle_end, closing_day, due_day, due",
+    [
+        (date(2026, 3, 3), 3, 10, date(2026, 3, 10)),
+        (date(2026, 3, 25), 25, 5, date(2026, 4, 5)),
+        (date(2026, 1, 20), 20, 31, date(2026, 1, 31)),
+        (date(2026, 1, 28), 28, 1, date(2026, 2, 1)),
+    ],
+)
+def test_due_date(cycle_end, closing_day, due_day, due):
+    assert due_date(cycle_end, closing_day, due_day) == due
+
+
+def test_assign_cycles_matches_cycle_bounds():
+    rng = random.Random(3)
+    first = date(2023, 1, 1)
+    dates = [first + timedelta(days=rng.randrange(4 * 365)) for _ in range(3_000)]
+    accounts = [rng.choice([1, 2, 3, 4]) for _ in dates]
+    closing_days = {1: 3, 2: 31, 3: 15}  # a conta 4 usa o padrão do config
+
+    cycles = assign_cycles(pd.Series(pd.to_datetime(dates)), pd.Series(accounts), closing_days)
+
+    expected = [cycle_bounds(d, closing_days.get(a, DEFAULT_CLOSING_DAY))[1] for d, a in zip(dates, accounts)]
+    assert cycles.dt.date.tolist() == expected
+
+
+def test_invoice_window_covers_every_card():
+    # Fechamento 3: faturas de 04/01 a 03/04; fechamento 20: de 21/12 a 20/03.
+    assert invoice_window(date(2026, 3, 10), 3, [3, 20]) == (date(2025, 12, 21), date(2026, 4, 3))
+    assert invoice_window(date(2026, 3, 10), 1, []) == cycle_bounds(date(2026, 3, 10))
@@ -0,0 +1,80 @@
+"""Cache das leituras: uma consulta de versão por rerun, invalidado por qualquer escrita."""
+import sqlite3
+
+from conftest import END
+
+
+def _count_version_reads(monkeypatch) -> list:
+    from src import cache
+
+    calls = []
+    real = cache.data_version
+
+    def counted() -> int:
+        calls.append(1)
+        return real()
+
+    monkeypatch.setattr(cache, "data_version", counted)
+    return calls
+
+
+def test_rerun_reads_version_once(db, monkeypatch):
+    from src import cache
+
+    calls = _count_version_reads(monkeypatch)
+    with cache.script_run():
+        cache.list_accounts()
+        cache.list_categories()
+        cache.list_transactions(start=END.replace(day=1), end=END, owner="todos")
+        cache.list_accounts()
+    assert len(calls) == 1
+
+    # Fora de um rerun cada leitura confere a versão.
+    cache.list_accounts()
+    assert len(calls) == 2
+
+
+def test_local_write_invalidates_inside_a_run(db, monkeypatch):
+    from src import cache
+    from src.services.transactions import create_transaction
+
+    window = {"start": END.replace(day=1), "end": END, "owner": "todos"}
+    calls = _count_version_reads(monkeypatch)
+    with cache.script_run():
+        before = cache.list_transactions(**window)
+        acc, cat = int(before["account_id"].iloc[0]), int(before["category_id"].iloc[0])
+        create_transaction(END, -123, "Escrita no meio do rerun", acc, cat)
+        after = cache.list_transactions(**window)
+    assert len(after) == len(before) + 1
+    assert len(calls) == 2
+
+
+def test_write_from_another_process_invalidates_next_run(db):
+    from src import cache
+
+    window = {"start": END.replace(day=1), "end": END, "owner": "todos"}
+    with cache.script_run():
+        before = cache.list_transactions(**window)
+
+    # Escrita direta no arquivo, como a linha de comando ou outro worker.
+    con = sqlite3.connect(db)
+    con.execute('DELETE FROM "transaction" WHERE id = ?', (int(before["id"].iloc[0]),))
+    con.execute("UPDATE dataversion SET version = version + 1")
+    con.commit()
+    con.close()
+
+    with cache.script_run():
+        assert len(cache.list_transactions(**window)) == len(before) - 1
+
+
+def test_count_is_cached_per_filters(db):
+    from src import cache
+    from src.services.transactions import count_transactions
+
+    filters = {"start": END.replace(day=1), "end": END, "owner": "todos", "account_id": None}
+    with cache.script_run():
+        total = cache.count_transactions(filters, search="mercado")
+        misses = cache._stats["count_transactions"]["misses"]
+        assert cache.count_transactions(dict(filters), search="mercado") == total
+    assert cache._stats["count_transactions"]["misses"] == misses
+    assert total == count_transactions(filters, search="mercado")
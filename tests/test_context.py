@@ -0,0 +1,38 @@
+from datetime import date
+
+
+def test_sync_drops_reads_from_an_older_version(db):
+    from src.db import data_version
+    from src.services.context import DataContext
+    from src.services.transactions import create_transaction
+
+    ctx = DataContext(today=date(2026, 6, 30))
+    ctx.sync(data_version())
+    before = ctx.transactions(date(2026, 6, 1), date(2026, 6, 30))
+    accounts = ctx.accounts
+
+    ctx.sync(data_version())
+    assert ctx.transactions(date(2026, 6, 1), date(2026, 6, 30)) is before
+    assert ctx.accounts is accounts
+
+    create_transaction(date(2026, 6, 15), -1_234, "Fragmento", accounts[0].id, ctx.categories[0].id, "both")
+    ctx.sync(data_version())
+    after = ctx.transactions(date(2026, 6, 1), date(2026, 6, 30))
+    assert len(after) == len(before) + 1
+    assert "Fragmento" in after["description"].tolist()
+
+
+def test_memo_and_windows_are_capped(db):
+    from src.services import context
+    from src.services.context import DataContext
+
+    ctx = DataContext(today=date(2026, 6, 30))
+    for month in range(1, 13):
+        ctx.transactions(date(2025, month, 1), date(2025, month, 28), owner="petrus")
+        ctx.rollup(date(2025, month, 1), date(2025, month, 28))
+        ctx.balances(as_of=date(2025, month, 28))
+
+    assert len(ctx._memo) == context.MEMO_MAX_ENTRIES
+    assert len(ctx._windows) == context.WINDOWS_MAX
+    # O mais recente continua servido da memória.
+    assert ("balances", True, date(2025, 12, 28)) in ctx._memo
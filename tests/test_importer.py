@@ -0,0 +1,63 @@
+"""Importador de extratos: hashes estáveis e reimportação sem duplicar."""
+import hashlib
+import io
+from collections import Counter
+
+import pytest
+
+CSV = """data,valor,descricao
+05/03/2026,-12.34,Mercado São José
+05/03/2026,-12.34,Mercado São José
+06/03/2026,1500.00,Salário
+07/03/2026,-0.05,Tarifa
+xx/03/2026,-1.00,Data inválida
+"""
+
+
+@pytest.fixture
+def ids(db):
+    from src.services.accounts import list_accounts
+    from src.services.categories import list_categories
+
+    return list_accounts()[0].id, list_categories()[0].id
+
+
+def _import(acc, cat, **kwargs):
+    from src.services.importer import import_csv
+
+    return import_csv(io.StringIO(CSV), account_id=acc, category_id=cat, **kwargs)
+
+
+def test_hashes_keep_the_reais_text_format(ids):
+    from sqlalchemy import text
+
+    from src.db import engine
+
+    acc, cat = ids
+    report = _import(acc, cat)
+    assert (report.inserted, report.invalid) == (4, 1)
+
+    # Formato anterior aos centavos: valor em reais com duas casas.
+    seen = Counter()
+    expected = set()
+    for day, value, description in [
+        ("2026-03-05", -12.34, "Mercado São José"),
+        ("2026-03-05", -12.34, "Mercado São José"),
+        ("2026-03-06", 1500.0, "Salário"),
+        ("2026-03-07", -0.05, "Tarifa"),
+    ]:
+        key = f"{acc}|{day}|{value:.2f}|{description}"
+        seen[key] += 1
+        expected.add(hashlib.sha1(f"{key}|{seen[key]}".encode()).hexdigest())
+
+    with engine.connect() as conn:
+        stored = {h for (h,) in conn.execute(text('SELECT import_hash FROM "transaction" WHERE import_hash IS NOT NULL'))}
+    assert stored == expected
+
+
+def test_reimport_inserts_nothing(ids):
+    acc, cat = ids
+    _import(acc, cat)
+    again = _import(acc, cat, chunk_size=2)
+
+    assert (again.inserted, again.duplicates) == (0, 4)
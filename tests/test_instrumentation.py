@@ -0,0 +1,55 @@
+"""Instrumentação SQL: só coleta dentro de `record()`, na thread que o abriu."""
+import threading
+
+from sqlalchemy import event, text
+
+
+def test_record_counts_queries_and_rows(db):
+    from src import instrumentation
+    from src.services.accounts import list_accounts
+
+    with instrumentation.record() as log:
+        accounts = list_accounts()
+
+    assert log.n == 1
+    assert log.records[0].rows == len(accounts)
+    assert log.summary()["origem"].tolist() == ["accounts.list_accounts"]
+
+
+def test_inert_outside_record_and_on_other_threads(db):
+    from src import instrumentation
+    from src.db import read_engine
+
+    with read_engine.connect() as conn:
+        conn.execute(text("SELECT 1")).all()
+
+    with instrumentation.record() as log, instrumentation.record(collect=False) as quiet:
+        assert instrumentation.current() is quiet
+        with read_engine.connect() as conn:
+            conn.execute(text("SELECT 1")).all()
+    assert log.n == 0 and quiet.n == 0
+
+    def other_session() -> None:
+        with read_engine.connect() as conn:
+            conn.execute(text("SELECT 2")).all()
+
+    with instrumentation.record() as log:
+        thread = threading.Thread(target=other_session)
+        thread.start()
+        thread.join()
+        with read_engine.connect() as conn:
+            conn.execute(text("SELECT 3")).all()
+    assert [r.statement for r in log.records] == ["SELECT 3"]
+
+
+def test_listeners_registered_once(db):
+    from src import instrumentation
+    from src.db import engine
+
+    pool = engine.pool
+    instrumentation.enable()
+    instrumentation.enable(engine)
+
+    assert engine.pool is pool
+    assert event.contains(engine, "after_cursor_execute", instrumentation._after)
+    assert len(engine.dispatch.after_cursor_execute) == 1
@@ -0,0 +1,39 @@
+"""Razão diário acompanha as escritas dos serviços."""
+import random
+from datetime import timedelta
+
+from conftest import END, random_writes
+
+
+def _totals(as_of=None) -> dict[int, int]:
+    from sqlalchemy import text
+
+    from src.db import engine
+
+    sql = 'SELECT account_id, SUM(amount) FROM "transaction" WHERE :d IS NULL OR date <= :d GROUP BY account_id'
+    with engine.connect() as conn:
+        return dict(conn.execute(text(sql), {"d": as_of and as_of.isoformat()}).all())
+
+
+def test_ledger_follows_random_writes(db):
+    from src.services.accounts import list_accounts
+    from src.services.ledger import balance_on, check_ledger
+
+    random_writes(random.Random(11), 300)
+
+    assert check_ledger().empty
+    totals = _totals()
+    for acc in list_accounts():
+        assert balance_on(acc.id) == acc.initial_balance + totals.get(acc.id, 0)
+
+
+def test_balance_on_past_day(db):
+    from src.services.accounts import list_accounts
+    from src.services.ledger import balance_on
+
+    random_writes(random.Random(5), 100)
+    as_of = END - timedelta(days=400)
+
+    totals = _totals(as_of)
+    for acc in list_accounts():
+        assert balance_on(acc.id, as_of) == acc.initial_balance + totals.get(acc.id, 0)
@@ -0,0 +1,138 @@
+"""Banco no schema original (valores em reais, `float`) migrado até a última versão."""
+import random
+import shutil
+import sqlite3
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from conftest import ROOT, use_database
+
+# Schema do `finance.db` antes da primeira migração.
+BASELINE_DDL = """
+CREATE TABLE account (
+    id INTEGER NOT NULL, name VARCHAR NOT NULL, owner VARCHAR(7) NOT NULL,
+    type VARCHAR(8) NOT NULL, initial_balance FLOAT NOT NULL, PRIMARY KEY (id)
+);
+CREATE TABLE category (id INTEGER NOT NULL, name VARCHAR NOT NULL, type VARCHAR NOT NULL, PRIMARY KEY (id));
+CREATE TABLE "transaction" (
+    id INTEGER NOT NULL, date DATE NOT NULL, amount FLOAT NOT NULL, description VARCHAR NOT NULL,
+    account_id INTEGER NOT NULL, category_id INTEGER NOT NULL, owner VARCHAR(7) NOT NULL,
+    paid_by VARCHAR(7) NOT NULL, split_mode VARCHAR(9) NOT NULL, card_label VARCHAR,
+    created_at DATETIME NOT NULL, updated_at DATETIME NOT NULL, PRIMARY KEY (id)
+);
+"""
+
+
+def _baseline(path) -> None:
+    """Banco pequeno no schema original: centavos quebrados em `float` e séries "(n/N)"."""
+    rng = random.Random(1)
+    now = datetime(2026, 1, 1).isoformat(sep=" ")
+    con = sqlite3.connect(path)
+    con.executescript(BASELINE_DDL)
+    con.executemany(
+        "INSERT INTO account VALUES (?, ?, ?, ?, ?)",
+        [(1, "Conta | PP", "petrus", "checking", 1234.56), (2, "Cartão | Crédito", "partner", "credit", 0.1)],
+    )
+    con.executemany(
+        "INSERT INTO category VALUES (?, ?, ?)",
+        [(1, "Alimentação 🍽️", "expense"), (2, "Salário", "income"), (3, "Transferência", "transfer")],
+    )
+    rows, day = [], date(2025, 1, 1)
+    for i in range(400):
+        day += timedelta(days=rng.randrange(2))
+        amount = round(rng.uniform(-300, 300), 2) if i % 10 else round(0.1 + 0.2 + rng.randrange(5000), 2)
+        rows.append((day.isoformat(), amount, f"Mercado São José {i}", rng.choice([1, 2]), rng.choice([1, 2, 3])))
+    for n in range(1, 7):
+        rows.append(((date(2025, 1, 15) + timedelta(days=31 * (n - 1))).isoformat(), -99.9, f"TV (loja) ({n}/10)", 2, 1))
+    con.executemany(
+        'INSERT INTO "transaction" (date, amount, description, account_id, category_id, owner, paid_by, '
+        "split_mode, card_label, created_at, updated_at) VALUES (?, ?, ?, ?, ?, 'petrus', 'petrus', 'none', NULL, ?, ?)",
+        [(*row, now, now) for row in rows],
+    )
+    con.commit()
+    con.close()
+
+
+def _shipped(path) -> None:
+    """O `data/finance.db` do repositório, se ainda estiver no schema original."""
+    shutil.copy(ROOT / "data" / "finance.db", path)
+    con = sqlite3.connect(path)
+    migrated = con.execute("SELECT 1 FROM sqlite_master WHERE name = 'schema_migrations'").fetchone()
+    con.close()
+    if migrated:
+        pytest.skip("data/finance.db já foi migrado localmente")
+
+
+@pytest.fixture(params=[_baseline, _shipped], ids=["sintetico", "data-finance-db"])
+def baseline(request, tmp_path, monkeypatch):
+    path = tmp_path / "finance.db"
+    request.param(path)
+
+    con = sqlite3.connect(path)
+    balances = {
+        acc_id: round((initial + total) * 100)
+        for acc_id, initial, total in con.execute(
+            'SELECT a.id, a.initial_balance, COALESCE(SUM(t.amount), 0) FROM account a '
+            'LEFT JOIN "transaction" t ON t.account_id = a.id GROUP BY a.id'
+        )
+    }
+    amounts = dict(con.execute('SELECT id, amount FROM "transaction"').fetchall())
+    con.close()
+
+    monkeypatch.setenv("FINDASH_ARCHIVE_DIR", str(tmp_path / "archive"))
+    use_database(path)
+    yield balances, amounts
+
+    from src.db import engine, read_engine
+
+    engine.dispose()
+    read_engine.dispose()
+
+
+def test_migrates_to_latest_keeping_balances(baseline):
+    balances, amounts = baseline
+
+    import src.models  # noqa: F401
+    from src.db import engine, init_db
+    from src.migrations import MIGRATIONS, applied_versions, run_migrations
+    from src.services.ledger import balance_on, check_ledger
+    from src.services.rollups import check_rollup
+
+    init_db()
+
+    assert applied_versions(engine) == {version for version, _, _ in MIGRATIONS}
+    assert run_migrations(engine) == []
+
+    with engine.connect() as conn:
+        migrated = dict(conn.exec_driver_sql('SELECT id, amount FROM "transaction"').fetchall())
+        types = {t for (t,) in conn.exec_driver_sql('SELECT DISTINCT typeof(amount) FROM "transaction"')}
+    assert types <= {"integer"}
+    assert migrated == {i: round(a * 100) for i, a in amounts.items()}
+
+    assert {acc_id: balance_on(acc_id) for acc_id in balances} == balances
+    assert check_rollup().empty and check_ledger().empty
+
+
+@pytest.mark.parametrize("baseline", [_baseline], ids=["sintetico"], indirect=True)
+def test_migrated_features_work(baseline):
+    import src.models  # noqa: F401
+    from src.db import data_version, engine, init_db
+    from src.migrations import check_query_plans
+
+    init_db()
+
+    from src.services.transactions import search_transactions
+
+    with engine.connect() as conn:
+        plans = conn.exec_driver_sql(
+            "SELECT p.description, p.total_installments, p.amount, COUNT(t.id) FROM installmentplan p "
+            'JOIN "transaction" t ON t.installment_plan_id = p.id GROUP BY p.id'
+        ).fetchall()
+    assert plans == [("TV (loja)", 10, -9990, 6)]
+
+    found = search_transactions("mercado sao jose 12", limit=None)["description"].tolist()
+    assert "Mercado São José 12" in found and all("12" in d for d in found)
+
+    assert data_version() == 0
+    assert all(ok for ok, _ in check_query_plans(engine).values())
@@ -0,0 +1,50 @@
+import random
+
+import pandas as pd
+import pytest
+
+from src.money import to_cents, to_cents_series, to_reais
+
+
+@pytest.mark.parametrize(
+    "reais, cents",
+    [
+        (0, 0),
+        (12.34, 1234),
+        (-12.34, -1234),
+        (0.1 + 0.2, 30),
+        (19.99, 1999),
+        (-0.01, -1),
+        (1_234_567.89, 123_456_789),
+        (2.675, 268),  # 267.49999... * 100 arredonda como o round(x, 2) antigo
+    ],
+)
+def test_to_cents(reais, cents):
+    assert to_cents(reais) == cents
+    assert isinstance(to_cents(reais), int)
+
+
+def test_to_cents_series_matches_scalar_and_keeps_missing():
+    values = pd.Series([12.34, -0.07, None, 0.1 + 0.2, 1e6])
+    out = to_cents_series(values)
+
+    assert str(out.dtype) == "Int64"
+    assert out.isna().tolist() == [False, False, True, False, False]
+    assert out.dropna().tolist() == [to_cents(v) for v in values.dropna()]
+
+
+def test_round_trip_through_reais():
+    rng = random.Random(7)
+    cents = [rng.randint(-10_000_000, 10_000_000) for _ in range(2_000)]
+
+    assert [to_cents(to_reais(c)) for c in cents] == cents
+    assert to_cents_series(to_reais(pd.Series(cents))).tolist() == cents
+
+
+def test_import_hash_text_matches_two_decimals():
+    from src.services.importer import _reais_series
+
+    amounts = list(range(-1_000, 1_000)) + [123_456_789, -123_456_789]
+    expected = [f"{a / 100:.2f}" for a in amounts]
+
+    assert _reais_series(pd.Series(amounts, dtype="int64")).tolist() == expected
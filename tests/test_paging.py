@@ -0,0 +1,58 @@
+"""Paginação por keyset do editor (`list_transactions_page`)."""
+import pytest
+
+from conftest import END
+
+
+def _all_pages(limit: int, **kwargs):
+    from src.services.transactions import list_transactions_page
+
+    pages, cursor = [], None
+    while True:
+        page, cursor = list_transactions_page(cursor, limit, **kwargs)
+        pages.append(page)
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize("sort", ["date", "amount"])
+@pytest.mark.parametrize("descending", [True, False])
+def test_pages_cover_everything_in_order(db, sort, descending):
+    from src.services.transactions import count_transactions, list_transactions
+
+    pages = _all_pages(97, sort=sort, descending=descending)
+    ids = [i for page in pages for i in page["id"]]
+
+    full = list_transactions(owner="todos").sort_values([sort, "id"], ascending=not descending)
+    assert ids == full["id"].tolist()
+    assert len(ids) == len(set(ids)) == count_transactions()
+    assert all(len(page) == 97 for page in pages[:-1])
+
+
+def test_filtered_pages_match_filtered_list(db):
+    from datetime import timedelta
+
+    from src.services.transactions import list_transactions
+
+    start, end = END - timedelta(days=365), END
+    filters = {"start": start, "end": end, "owner": "partner"}
+    pages = _all_pages(50, filters=filters, sort="amount")
+    ids = [i for page in pages for i in page["id"]]
+
+    full = list_transactions(start, end, owner="partner").sort_values(["amount", "id"], ascending=False)
+    assert ids == full["id"].tolist()
+
+
+def test_cursor_survives_inserts_before_it(db):
+    from src.services.transactions import create_transaction, list_transactions_page
+
+    first, cursor = list_transactions_page(None, 40, sort="date")
+    second, _ = list_transactions_page(cursor, 40, sort="date")
+
+    # Linha nova no topo (mais recente): a próxima página não repete nem pula nada.
+    row = first.iloc[0]
+    create_transaction(END, -100, "Nova", int(row["account_id"]), int(row["category_id"]))
+    again, _ = list_transactions_page(cursor, 40, sort="date")
+
+    assert again["id"].tolist() == second["id"].tolist()
+    assert not set(again["id"]) & set(first["id"])
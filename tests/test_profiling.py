@@ -0,0 +1,24 @@
+import json
+import tracemalloc
+
+from src import profiling
+
+
+def test_nested_rerun_keeps_outer_tracers(tmp_path, monkeypatch):
+    out = tmp_path / "profile.jsonl"
+    monkeypatch.setattr(profiling, "PROFILE_FILE", out)
+    monkeypatch.setattr(profiling.write_jsonl, "__defaults__", (out,))
+    assert not tracemalloc.is_tracing()
+
+    with profiling.profile_rerun({"tracemalloc", "cprofile"}, label="outer") as outer:
+        with profiling.profile_rerun({"tracemalloc", "cprofile"}, label="inner") as inner:
+            with profiling.profiled("inner.section"):
+                kept = bytearray(100_000)  # noqa: F841  (líquida: precisa continuar viva)
+        assert tracemalloc.is_tracing()
+        assert outer.tracer_owner and not inner.tracer_owner
+    assert not tracemalloc.is_tracing()
+
+    inner_row, outer_row = [json.loads(line) for line in out.read_text().splitlines()]
+    assert inner_row["process_wide"] and not inner_row["tracer_owner"]
+    assert inner_row["sections"][0]["mem_kb"] > 50
+    assert outer_row["tracer_owner"] and outer_row["cprofile_top"]
@@ -0,0 +1,29 @@
+"""Rollup mensal acompanha as escritas dos serviços."""
+import random
+
+from conftest import random_writes
+
+
+def test_rollup_follows_random_writes(db):
+    from src.services.rollups import check_rollup
+
+    random_writes(random.Random(11), 300)
+
+    assert check_rollup().empty
+
+
+def test_rollup_matches_listing(db):
+    from datetime import date
+
+    from src.services.rollups import monthly_rollup
+    from src.services.transactions import list_transactions
+
+    random_writes(random.Random(2), 100)
+    start, end = date(2025, 1, 1), date(2026, 6, 30)
+    tx = list_transactions(start, end, owner="todos")
+    expected = tx.groupby(tx["date"].dt.strftime("%Y-%m"))["amount"].agg(
+        income=lambda s: s[s > 0].sum(), expense=lambda s: s[s < 0].sum()
+    )
+
+    rollup = monthly_rollup(start, end).groupby("month")[["income", "expense"]].sum()
+    assert rollup.astype("int64").to_dict() == expected.astype("int64").to_dict()
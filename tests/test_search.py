@@ -0,0 +1,88 @@
+"""Busca textual (FTS5) e o mesmo critério para as transações arquivadas."""
+import pandas as pd
+import pytest
+
+from conftest import END
+
+
+@pytest.fixture
+def ids(db):
+    from src.services.accounts import list_accounts
+    from src.services.categories import list_categories
+    from src.services.transactions import create_transaction, list_transactions
+
+    acc, cat = list_accounts()[0].id, list_categories()[0].id
+    names = {"Farmácia": "Farmácia São João", "Açúcar": "Pão de Açúcar", "Uber": "Uber *Trip", "Ipiranga": "Posto Ipiranga"}
+    for description in names.values():
+        create_transaction(END, -1_000, description, acc, cat)
+    rows = list_transactions(END, END, owner="todos").set_index("description")["id"]
+    return {key: int(rows[description]) for key, description in names.items()}
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("farmacia", "Farmácia"),   # sem acento
+        ("FARMÁCIA", "Farmácia"),   # maiúsculas
+        ("sao jo", "Farmácia"),     # prefixos, todas as palavras
+        ("acucar", "Açúcar"),
+        ("uber*", "Uber"),          # operadores do usuário são ignorados
+        ('"ipir', "Ipiranga"),
+    ],
+)
+def test_search_folds_accents_and_matches_prefixes(ids, query, expected):
+    from src.services.transactions import search_transactions
+
+    assert ids[expected] in search_transactions(query, limit=None)["id"].tolist()
+
+
+def test_search_requires_every_word(ids):
+    from src.services.transactions import search_transactions
+
+    assert ids["Farmácia"] not in search_transactions("farmacia ipiranga", limit=None)["id"].tolist()
+    assert search_transactions("").empty
+    assert search_transactions('"*').empty
+
+
+def test_fts_follows_updates_and_deletes(ids):
+    from src.services.transactions import delete_transaction, search_transactions, update_transaction
+
+    update_transaction(ids["Ipiranga"], description="Posto Shell")
+    assert ids["Ipiranga"] not in search_transactions("ipiranga", limit=None)["id"].tolist()
+    assert ids["Ipiranga"] in search_transactions("shell", limit=None)["id"].tolist()
+
+    delete_transaction(ids["Uber"])
+    assert ids["Uber"] not in search_transactions("uber", limit=None)["id"].tolist()
+
+
+def test_search_agrees_with_text_mask(db):
+    from src.services.search import text_mask
+    from src.services.transactions import list_transactions, search_transactions
+
+    full = list_transactions(owner="todos")
+    for query in ["merc", "uber", "farm", "livraria par", "pagamento fatura"]:
+        expected = set(full.loc[text_mask(full["description"], query), "id"])
+        assert set(search_transactions(query, limit=None)["id"]) == expected, query
+
+
+def test_text_mask():
+    from src.services.search import text_mask
+
+    s = pd.Series(["Farmácia São João", "Superfarma", "Posto"])
+    assert text_mask(s, "farm").tolist() == [True, False, False]
+    assert text_mask(s, "").tolist() == [False, False, False]
+
+
+def test_arrow_patterns_cover_text_mask():
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.compute as pc
+
+    from src.services.search import arrow_patterns, text_mask
+
+    s = pd.Series(["Farmácia São João", "FARMACIA 24H", "Superfarma", "Pão de Açúcar", "ACUCAR UNIAO", "a_farm", "Café"])
+    for query in ["farm", "farmacia sao", "acucar", "pao acu", "cafe", "joão"]:
+        mask = pa.array([True] * len(s))
+        for pattern in arrow_patterns(query):
+            mask = pc.and_(mask, pc.match_substring_regex(pa.array(s), pattern))
+        # Tudo o que o FTS acharia passa pelo filtro do Arrow.
+        assert not (text_mask(s, query) & ~pd.Series(mask.to_pylist())).any(), query